@@ -0,0 +1,67 @@
+# app/acrud.py
+"""
+crud'ning async varianti (async endpointlar uchun).
+
+Har bir funksiya sync crud funksiyasini AsyncSession.run_sync orqali chaqiradi: SQL bitta joyda
+(crud.py / services.py) qoladi, I/O esa async drayver (aiosqlite / asyncpg) orqali event loop'da
+bajariladi — Starlette threadpool'ini band qilmaydi.
+
+    rows = await acrud.list_balances(db, district_id=3)
+
+_cached(...) bilan o'ralganlar natijasi report_cache'da saqlanadi (app/report_cache.py):
+bir xil filtrli takroriy chaqiruv bazaga bormaydi.
+"""
+import functools
+import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import crud, services
+from .report_cache import report_cache
+
+
+def _async(fn):
+    @functools.wraps(fn)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        return await db.run_sync(fn, *args, **kwargs)
+    return wrapper
+
+
+def _cached(fn):
+    sig = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        # pozitsion/nomli/default argumentlar bitta ko'rinishga keltiriladi
+        bound = sig.bind(None, *args, **kwargs)
+        bound.apply_defaults()
+        params = {k: v for k, v in bound.arguments.items() if k != "db"}
+        return await report_cache.get_or_load(
+            fn.__name__, params, lambda: db.run_sync(fn, *args, **kwargs)
+        )
+    return wrapper
+
+
+# ma'lumotnomalar
+list_districts = _async(crud.list_districts)
+list_shops_by_district = _async(crud.list_shops_by_district)
+list_products = _async(crud.list_products)
+get_user_by_tg_id = _async(crud.get_user_by_tg_id)
+ensure_user = _async(crud.ensure_user)
+
+# ombor
+stock_balance_for_product = _async(crud.stock_balance_for_product)
+stock_balances_all = _async(crud.stock_balances_all)
+stock_balances_for = _async(crud.stock_balances_for)
+
+# monitoring / balans
+deliveries_agg_by_shop = _cached(crud.deliveries_agg_by_shop)
+deliveries_agg_paykind = _cached(crud.deliveries_agg_paykind)
+deliveries_list_with_details = _cached(crud.deliveries_list_with_details)
+deliveries_page = _cached(crud.deliveries_page)
+deliveries_agg_by_product_in_shop = _cached(crud.deliveries_agg_by_product_in_shop)
+list_balances = _cached(crud.list_balances)
+shop_balance = _async(crud.shop_balance)
+list_shop_txs = _async(crud.list_shop_txs)
+
+# yozish (bitta tranzaksiya)
+deliver = _async(services.deliver)
+deliver_cart = _async(services.deliver_cart)
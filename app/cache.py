@@ -0,0 +1,63 @@
+# app/cache.py
+"""
+Jarayon ichidagi keshlar uchun umumiy qurilmalar.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Chegaralangan LRU kesh, har yozuv uchun TTL bilan. Thread-safe (qulf faqat lug'at
+    operatsiyalarida ushlanadi — ichida I/O yo'q, event loop'dan ham chaqirish xavfsiz).
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING and item[0] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            if item is not _MISSING:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
@@ -0,0 +1,117 @@
+# app/conditional.py
+"""
+Shartli GET (ETag / Last-Modified): sahifa ma'lumotlari o'zgarmagan bo'lsa 304, render ham qilinmaydi.
+
+Route o'z dependency'sida sahifa tayanadigan versiyalarni yig'adi (refdata digest, hisobot avlodlari,
+oxirgi yetkazish id ...) va check(request, ...) chaqiradi:
+
+    async def _fresh(request: Request, db=Depends(get_async_db), user=Depends(dealer_required)):
+        ref = await refdata.aget(db)
+        conditional.check(request, ref.digest, user=user)
+
+    @router.get("/start", dependencies=[Depends(_fresh)])
+
+Mos kelsa — 304 (HTTPException, tana bo'sh). Aks holda validatorlar request.state'ga yoziladi va
+ConditionalMiddleware ularni 200 javobga sarlavha qilib qo'shadi.
+
+ETag'ga har doim BOOT_ID kiradi: versiya hisoblagichlari jarayon ichida, shablonlar esa deploy bilan
+o'zgaradi — qayta ishga tushgandan keyin eski ETag'lar mos kelmaydi.
+Last-Modified — shu ETag birinchi marta chiqarilgan vaqt; If-Modified-Since faqat
+If-None-Match bo'lmaganda tekshiriladi.
+
+Versiyalar render'dan OLDIN o'qiladi: oraliqda yozuv bo'lsa mijoz yangi tanani eski ETag bilan oladi
+va keyingi so'rovda baribir 200 oladi — teskarisi (eski tana yangi ETag bilan) bo'lmaydi.
+"""
+import hashlib
+import secrets
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import HTTPException, Request
+from .cache import TTLCache
+from .settings import settings
+
+BOOT_ID = secrets.token_hex(4)
+_STATE_KEY = "conditional_headers"
+
+# etag -> birinchi chiqarilgan vaqt (Last-Modified uchun)
+_first_seen = TTLCache(maxsize=settings.ETAG_CACHE_SIZE, ttl=24 * 3600)
+
+
+def make_etag(*parts) -> str:
+    h = hashlib.blake2b(repr((BOOT_ID,) + parts).encode(), digest_size=10).hexdigest()
+    return f'W/"{h}"'
+
+
+def ttl_bucket(ttl: float = settings.REPORT_CACHE_TTL) -> int:
+    """
+    Jarayon ichidagi kesh (report_cache) boshqa jarayon yozuvlarini TTL ichida ko'radi — shu sahifalar
+    ETag'iga qo'shiladi, aks holda kesh yangilangandan keyin ham mijoz 304 olib turaverardi.
+    """
+    return int(time.time() // ttl)
+
+
+def _none_match(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # kuchsiz taqqoslash: W/ prefiksi hisobga olinmaydi
+    want = etag.removeprefix("W/")
+    return any(t.strip().removeprefix("W/") == want for t in header.split(","))
+
+
+def _not_modified_since(header: str, modified: int) -> bool:
+    try:
+        return parsedate_to_datetime(header).timestamp() >= modified
+    except (TypeError, ValueError):
+        return False
+
+
+def check(request: Request, *parts, user=None) -> None:
+    """
+    parts — sahifa tayanadigan versiyalar. URL (path + query) va foydalanuvchi (base.html'da ism/rol
+    chiqadi) avtomatik qo'shiladi. Mos kelsa 304 ko'tariladi.
+    """
+    if user is not None:
+        parts += (user.id, user.role.value, user.full_name)
+    etag = make_etag(request.url.path, request.url.query, *parts)
+    modified = _first_seen.get(etag)
+    if modified is None:
+        modified = int(time.time())
+        _first_seen.set(etag, modified)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(modified, usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+    inm = request.headers.get("if-none-match")
+    ims = request.headers.get("if-modified-since")
+    if (inm and _none_match(inm, etag)) or (not inm and ims and _not_modified_since(ims, modified)):
+        raise HTTPException(status_code=304, headers=headers)
+    setattr(request.state, _STATE_KEY, headers)
+
+
+def skip(request: Request) -> None:
+    """check() yozgan validatorlarni bekor qiladi — javob vaqtinchalik (masalan, hisobot hali tayyor emas)."""
+    if hasattr(request.state, _STATE_KEY):
+        delattr(request.state, _STATE_KEY)
+
+
+class ConditionalMiddleware:
+    """check() yozgan validatorlarni muvaffaqiyatli GET javobiga qo'shadi (sof ASGI, streaming'ga tegmaydi)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return await self.app(scope, receive, send)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = scope.get("state", {}).get(_STATE_KEY)
+                if headers:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()
+                    ]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
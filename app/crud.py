@@ -1,7 +1,11 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func
-from . import models
+from sqlalchemy import select, func, or_
+from . import models, outbox
 from .models import User, Role
+from .settings import settings
+from .pagination import Page, keyset_page
+from .report_cache import touch as touch_reports
+from .refdata import touch as touch_refdata
 from datetime import datetime
 
 
@@ -22,7 +26,7 @@ def ensure_user(db: Session, tg_id: str, full_name: str | None = None, role: Rol
 # District
 def create_district(db: Session, name: str) -> models.District:
     d = models.District(name=name.strip())
-    db.add(d); db.commit(); db.refresh(d); return d
+    db.add(d); touch_reports(db); touch_refdata(db); db.commit(); db.refresh(d); return d
 
 def list_districts(db: Session):
     return db.execute(select(models.District).order_by(models.District.name)).scalars().all()
@@ -30,7 +34,8 @@ def list_districts(db: Session):
 # Shop
 def create_shop(db: Session, name: str, district_id: int) -> models.Shop:
     s = models.Shop(name=name.strip(), district_id=district_id)
-    db.add(s); db.commit(); db.refresh(s); return s
+    db.add(s); touch_reports(db, district_id=district_id); touch_refdata(db)
+    db.commit(); db.refresh(s); return s
 
 def list_shops_by_district(db: Session, district_id: int):
     return db.execute(
@@ -50,7 +55,7 @@ def create_product(db: Session, name: str, kind: str | None, brand: str | None,
         out_price_per_pack=out_price_per_pack,
         is_active=is_active,
     )
-    db.add(p); db.commit(); db.refresh(p); return p
+    db.add(p); touch_refdata(db); db.commit(); db.refresh(p); return p
 
 def list_products(db: Session, only_active: bool = True):
     stmt = select(models.Product)
@@ -59,14 +64,61 @@ def list_products(db: Session, only_active: bool = True):
     return db.execute(stmt.order_by(models.Product.name)).scalars().all()
 
 # Delivery
+# commit=False — faqat flush (id olinadi), commit'ni chaqiruvchi qiladi (services.deliver).
 def create_delivery(db: Session, district_id: int, shop_id: int, product_id: int,
-                    qty_kg: float, unit_price: float, pay_kind: str):
+                    qty_kg: float, unit_price: float, pay_kind: str, commit: bool = True):
     total = qty_kg * unit_price
     d = models.Delivery(
         district_id=district_id, shop_id=shop_id, product_id=product_id,
         qty_kg=qty_kg, unit_price=unit_price, total=total, pay_kind=pay_kind
     )
-    db.add(d); db.commit(); db.refresh(d); return d
+    db.add(d)
+    db.flush()
+    _bump_delivery_rollup(db, [d])
+    touch_reports(db, shop_id=shop_id, district_id=district_id)
+    if not commit:
+        return d
+    db.commit(); db.refresh(d); return d
+
+def create_delivery_doc(db: Session, district_id: int, shop_id: int, pay_kind: str,
+                        lines: list[tuple[int, float, float]], commit: bool = True) -> models.DeliveryDoc:
+    """
+    Savat hujjati + qatorlari. lines: [(product_id, qty_kg, unit_price), ...]
+    Delivery qatorlari bitta flush'da ko'p qatorli INSERT bilan yoziladi.
+    """
+    doc = models.DeliveryDoc(district_id=district_id, shop_id=shop_id, pay_kind=pay_kind,
+                             total=sum(q * price for _, q, price in lines))
+    doc.lines = [
+        models.Delivery(
+            district_id=district_id, shop_id=shop_id, product_id=product_id,
+            qty_kg=qty_kg, unit_price=unit_price, total=qty_kg * unit_price, pay_kind=pay_kind,
+        )
+        for product_id, qty_kg, unit_price in lines
+    ]
+    db.add(doc)
+    db.flush()
+    _bump_delivery_rollup(db, doc.lines)
+    touch_reports(db, shop_id=shop_id, district_id=district_id)
+    if commit:
+        db.commit()
+    return doc
+
+def _bump_delivery_rollup(db: Session, deliveries: list[models.Delivery]):
+    """Flush qilingan yetkazishlarni kunlik rollup'ga qo'shadi (created_at — eager_defaults orqali tayyor)."""
+    acc: dict[tuple, list] = {}
+    for d in deliveries:
+        key = (d.created_at.date(), d.district_id, d.shop_id, d.product_id, d.pay_kind)
+        row = acc.setdefault(key, [0, 0.0, 0.0])
+        row[0] += 1; row[1] += d.qty_kg; row[2] += d.total
+    _upsert_add(
+        db, models.DeliveryDailyRollup.__table__,
+        ["day", "district_id", "shop_id", "product_id", "pay_kind"],
+        [
+            {"day": k[0], "district_id": k[1], "shop_id": k[2], "product_id": k[3], "pay_kind": k[4],
+             "cnt": v[0], "qty_kg": v[1], "total": v[2]}
+            for k, v in acc.items()
+        ],
+    )
 
 
 def update_product_price(db: Session, product_id: int, price_per_kg: float | None):
@@ -74,6 +126,7 @@ def update_product_price(db: Session, product_id: int, price_per_kg: float | Non
     if not p:
         return None
     p.price_per_kg = price_per_kg
+    touch_refdata(db)
     db.commit()
     db.refresh(p)
     return p
@@ -83,6 +136,7 @@ def set_product_active(db: Session, product_id: int, active: bool):
     if not p:
         return None
     p.is_active = active
+    touch_refdata(db)
     db.commit()
     db.refresh(p)
     return p
@@ -93,43 +147,334 @@ def count_shops(db: Session, district_id: int | None = None) -> int:
         stmt = stmt.where(models.Shop.district_id == district_id)
     return db.execute(stmt).scalar_one()
 
-def list_shops_paginated(db: Session, page: int = 1, size: int = 10, district_id: int | None = None):
-    offset = (page - 1) * size
-    stmt = select(models.Shop).order_by(models.Shop.created_at.desc())
+def shops_page(
+    db: Session,
+    district_id: int | None = None,
+    size: int = 10,
+    after: str | None = None,
+    before: str | None = None,
+) -> Page:
+    """Do'konlar, eng yangisi birinchi — keyset sahifalash (OFFSET yo'q)."""
+    stmt = select(models.Shop)
     if district_id:
         stmt = stmt.where(models.Shop.district_id == district_id)
-    return db.execute(stmt.offset(offset).limit(size)).scalars().all()
+    return keyset_page(db, stmt, models.Shop.created_at, models.Shop.id,
+                       size=size, after=after, before=before, entity=True)
+
+def _upsert_add(db: Session, table, key_cols: list[str], rows: list[dict]):
+    """
+    key_cols bo'yicha qator bo'lmasa yaratadi, bo'lsa qolgan ustunlarga qo'shadi (col = col + v).
+    INSERT ... ON CONFLICT DO UPDATE — joriy tranzaksiya ichida, ko'p qator bo'lsa executemany.
+    """
+    if not rows:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=key_cols,
+        set_={c: table.c[c] + stmt.excluded[c] for c in rows[0] if c not in key_cols},
+    )
+    db.execute(stmt, rows)
+
+def _bump_stock_balances(db: Session, deltas: dict[int, float]):
+    _upsert_add(
+        db, models.StockBalance.__table__, ["product_id"],
+        [{"product_id": pid, "qty_kg": qty} for pid, qty in deltas.items()],
+    )
+
+# === Davr yopish: arxiv chegarasi ===
+def last_close(db: Session) -> models.PeriodClose | None:
+    return db.execute(
+        select(models.PeriodClose).order_by(models.PeriodClose.boundary.desc()).limit(1)
+    ).scalar_one_or_none()
+
+def ledger_source(model, with_archive: bool):
+    """
+    Ledger jadvali (.c ustunlari bilan): with_archive=True bo'lsa — issiq jadval + *_archive
+    (UNION ALL). Yopilgan davrga tegadigan so'rovlar uchun. Yig'indi olinmaydi: issiq jadvaldagi
+    ochilish qatorlari arxivdagi qatorlarni takrorlaydi — faqat ro'yxat/oraliq so'rovlari uchun.
+    """
+    table = model.__table__
+    if not with_archive:
+        return table
+    archive = models.ARCHIVES[table.name]
+    return select(table).union_all(select(*[archive.c[c.name] for c in table.columns])).subquery(f"{table.name}_all")
+
+OPENING_NOTE = "Davr ochilishi"
+
+
+def without_openings(st, stmt):
+    """
+    Arxiv bilan o'qilgan do'kon tranzaksiyalaridan davr ochilish qatorlarini olib tashlaydi:
+    ular arxivga ketgan qatorlar yig'indisi — qoldirilsa jami ikki marta hisoblanadi.
+    """
+    pc = models.PeriodClose
+    return stmt.where(or_(
+        st.note.is_(None),
+        ~st.note.startswith(OPENING_NOTE),
+        st.created_at.not_in(select(pc.boundary)),
+    ))
+
+
+def _crosses_close(db: Session, start: datetime | None) -> bool:
+    """[start, ...) oralig'i yopilgan davrga tegadimi."""
+    close = last_close(db)
+    return close is not None and (start is None or start < close.boundary)
+
+def stock_openings(db: Session) -> dict[int, float]:
+    """So'nggi yopilgan davr ochilish qoldiqlari (product_id -> kg)."""
+    close = last_close(db)
+    if close is None or close.stock_upto_move_id is None:
+        return {}
+    cp = models.StockCheckpoint
+    return {
+        pid: float(qty) for pid, qty in db.execute(
+            select(cp.product_id, cp.qty_kg)
+            .where(cp.upto_move_id == close.stock_upto_move_id, cp.taken_at == close.boundary)
+        ).all()
+    }
+
+def stock_balances_for(db: Session, product_ids: list[int]) -> dict[int, float]:
+    """Berilgan mahsulotlar qoldig'i — bitta so'rov (savat tekshiruvi uchun)."""
+    sb = models.StockBalance
+    rows = db.execute(select(sb.product_id, sb.qty_kg).where(sb.product_id.in_(product_ids))).all()
+    found = {pid: float(qty) for pid, qty in rows}
+    return {pid: found.get(pid, 0.0) for pid in product_ids}
+
+def stock_balance_for_product(db: Session, product_id: int, as_of: datetime | None = None) -> float:
+    """
+    Joriy qoldiq = SUM(kirim) - SUM(chiqim), stock_balances jadvalidan bitta PK o'qish bilan.
+    as_of berilsa — o'sha paytdagi qoldiq (eng yaqin checkpoint + undan keyingi harakatlar).
+    """
+    if as_of is not None:
+        return stock_balances_as_of(db, as_of, [product_id]).get(product_id, 0.0)
+    qty = db.execute(
+        select(models.StockBalance.qty_kg).where(models.StockBalance.product_id == product_id)
+    ).scalar_one_or_none()
+    return float(qty or 0.0)
+
+def stock_balances_all(db: Session, as_of: datetime | None = None) -> list[tuple[models.Product, float]]:
+    """
+    Barcha aktiv mahsulotlar bo'yicha qoldiq ro'yxati (bitta so'rov).
+    """
+    p = models.Product
+    if as_of is not None:
+        products = list_products(db, only_active=True)
+        hist = stock_balances_as_of(db, as_of, [x.id for x in products])
+        return [(x, hist.get(x.id, 0.0)) for x in products]
+    sb = models.StockBalance
+    rows = db.execute(
+        select(p, func.coalesce(sb.qty_kg, 0.0))
+        .join(sb, sb.product_id == p.id, isouter=True)
+        .where(p.is_active == True)  # noqa
+        .order_by(p.name)
+    ).all()
+    return [(prod, float(qty)) for prod, qty in rows]
+
+def stock_balances_as_of(db: Session, as_of: datetime, product_ids: list[int] | None = None) -> dict[int, float]:
+    """
+    as_of paytidagi qoldiqlar: har mahsulot uchun as_of'dan oldingi eng so'nggi checkpoint
+    + (upto_move_id, as_of] oralig'idagi harakatlar. Ledger boshidan skan qilinmaydi.
+    """
+    from sqlalchemy import case
+    cp = models.StockCheckpoint
+    close = last_close(db)
+    # yopilgan davr ichidagi sana — arxivdagi harakatlar ham kerak
+    sm = ledger_source(models.StockMove, close is not None and as_of < close.boundary).c
+
+    latest = (
+        select(cp.product_id, func.max(cp.upto_move_id).label("upto"))
+        .where(cp.taken_at <= as_of)
+        .group_by(cp.product_id)
+    )
+    if product_ids is not None:
+        latest = latest.where(cp.product_id.in_(product_ids))
+    latest = latest.subquery()
+
+    result: dict[int, float] = {}
+    for pid, qty in db.execute(
+        select(cp.product_id, cp.qty_kg)
+        .join(latest, (latest.c.product_id == cp.product_id) & (latest.c.upto == cp.upto_move_id))
+    ).all():
+        result[pid] = float(qty)
+
+    stmt = (
+        select(
+            sm.product_id,
+            func.sum(case((sm.kind == models.MoveKind.kirim, sm.qty_kg), else_=-sm.qty_kg)),
+        )
+        .join(latest, latest.c.product_id == sm.product_id, isouter=True)
+        .where(sm.id > func.coalesce(latest.c.upto, 0), sm.created_at <= as_of)
+        .group_by(sm.product_id)
+    )
+    if product_ids is not None:
+        stmt = stmt.where(sm.product_id.in_(product_ids))
+    for pid, delta in db.execute(stmt).all():
+        result[pid] = result.get(pid, 0.0) + float(delta or 0.0)
+    return result
 
-def stock_balance_for_product(db: Session, product_id: int) -> float:
+def _write_stock_checkpoint(db: Session, upto_move_id=None) -> int:
     """
-    Joriy qoldiq = SUM(kirim) - SUM(chiqim)
+    stock_balances'dan snapshot yozadi (commit qilmaydi). upto_move_id berilmasa — so'nggi harakat.
+    Bitta INSERT ... SELECT — qoldiq va upto_move_id bir xil holatdan olinadi.
     """
-    kirim = db.execute(
-        select(func.coalesce(func.sum(models.StockMove.qty_kg), 0.0))
-        .where(models.StockMove.product_id == product_id, models.StockMove.kind == models.MoveKind.kirim)
-    ).scalar_one()
-    chiqim = db.execute(
-        select(func.coalesce(func.sum(models.StockMove.qty_kg), 0.0))
-        .where(models.StockMove.product_id == product_id, models.StockMove.kind == models.MoveKind.chiqim)
-    ).scalar_one()
-    return float(kirim) - float(chiqim)
+    from sqlalchemy import insert, literal
+    sm = models.StockMove
+    sb = models.StockBalance
+    cp = models.StockCheckpoint
+    upto = literal(upto_move_id) if upto_move_id is not None else select(func.max(sm.id)).scalar_subquery()
+    taken = select(sm.created_at).where(sm.id == upto).scalar_subquery()
+    res = db.execute(
+        insert(cp).from_select(
+            ["product_id", "upto_move_id", "qty_kg", "taken_at"],
+            select(sb.product_id, upto, sb.qty_kg, taken).where(taken.is_not(None)),
+        )
+    )
+    return res.rowcount or 0
 
-def stock_balances_all(db: Session) -> list[tuple[models.Product, float]]:
+def write_stock_checkpoint(db: Session) -> int:
     """
-    Barcha aktiv mahsulotlar bo'yicha qoldiq ro'yxati.
+    Qo'lda / kunlik checkpoint. So'nggi checkpoint'dan keyin harakat bo'lmasa — hech narsa yozilmaydi.
     """
-    products = list_products(db, only_active=True)
-    return [(p, stock_balance_for_product(db, p.id)) for p in products]
+    last_cp = db.execute(select(func.max(models.StockCheckpoint.upto_move_id))).scalar_one()
+    last_move = db.execute(select(func.max(models.StockMove.id))).scalar_one()
+    if last_move is None or (last_cp is not None and last_cp >= last_move):
+        return 0
+    n = _write_stock_checkpoint(db)
+    db.commit()
+    return n
+
+def _maybe_checkpoint(db: Session, first_id: int, last_id: int):
+    """[first_id, last_id] oralig'ida STOCK_CHECKPOINT_EVERY karralisi bo'lsa — last_id bo'yicha checkpoint."""
+    every = settings.STOCK_CHECKPOINT_EVERY
+    if every > 0 and last_id // every > (first_id - 1) // every:
+        _write_stock_checkpoint(db, upto_move_id=last_id)
 
 def add_kirim(db: Session, product_id: int, qty_kg: float, note: str | None = None) -> models.StockMove:
     assert qty_kg > 0
     m = models.StockMove(product_id=product_id, kind=models.MoveKind.kirim, qty_kg=qty_kg, note=note)
-    db.add(m); db.commit(); db.refresh(m); return m
-
-def add_chiqim(db: Session, product_id: int, qty_kg: float, shop_id: int, note: str | None = None) -> models.StockMove:
+    db.add(m)
+    _bump_stock_balances(db, {product_id: qty_kg})
+    db.flush()
+    _maybe_checkpoint(db, m.id, m.id)
+    db.commit(); db.refresh(m); return m
+
+def add_chiqim(db: Session, product_id: int, qty_kg: float, shop_id: int, note: str | None = None,
+               commit: bool = True) -> models.StockMove:
     assert qty_kg > 0
     m = models.StockMove(product_id=product_id, kind=models.MoveKind.chiqim, qty_kg=qty_kg, shop_id=shop_id, note=note)
-    db.add(m); db.commit(); db.refresh(m); return m
+    db.add(m)
+    _bump_stock_balances(db, {product_id: -qty_kg})
+    db.flush()
+    _maybe_checkpoint(db, m.id, m.id)
+    if not commit:
+        return m
+    db.commit(); db.refresh(m); return m
+
+def add_chiqim_many(db: Session, shop_id: int, items: list[tuple[int, float]], note: str | None = None,
+                    commit: bool = True) -> list[models.StockMove]:
+    """
+    Bir do'konga bir nechta mahsulot chiqimi: StockMove'lar bitta flush'da (insertmanyvalues),
+    qoldiqlar bitta executemany upsert bilan.
+    """
+    deltas: dict[int, float] = {}
+    moves = []
+    for product_id, qty_kg in items:
+        assert qty_kg > 0
+        moves.append(models.StockMove(product_id=product_id, kind=models.MoveKind.chiqim,
+                                      qty_kg=qty_kg, shop_id=shop_id, note=note))
+        deltas[product_id] = deltas.get(product_id, 0.0) - qty_kg
+    db.add_all(moves)
+    _bump_stock_balances(db, deltas)
+    db.flush()
+    if moves:
+        _maybe_checkpoint(db, min(m.id for m in moves), max(m.id for m in moves))
+    if commit:
+        db.commit()
+    return moves
+
+def ledger_stock_balances(db: Session) -> dict[int, float]:
+    """
+    Qoldiqlarni to'g'ridan-to'g'ri ledger'dan hisoblaydi: so'nggi davr ochilish qoldig'i
+    + issiq stock_moves (bitta GROUP BY).
+    """
+    from sqlalchemy import case
+    sm = models.StockMove
+    result = stock_openings(db)
+    rows = db.execute(
+        select(
+            sm.product_id,
+            func.sum(case((sm.kind == models.MoveKind.kirim, sm.qty_kg), else_=-sm.qty_kg)),
+        ).group_by(sm.product_id)
+    ).all()
+    for pid, qty in rows:
+        result[pid] = result.get(pid, 0.0) + float(qty or 0.0)
+    return result
+
+def rebuild_stock_balances(db: Session) -> int:
+    """
+    stock_balances jadvalini ledger'dan qaytadan quradi. Yozilgan qatorlar sonini qaytaradi.
+    """
+    from sqlalchemy import delete, insert
+    ledger = ledger_stock_balances(db)
+    db.execute(delete(models.StockBalance))
+    if ledger:
+        db.execute(
+            insert(models.StockBalance),
+            [{"product_id": pid, "qty_kg": qty} for pid, qty in ledger.items()],
+        )
+    db.commit()
+    return len(ledger)
+
+def verify_stock_balances(db: Session, tol: float = 1e-6) -> list[tuple[int, float, float]]:
+    """
+    Materiallashtirilgan qoldiqni ledger bilan solishtiradi.
+    Mos kelmaganlar: [(product_id, saqlangan, ledger), ...]
+    """
+    ledger = ledger_stock_balances(db)
+    stored = dict(db.execute(select(models.StockBalance.product_id, models.StockBalance.qty_kg)).all())
+    diffs = []
+    for pid in sorted(set(ledger) | set(stored)):
+        a, b = float(stored.get(pid) or 0.0), ledger.get(pid, 0.0)
+        if abs(a - b) > tol:
+            diffs.append((pid, a, b))
+    return diffs
+
+def ensure_stock_balances(db: Session) -> None:
+    """stock_balances bo'sh, lekin ledger'da harakat bo'lsa (eski baza) — bir marta to'ldiramiz."""
+    has_balances = db.execute(select(models.StockBalance.product_id).limit(1)).first()
+    has_moves = db.execute(select(models.StockMove.id).limit(1)).first()
+    if has_moves and not has_balances:
+        rebuild_stock_balances(db)
+
+def _rollup_days(start: datetime | None, end: datetime | None):
+    """
+    Rollup kun aniqligida: [start, end) oralig'i butun kunlarga kengaytiriladi
+    (start — o'sha kun boshidan, end — yarim tunda bo'lmasa, o'sha kun oxirigacha).
+    """
+    from datetime import timedelta
+    start_day = start.date() if start else None
+    end_day = None
+    if end:
+        end_day = end.date() if end == datetime.combine(end.date(), datetime.min.time()) \
+            else end.date() + timedelta(days=1)
+    return start_day, end_day
+
+def _rollup_filters(stmt, start, end, district_id=None, shop_id=None):
+    r = models.DeliveryDailyRollup
+    start_day, end_day = _rollup_days(start, end)
+    if start_day:
+        stmt = stmt.where(r.day >= start_day)
+    if end_day:
+        stmt = stmt.where(r.day < end_day)
+    if district_id:
+        stmt = stmt.where(r.district_id == district_id)
+    if shop_id:
+        stmt = stmt.where(r.shop_id == shop_id)
+    return stmt
 
 def deliveries_agg_by_shop(
     db: Session,
@@ -138,29 +483,21 @@ def deliveries_agg_by_shop(
     district_id: int | None = None,
     shop_id: int | None = None,
 ):
-    d = models.Delivery
+    r = models.DeliveryDailyRollup
     s = models.Shop
     stmt = (
         select(
             s.id.label("shop_id"),
             s.name.label("shop_name"),
-            func.count(d.id).label("cnt"),
-            func.coalesce(func.sum(d.qty_kg), 0.0).label("sum_qty"),
-            func.coalesce(func.sum(d.total), 0.0).label("sum_total"),
+            func.sum(r.cnt).label("cnt"),
+            func.coalesce(func.sum(r.qty_kg), 0.0).label("sum_qty"),
+            func.coalesce(func.sum(r.total), 0.0).label("sum_total"),
         )
-        .join(s, s.id == d.shop_id)
+        .join(s, s.id == r.shop_id)
         .group_by(s.id, s.name)
-        .order_by(func.sum(d.total).desc())
+        .order_by(func.sum(r.total).desc())
     )
-    if start:
-        stmt = stmt.where(d.created_at >= start)
-    if end:
-        stmt = stmt.where(d.created_at < end)
-    if district_id:
-        stmt = stmt.where(d.district_id == district_id)
-    if shop_id:
-        stmt = stmt.where(d.shop_id == shop_id)
-    return db.execute(stmt).all()
+    return db.execute(_rollup_filters(stmt, start, end, district_id, shop_id)).all()
 
 def deliveries_agg_paykind(
     db: Session,
@@ -169,36 +506,20 @@ def deliveries_agg_paykind(
     district_id: int | None = None,
     shop_id: int | None = None,
 ):
-    d = models.Delivery
+    r = models.DeliveryDailyRollup
     stmt = (
         select(
-            d.pay_kind,
-            func.count(d.id).label("cnt"),
-            func.coalesce(func.sum(d.qty_kg), 0.0).label("sum_qty"),
-            func.coalesce(func.sum(d.total), 0.0).label("sum_total"),
+            r.pay_kind,
+            func.sum(r.cnt).label("cnt"),
+            func.coalesce(func.sum(r.qty_kg), 0.0).label("sum_qty"),
+            func.coalesce(func.sum(r.total), 0.0).label("sum_total"),
         )
-        .group_by(d.pay_kind)
-        .order_by(func.sum(d.total).desc())
+        .group_by(r.pay_kind)
+        .order_by(func.sum(r.total).desc())
     )
-    if start:
-        stmt = stmt.where(d.created_at >= start)
-    if end:
-        stmt = stmt.where(d.created_at < end)
-    if district_id:
-        stmt = stmt.where(d.district_id == district_id)
-    if shop_id:
-        stmt = stmt.where(d.shop_id == shop_id)
-    return db.execute(stmt).all()
+    return db.execute(_rollup_filters(stmt, start, end, district_id, shop_id)).all()
 
-def deliveries_list_with_details(
-    db: Session,
-    start: datetime | None = None,
-    end: datetime | None = None,
-    district_id: int | None = None,
-    shop_id: int | None = None,
-    limit: int = 200,
-):
-    d = models.Delivery
+def _deliveries_details_stmt(d, start, end, district_id, shop_id):
     s = models.Shop
     p = models.Product
     stmt = (
@@ -209,8 +530,6 @@ def deliveries_list_with_details(
         )
         .join(s, s.id == d.shop_id)
         .join(p, p.id == d.product_id)
-        .order_by(d.created_at.desc())
-        .limit(limit)
     )
     if start:
         stmt = stmt.where(d.created_at >= start)
@@ -220,7 +539,34 @@ def deliveries_list_with_details(
         stmt = stmt.where(d.district_id == district_id)
     if shop_id:
         stmt = stmt.where(d.shop_id == shop_id)
-    return db.execute(stmt).all()
+    return stmt
+
+def deliveries_list_with_details(
+    db: Session,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    district_id: int | None = None,
+    shop_id: int | None = None,
+    limit: int = 200,
+):
+    d = ledger_source(models.Delivery, _crosses_close(db, start)).c
+    stmt = _deliveries_details_stmt(d, start, end, district_id, shop_id)
+    return db.execute(stmt.order_by(d.created_at.desc()).limit(limit)).all()
+
+def deliveries_page(
+    db: Session,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    district_id: int | None = None,
+    shop_id: int | None = None,
+    size: int = 50,
+    after: str | None = None,
+    before: str | None = None,
+) -> Page:
+    """Yetkazishlar ro'yxati (monitoring) — keyset sahifalash, butun tarix ochiq."""
+    d = ledger_source(models.Delivery, _crosses_close(db, start)).c
+    stmt = _deliveries_details_stmt(d, start, end, district_id, shop_id)
+    return keyset_page(db, stmt, d.created_at, d.id, size=size, after=after, before=before)
 
 def deliveries_agg_by_product_in_shop(
     db: Session,
@@ -231,24 +577,47 @@ def deliveries_agg_by_product_in_shop(
     """Bir do'kon ichida mahsulotlar kesimi (qaysi mahsulotdan qancha yetkazilgan)."""
     if not shop_id:
         return []
-    d = models.Delivery
+    r = models.DeliveryDailyRollup
     p = models.Product
     stmt = (
         select(
             p.name.label("product_name"),
-            func.coalesce(func.sum(d.qty_kg), 0.0).label("sum_qty"),
-            func.coalesce(func.sum(d.total), 0.0).label("sum_total"),
+            func.coalesce(func.sum(r.qty_kg), 0.0).label("sum_qty"),
+            func.coalesce(func.sum(r.total), 0.0).label("sum_total"),
         )
-        .join(p, p.id == d.product_id)
-        .where(d.shop_id == shop_id)
+        .join(p, p.id == r.product_id)
         .group_by(p.name)
-        .order_by(func.sum(d.total).desc())
+        .order_by(func.sum(r.total).desc())
     )
-    if start:
-        stmt = stmt.where(d.created_at >= start)
-    if end:
-        stmt = stmt.where(d.created_at < end)
-    return db.execute(stmt).all()
+    return db.execute(_rollup_filters(stmt, start, end, shop_id=shop_id)).all()
+
+def rebuild_delivery_rollup(db: Session) -> int:
+    """
+    delivery_daily_rollup'ni deliveries'dan qaytadan quradi (backfill). Yozilgan qatorlar sonini qaytaradi.
+    """
+    from sqlalchemy import delete, insert
+    d = ledger_source(models.Delivery, last_close(db) is not None).c
+    r = models.DeliveryDailyRollup
+    db.execute(delete(r))
+    res = db.execute(
+        insert(r).from_select(
+            ["day", "district_id", "shop_id", "product_id", "pay_kind", "cnt", "qty_kg", "total"],
+            select(
+                func.date(d.created_at), d.district_id, d.shop_id, d.product_id, d.pay_kind,
+                func.count(d.id), func.sum(d.qty_kg), func.sum(d.total),
+            ).group_by(func.date(d.created_at), d.district_id, d.shop_id, d.product_id, d.pay_kind),
+        )
+    )
+    touch_reports(db)
+    db.commit()
+    return res.rowcount or 0
+
+def ensure_delivery_rollup(db: Session) -> None:
+    """Rollup bo'sh, lekin yetkazishlar bor bo'lsa (eski baza) — bir marta backfill."""
+    has_rollup = db.execute(select(models.DeliveryDailyRollup.day).limit(1)).first()
+    has_deliveries = db.execute(select(models.Delivery.id).limit(1)).first()
+    if has_deliveries and not has_rollup:
+        rebuild_delivery_rollup(db)
 
 def delete_product(db: Session, product_id: int) -> bool:
     """Hard delete product by id.
@@ -257,103 +626,127 @@ def delete_product(db: Session, product_id: int) -> bool:
     obj = db.get(models.Product, product_id)
     if not obj:
         return False
+    bal = db.get(models.StockBalance, product_id)
+    if bal:
+        db.delete(bal)
+    from sqlalchemy import delete
+    db.execute(delete(models.StockCheckpoint).where(models.StockCheckpoint.product_id == product_id))
     db.delete(obj)
+    touch_reports(db)
+    touch_refdata(db)
     db.commit()
     return True
 
 
 # === Balans / Tranzaksiyalar ===
-def add_shop_tx(db: Session, shop_id: int, kind: models.TxKind, amount: float, note: str | None = None):
+def _tx_delta(kind: models.TxKind, amount: float) -> float:
+    # to'lov balansga +, qarzga berilgan tovar -
+    return amount if kind == models.TxKind.payment else -amount
+
+def add_shop_tx(db: Session, shop_id: int, kind: models.TxKind, amount: float, note: str | None = None,
+                commit: bool = True):
+    """Tranzaksiya + shops.balance / last_tx_at yangilanishi — bitta tranzaksiyada."""
+    from sqlalchemy import update
     tx = models.ShopTransaction(shop_id=shop_id, kind=kind, amount=abs(float(amount)), note=(note or None))
     db.add(tx)
+    db.flush()
+    s = models.Shop
+    delta = _tx_delta(kind, tx.amount)
+    row = db.execute(
+        update(s)
+        .where(s.id == shop_id)
+        .values(balance=s.balance + delta, last_tx_at=tx.created_at)
+        .returning(s.balance, s.name)
+        .execution_options(synchronize_session=False)
+    ).one_or_none()
+    if row is not None:
+        outbox.check_debt(db, row.name, row.balance - delta, row.balance)
+    touch_reports(db, shop_id=shop_id)
+    if not commit:
+        return tx
     db.commit()
     db.refresh(tx)
     return tx
 
+def _shop_txs_stmt(db: Session, shop_id: int):
+    """Do'kon tranzaksiyalari, davr yopilgan bo'lsa arxiv bilan (ochilish qatorlarisiz — yig'indi shops.balance'ga teng)."""
+    archived = last_close(db) is not None
+    st = ledger_source(models.ShopTransaction, archived).c
+    stmt = select(st.id, st.shop_id, st.kind, st.amount, st.note, st.created_at).where(st.shop_id == shop_id)
+    return st, (without_openings(st, stmt) if archived else stmt)
+
+
+def list_shop_txs(db: Session, shop_id: int, limit: int = 200):
+    st, stmt = _shop_txs_stmt(db, shop_id)
+    return db.execute(stmt.order_by(st.created_at.desc(), st.id.desc()).limit(limit)).all()
+
+
+def shop_txs_page(
+    db: Session,
+    shop_id: int,
+    size: int = 50,
+    after: str | None = None,
+    before: str | None = None,
+) -> Page:
+    st, stmt = _shop_txs_stmt(db, shop_id)
+    return keyset_page(db, stmt, st.created_at, st.id, size=size, after=after, before=before)
+
+
 def shop_balance(db: Session, shop_id: int) -> float:
-    from sqlalchemy import case
-    st = models.ShopTransaction
-    total = db.execute(
-        select(
-            func.coalesce(func.sum(
-                case((st.kind == models.TxKind.sale, st.amount), else_=-st.amount)
-            ), 0.0)
-        ).where(st.shop_id == shop_id)
-    ).scalar_one()
-    return float(total)
+    """Saqlangan balans (add_shop_tx yangilab boradi)."""
+    total = db.execute(select(models.Shop.balance).where(models.Shop.id == shop_id)).scalar_one_or_none()
+    return float(total or 0.0)
+
 
 def list_balances(db: Session, district_id: int | None = None):
-    from sqlalchemy import case
     s = models.Shop
-    st = models.ShopTransaction
-    stmt = (
-        select(
-            s.id, s.name, s.district_id,
-            func.coalesce(func.sum(
-                case((st.kind == models.TxKind.sale, st.amount), else_=-st.amount)
-            ), 0.0).label("balance")
-        )
-        .join(st, st.shop_id == s.id, isouter=True)
-        .group_by(s.id)
-        .order_by(s.name)
-    )
+    stmt = select(s.id, s.name, s.district_id, s.balance, s.last_tx_at).order_by(s.name)
     if district_id:
         stmt = stmt.where(s.district_id == district_id)
     return db.execute(stmt).all()
 
-def list_shop_txs(db: Session, shop_id: int, limit: int = 200):
-    st = models.ShopTransaction
-    return db.execute(
-        select(st).where(st.shop_id == shop_id).order_by(st.created_at.desc()).limit(limit)
-    ).scalars().all()
-
 
-def add_shop_tx(db: Session, shop_id: int, kind: models.TxKind, amount: float, note: str | None = None):
-    tx = models.ShopTransaction(shop_id=shop_id, kind=kind, amount=abs(float(amount)), note=(note or None))
-    db.add(tx)
-    db.commit()
-    db.refresh(tx)
-    return tx
-
-
-def shop_balance(db: Session, shop_id: int) -> float:
+def ledger_shop_balances(db: Session) -> dict[int, float]:
+    """shop_transactions'dan hisoblangan balanslar (faqat tranzaksiyasi bor do'konlar)."""
     from sqlalchemy import case
     st = models.ShopTransaction
-    total = db.execute(
+    rows = db.execute(
         select(
-            func.coalesce(func.sum(
-                case(
-                    (st.kind == models.TxKind.payment, st.amount),   # + to'lov
-                    (st.kind == models.TxKind.sale, -st.amount),     # - qarz
-                    else_=0.0
-                )
-            ), 0.0)
-        ).where(st.shop_id == shop_id)
-    ).scalar_one()
-    return float(total)
+            st.shop_id,
+            func.sum(case((st.kind == models.TxKind.payment, st.amount), else_=-st.amount)),
+        ).group_by(st.shop_id)
+    ).all()
+    return {sid: float(total or 0.0) for sid, total in rows}
 
 
-def list_balances(db: Session, district_id: int | None = None):
-    from sqlalchemy import case
+def verify_shop_balances(db: Session, eps: float = 1e-6) -> list[tuple[int, float, float]]:
+    """Saqlangan va ledger balansi farq qiladigan do'konlar: [(shop_id, saqlangan, ledger), ...]."""
+    ledger = ledger_shop_balances(db)
+    diffs = []
+    for sid, stored in db.execute(select(models.Shop.id, models.Shop.balance)).all():
+        expected = ledger.get(sid, 0.0)
+        if abs((stored or 0.0) - expected) > eps:
+            diffs.append((sid, float(stored or 0.0), expected))
+    return diffs
+
+
+def rebuild_shop_balances(db: Session) -> int:
+    """
+    shops.balance va last_tx_at'ni ledger'dan qayta hisoblaydi (bitta UPDATE, korrelyatsiyalangan
+    subquery'lar bilan). Yangilangan do'konlar sonini qaytaradi.
+    """
+    from sqlalchemy import case, update
     s = models.Shop
     st = models.ShopTransaction
-    stmt = (
-        select(
-            s.id,
-            s.name,
-            s.district_id,
-            func.coalesce(func.sum(
-                case(
-                    (st.kind == models.TxKind.payment, st.amount),   # +
-                    (st.kind == models.TxKind.sale, -st.amount),     # -
-                    else_=0.0
-                )
-            ), 0.0).label("balance"),
-        )
-        .join(st, st.shop_id == s.id, isouter=True)
-        .group_by(s.id)
-        .order_by(s.name)
+    balance = (
+        select(func.coalesce(func.sum(
+            case((st.kind == models.TxKind.payment, st.amount), else_=-st.amount)
+        ), 0.0))
+        .where(st.shop_id == s.id)
+        .scalar_subquery()
     )
-    if district_id:
-        stmt = stmt.where(s.district_id == district_id)
-    return db.execute(stmt).all()
\ No newline at end of file
+    last = select(func.max(st.created_at)).where(st.shop_id == s.id).scalar_subquery()
+    res = db.execute(update(s).values(balance=balance, last_tx_at=last).execution_options(synchronize_session=False))
+    touch_reports(db)
+    db.commit()
+    return res.rowcount or 0
@@ -1,13 +1,93 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from .settings import settings
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./sklad.db"
+SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+
+def _sqlite_pragmas(dbapi_conn, conn_record):
+    """
+    Har bir yangi SQLite ulanishi uchun: WAL (o'quvchilar yozuvchini bloklamaydi),
+    synchronous=NORMAL (WAL'da har commit'da fsync yo'q), busy_timeout ("database is locked" o'rniga kutish),
+    mmap / cache / temp_store — o'qish tezligi uchun.
+    """
+    cur = dbapi_conn.cursor()
+    cur.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    # journal_mode faylda saqlanadi; qayta o'rnatish qulf talab qiladi — faqat farq qilsa o'zgartiramiz
+    cur.execute("PRAGMA journal_mode")
+    if cur.fetchone()[0].lower() != settings.SQLITE_JOURNAL_MODE.lower():
+        cur.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cur.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cur.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cur.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+    cur.execute(f"PRAGMA temp_store={settings.SQLITE_TEMP_STORE}")
+    cur.close()
+
+
+def _engine_kwargs(url, tuned: bool) -> dict:
+    kw = {"echo": settings.DB_ECHO}
+    if url.get_backend_name() == "sqlite":
+        kw["connect_args"] = {"check_same_thread": False}
+        if not tuned:
+            return kw
+        kw["connect_args"]["timeout"] = settings.SQLITE_BUSY_TIMEOUT_MS / 1000
+        if url.database not in (None, "", ":memory:"):
+            kw.update(pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW,
+                      pool_timeout=settings.DB_POOL_TIMEOUT)
+    elif tuned:
+        kw.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+    return kw
+
+
+def make_engine(url: str | None = None, tuned: bool = True):
+    """
+    Settings'dan engine yaratadi. SQLite — PRAGMA profili bilan, PostgreSQL — pool o'lchamlari bilan.
+    tuned=False — standart sozlamalar (benchmark'da solishtirish uchun).
+    """
+    url = make_url(url or settings.DATABASE_URL)
+    eng = create_engine(url, **_engine_kwargs(url, tuned))
+    if tuned and url.get_backend_name() == "sqlite":
+        event.listen(eng, "connect", _sqlite_pragmas)
+    return eng
+
+
+# sync URL -> async drayver (aiosqlite / asyncpg)
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def make_async_engine(url: str | None = None):
+    """Xuddi shu baza va profil, lekin async drayver bilan (routerlardagi async endpointlar uchun)."""
+    url = make_url(url or settings.DATABASE_URL)
+    backend = url.get_backend_name()
+    url = url.set(drivername=_ASYNC_DRIVERS.get(backend, url.drivername))
+    kw = _engine_kwargs(url, tuned=True)
+    if backend == "sqlite":
+        kw["connect_args"].pop("check_same_thread", None)
+        if "pool_size" in kw:
+            # aiosqlite standarti NullPool — har so'rovda yangi ulanish va PRAGMA'lar; pool qilamiz
+            kw["poolclass"] = AsyncAdaptedQueuePool
+    eng = create_async_engine(url, **kw)
+    if backend == "sqlite":
+        event.listen(eng.sync_engine, "connect", _sqlite_pragmas)
+    return eng
+
+
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = make_async_engine()
+# expire_on_commit=False — commit'dan keyin shablonda atribut o'qish qayta so'rov (lazy load) chaqirmasin
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -16,3 +96,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,132 @@
+# app/export.py
+"""
+Buxgalteriya uchun CSV eksport: qatorlar bazadan to'g'ridan-to'g'ri oqim bilan chiqadi.
+
+Har eksport o'z sessiyasini ochadi (so'rov dependency'si javob oqimidan oldin yopiladi),
+natija yield_per bilan partiyalab o'qiladi va har partiya darhol yuboriladi — xotira
+qator soniga bog'liq emas. Faqat ustunlar tanlanadi (ORM obyektlari identity map'da yig'ilmaydi).
+
+Fayl UTF-8 BOM bilan boshlanadi — Excel kirill/o'zbek harflarini to'g'ri ochadi.
+Yopilgan davrlar ham chiqadi: manba — issiq jadval + *_archive.
+"""
+import csv
+import io
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterator
+from sqlalchemy import select
+from . import models
+from .crud import ledger_source, without_openings
+
+BATCH = 1000
+BOM = "\ufeff"
+
+
+def report_window(days: int, month: str | None = None) -> tuple[datetime, datetime]:
+    """
+    [start, end) oralig'i: month="YYYY-MM" bo'lsa o'sha oy, aks holda bugun bilan oxirgi N kalendar kun.
+    """
+    if month:
+        first = datetime.strptime(month, "%Y-%m")
+        nxt = (first.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return first, nxt
+    today = date.today()
+    start = datetime.combine(today - timedelta(days=days - 1), datetime.min.time())
+    end = datetime.combine(today + timedelta(days=1), datetime.min.time())
+    return start, end
+
+
+def monitor_window(days: int, date_from: date | None = None, date_to: date | None = None):
+    """
+    /admin/monitor va uning CSV'i uchun: from/to berilsa — shu kunlar (to — kiradi), aks holda oxirgi N kun.
+    ((start, end), ixtiyoriy_oraliqmi) qaytadi.
+    """
+    if not date_from:
+        return report_window(days), False
+    end_day = date_to or date.today()
+    return (datetime.combine(date_from, datetime.min.time()),
+            datetime.combine(end_day + timedelta(days=1), datetime.min.time())), True
+
+
+def _fmt(v):
+    if isinstance(v, datetime):
+        return v.strftime("%Y-%m-%d %H:%M:%S")
+    if hasattr(v, "value"):  # enum
+        return v.value
+    return v
+
+
+def stream_csv(session_factory: Callable, stmt, header: list[str], batch: int = BATCH) -> Iterator[bytes]:
+    """stmt natijasini CSV bo'laklari sifatida beradi (har `batch` qatorda bitta bo'lak)."""
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    buf.write(BOM)
+    w.writerow(header)
+    with session_factory() as db:
+        result = db.execute(stmt.execution_options(yield_per=batch))
+        for rows in result.partitions():
+            for row in rows:
+                w.writerow([_fmt(v) for v in row])
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+DELIVERY_HEADER = ["id", "sana", "tuman", "do'kon", "mahsulot", "kg", "narx", "jami", "to'lov", "hujjat"]
+
+
+def deliveries_stmt(start: datetime, end: datetime, district_id: int | None = None, shop_id: int | None = None):
+    d = ledger_source(models.Delivery, True).c
+    stmt = (
+        select(
+            d.id, d.created_at, models.District.name, models.Shop.name, models.Product.name,
+            d.qty_kg, d.unit_price, d.total, d.pay_kind, d.doc_id,
+        )
+        .join(models.District, models.District.id == d.district_id)
+        .join(models.Shop, models.Shop.id == d.shop_id)
+        .join(models.Product, models.Product.id == d.product_id)
+        .where(d.created_at >= start, d.created_at < end)
+        .order_by(d.created_at, d.id)
+    )
+    if district_id:
+        stmt = stmt.where(d.district_id == district_id)
+    if shop_id:
+        stmt = stmt.where(d.shop_id == shop_id)
+    return stmt
+
+
+STOCK_MOVE_HEADER = ["id", "sana", "mahsulot", "turi", "kg", "do'kon", "izoh"]
+
+
+def stock_moves_stmt(start: datetime, end: datetime, product_id: int | None = None, shop_id: int | None = None):
+    sm = ledger_source(models.StockMove, True).c
+    stmt = (
+        select(sm.id, sm.created_at, models.Product.name, sm.kind, sm.qty_kg, models.Shop.name, sm.note)
+        .join(models.Product, models.Product.id == sm.product_id)
+        .join(models.Shop, models.Shop.id == sm.shop_id, isouter=True)
+        .where(sm.created_at >= start, sm.created_at < end)
+        .order_by(sm.created_at, sm.id)
+    )
+    if product_id:
+        stmt = stmt.where(sm.product_id == product_id)
+    if shop_id:
+        stmt = stmt.where(sm.shop_id == shop_id)
+    return stmt
+
+
+SHOP_TX_HEADER = ["id", "sana", "turi", "summa", "izoh"]
+
+
+def shop_txs_stmt(shop_id: int, start: datetime | None = None, end: datetime | None = None):
+    st = ledger_source(models.ShopTransaction, True).c
+    stmt = without_openings(st, (
+        select(st.id, st.created_at, st.kind, st.amount, st.note)
+        .where(st.shop_id == shop_id)
+        .order_by(st.created_at, st.id)
+    ))
+    if start:
+        stmt = stmt.where(st.created_at >= start)
+    if end:
+        stmt = stmt.where(st.created_at < end)
+    return stmt
@@ -0,0 +1,171 @@
+# app/jobs.py
+"""
+Og'ir hisobotlar uchun SQLite navbati.
+
+Web: submit() — ish navbatga qo'yiladi (yoki bir xil key'li mavjud ish qaytariladi), sahifa
+GET /admin/jobs/{id} orqali holatni so'rab turadi. Worker (app.worker, alohida jarayon):
+claim() — bitta ishni ijaraga oladi, run() — hisoblab natijani JSON sifatida yozadi.
+
+Ish turlari — JOBS ro'yxati: nom -> fn(db, params) -> dict. Parametrlar JSON'ga sig'adigan
+oddiy qiymatlar (sanalar — ISO matn).
+"""
+import hashlib
+import json
+import logging
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Callable
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.orm import Session
+from . import crud, models
+from .settings import settings
+
+log = logging.getLogger(__name__)
+
+JOBS: dict[str, Callable[[Session, dict], dict]] = {}
+
+
+def job(kind: str):
+    def deco(fn):
+        JOBS[kind] = fn
+        return fn
+    return deco
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _rows(rows) -> list[dict]:
+    return [dict(r._mapping) for r in rows]
+
+
+def _json_default(v):
+    if isinstance(v, (datetime, date)):
+        return v.isoformat()
+    raise TypeError(type(v).__name__)
+
+
+def _dt(v: str | None) -> datetime | None:
+    return datetime.fromisoformat(v) if v else None
+
+
+# ——— Ish turlari
+
+@job("monitor")
+def monitor(db: Session, p: dict) -> dict:
+    """admin/monitor yig'indilari (ro'yxat sahifasi keyset bilan so'rov ichida qoladi)."""
+    start, end = _dt(p.get("start")), _dt(p.get("end"))
+    district_id, shop_id = p.get("district_id"), p.get("shop_id")
+    return {
+        "by_shop": _rows(crud.deliveries_agg_by_shop(db, start, end, district_id, shop_id)),
+        "by_pay": _rows(crud.deliveries_agg_paykind(db, start, end, district_id, shop_id)),
+        "by_product_in_shop": _rows(crud.deliveries_agg_by_product_in_shop(db, start, end, shop_id)),
+    }
+
+
+@job("balances")
+def balances(db: Session, p: dict) -> dict:
+    return {"items": _rows(crud.list_balances(db, district_id=p.get("district_id")))}
+
+
+# ——— Web tomoni
+
+def job_key(kind: str, params: dict, *versions) -> str:
+    raw = json.dumps([kind, params, versions], sort_keys=True, default=_json_default)
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def submit(db: Session, kind: str, params: dict, *versions) -> models.ReportJob:
+    """
+    versions — natija tayanadigan ma'lumot versiyalari (masalan, oxirgi Delivery.id): o'zgarsa yangi ish.
+    Navbatdagi / ishlayotgan yoki JOBS_RESULT_TTL ichida tayyor bo'lgan bir xil ish qayta ishlatiladi.
+    """
+    if kind not in JOBS:
+        raise KeyError(kind)
+    key = job_key(kind, params, *versions)
+    j = models.ReportJob
+    fresh_since = utcnow() - timedelta(seconds=settings.JOBS_RESULT_TTL)
+    existing = db.execute(
+        select(j)
+        .where(j.key == key, or_(j.status.in_(("queued", "running")),
+                                 (j.status == "done") & (j.finished_at >= fresh_since)))
+        .order_by(j.id.desc())
+        .limit(1)
+    ).scalar_one_or_none()
+    if existing is not None:
+        return existing
+    row = models.ReportJob(kind=kind, params=json.dumps(params, default=_json_default), key=key,
+                           status="queued", attempts=0)
+    db.add(row)
+    db.commit()
+    db.refresh(row)
+    return row
+
+
+def result(row: models.ReportJob) -> dict | None:
+    return json.loads(row.result) if row.result else None
+
+
+def rows(data: dict | None, name: str) -> list[SimpleNamespace]:
+    """Natijadagi ro'yxat — shablon va yig'indilar uchun atribut bilan (Row kabi)."""
+    return [SimpleNamespace(**r) for r in (data or {}).get(name, ())]
+
+
+def as_dict(row: models.ReportJob) -> dict:
+    return {
+        "id": row.id, "kind": row.kind, "status": row.status, "attempts": row.attempts,
+        "created_at": row.created_at, "started_at": row.started_at, "finished_at": row.finished_at,
+        "error": row.error,
+    }
+
+
+# ——— Worker tomoni
+
+def claim(db: Session, lease_sec: float = settings.JOBS_LEASE_SEC):
+    """Eng eski navbatdagi (yoki ijarasi o'tgan) ishni oladi: (id, kind, params, attempts) yoki None."""
+    j = models.ReportJob
+    now = utcnow()
+    pending = (
+        select(j.id)
+        .where(or_(j.status == "queued", (j.status == "running") & (j.lease_until < now)))
+        .order_by(j.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    row = db.execute(
+        update(j)
+        .where(j.id == pending)
+        .values(status="running", started_at=now, attempts=j.attempts + 1,
+                lease_until=now + timedelta(seconds=lease_sec))
+        .returning(j.id, j.kind, j.params, j.attempts)
+    ).one_or_none()
+    db.commit()
+    return row
+
+
+def run(db: Session, claimed) -> bool:
+    """Ishni bajaradi va natijani yozadi. Xatoda JOBS_MAX_ATTEMPTS'gacha qayta navbatga qaytadi."""
+    j = models.ReportJob
+    try:
+        data = JOBS[claimed.kind](db, json.loads(claimed.params))
+        values = {"status": "done", "result": json.dumps(data, default=_json_default), "error": None}
+        ok = True
+    except Exception as e:
+        db.rollback()
+        log.exception("hisobot #%s (%s) bajarilmadi", claimed.id, claimed.kind)
+        final = claimed.attempts >= settings.JOBS_MAX_ATTEMPTS
+        values = {"status": "failed" if final else "queued", "error": repr(e)[:500]}
+        ok = False
+    db.execute(update(j).where(j.id == claimed.id)
+               .values(finished_at=utcnow(), lease_until=None, **values))
+    db.commit()
+    return ok
+
+
+def purge(db: Session, keep_days: int = settings.JOBS_KEEP_DAYS) -> int:
+    j = models.ReportJob
+    n = db.execute(delete(j).where(j.status.in_(("done", "failed")),
+                                   j.finished_at < utcnow() - timedelta(days=keep_days))).rowcount
+    db.commit()
+    return n
@@ -1,15 +1,40 @@
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from .database import engine, Base
+from .database import engine, async_engine, Base, SessionLocal
+from . import crud, metrics, migrations, slowlog
+from .conditional import ConditionalMiddleware
+from .templating import env as jinja_env, precompile
 from .routers import admin, dealer
-from .routers import auth, panel
+from .routers import auth, panel, export, api, telegram
+from .routers import metrics as metrics_router
+from .settings import settings
 from dotenv import load_dotenv
 
 load_dotenv()
 app = FastAPI(title="Sklad Mini WebApp")
 
-# jadval yaratish
+# jadval yaratish + mavjud bazani migratsiya qilish
 Base.metadata.create_all(bind=engine)
+migrations.migrate(engine)
+
+# stock_balances / rollup yangi yaratilgan bo'lsa — ledger'dan to'ldiramiz
+with SessionLocal() as _db:
+    crud.ensure_stock_balances(_db)
+    crud.ensure_delivery_rollup(_db)
+
+# shablonlar birinchi so'rovda emas, hozir kompilyatsiya qilinadi
+precompile(jinja_env)
+
+# ETag / Last-Modified (routerlar conditional.check bilan o'zi yoqadi)
+app.add_middleware(ConditionalMiddleware)
+
+# route kechikishi + har so'rovdagi SQL soni/vaqti (/metrics); eng tashqi qatlam — hammasini o'lchaydi
+metrics.install(engine)
+metrics.install(async_engine.sync_engine)
+# SLOW_QUERY_MS'dan sekin SQL'lar — /admin/slow-queries
+slowlog.install(engine)
+slowlog.install(async_engine.sync_engine)
+app.add_middleware(metrics.MetricsMiddleware)
 
 # statik
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -17,8 +42,39 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 # marshrutlar
 app.include_router(auth.router)
 app.include_router(admin.router)
+app.include_router(export.router)
 app.include_router(dealer.router)
 app.include_router(panel.router)
+app.include_router(api.router)
+app.include_router(telegram.router)
+app.include_router(metrics_router.router)
+
+# Telegram bot — webhook rejimi, shu jarayonda (aiogram faqat yoqilganda import qilinadi)
+@app.on_event("startup")
+async def _start_bot():
+    if settings.BOT_TOKEN or settings.BOT_FAKE:
+        if not settings.BOT_WEBHOOK_SECRET:
+            raise RuntimeError("BOT_WEBHOOK_SECRET berilmagan — webhook'ni imzosiz ochib bo'lmaydi")
+        from bot.runtime import BotRuntime, make_bot
+        from bot.notifier import Notifier
+        app.state.bot = BotRuntime(make_bot())
+        await app.state.bot.start()
+        # outbox'dagi bildirishnomalar — shu bot orqali
+        app.state.notifier = Notifier(app.state.bot.bot)
+        await app.state.notifier.start()
+
+@app.on_event("shutdown")
+async def _stop_bot():
+    notifier = getattr(app.state, "notifier", None)
+    if notifier is not None:
+        await notifier.stop()
+    runtime = getattr(app.state, "bot", None)
+    if runtime is not None:
+        await runtime.stop()
+
+@app.on_event("shutdown")
+async def _dispose_async_engine():
+    await async_engine.dispose()
 
 @app.get("/")
 def root():
@@ -0,0 +1,225 @@
+# app/manage.py
+"""
+Xizmat buyruqlari:
+    python -m app.manage stock-rebuild   # stock_balances'ni ledger'dan qayta qurish
+    python -m app.manage stock-verify    # stock_balances'ni ledger bilan solishtirish
+    python -m app.manage stock-checkpoint  # qoldiq snapshot'i (kunlik cron uchun)
+    python -m app.manage rollup-rebuild  # delivery_daily_rollup'ni deliveries'dan qayta qurish
+    python -m app.manage balances-rebuild  # shops.balance'ni shop_transactions'dan qayta hisoblash
+    python -m app.manage balances-verify   # shops.balance'ni ledger bilan solishtirish
+    python -m app.manage period-close --upto 2025-01-01  # shu sanagacha ledger'ni arxivga ko'chirish
+    python -m app.manage migrate         # migratsiyalar holati (qo'llash har buyruqdan oldin avtomatik)
+    python -m app.manage check-plans     # issiq so'rovlarda to'liq jadval skani yo'qligini tekshirish
+    python -m app.manage bot-webhook     # Telegram'ga WEB_BASE + BOT_WEBHOOK_PATH manzilini o'rnatish
+"""
+import argparse
+import re
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from .database import engine, Base, SessionLocal
+from . import crud, migrations, services
+from .pagination import encode_cursor
+
+
+def cmd_stock_rebuild(args) -> int:
+    with SessionLocal() as db:
+        n = crud.rebuild_stock_balances(db)
+    print(f"stock_balances qayta qurildi: {n} ta mahsulot")
+    return 0
+
+
+def cmd_stock_verify(args) -> int:
+    with SessionLocal() as db:
+        diffs = crud.verify_stock_balances(db)
+    for pid, stored, ledger in diffs:
+        print(f"product_id={pid}: saqlangan={stored:.3f} ledger={ledger:.3f}")
+    if diffs:
+        print(f"{len(diffs)} ta nomuvofiqlik topildi (stock-rebuild bilan tuzating)")
+        return 1
+    print("stock_balances ledger bilan mos")
+    return 0
+
+
+def cmd_stock_checkpoint(args) -> int:
+    with SessionLocal() as db:
+        n = crud.write_stock_checkpoint(db)
+    print(f"checkpoint yozildi: {n} ta mahsulot" if n else "yangi harakat yo'q — checkpoint kerak emas")
+    return 0
+
+
+def cmd_rollup_rebuild(args) -> int:
+    with SessionLocal() as db:
+        n = crud.rebuild_delivery_rollup(db)
+    print(f"delivery_daily_rollup qayta qurildi: {n} ta qator")
+    return 0
+
+
+def cmd_balances_rebuild(args) -> int:
+    with SessionLocal() as db:
+        n = crud.rebuild_shop_balances(db)
+    print(f"do'kon balanslari qayta hisoblandi: {n} ta do'kon")
+    return 0
+
+
+def cmd_balances_verify(args) -> int:
+    with SessionLocal() as db:
+        diffs = crud.verify_shop_balances(db)
+    for sid, stored, ledger in diffs:
+        print(f"shop_id={sid}: saqlangan={stored:.2f} ledger={ledger:.2f}")
+    if diffs:
+        print(f"{len(diffs)} ta nomuvofiqlik topildi (balances-rebuild bilan tuzating)")
+        return 1
+    print("do'kon balanslari ledger bilan mos")
+    return 0
+
+
+def cmd_period_close(args) -> int:
+    boundary = datetime.combine(datetime.strptime(args.upto, "%Y-%m-%d").date(), datetime.min.time())
+    with SessionLocal() as db:
+        try:
+            close = services.close_period(db, boundary)
+        except services.PeriodCloseError as e:
+            print(e)
+            return 1
+    print(f"{close.boundary:%Y-%m-%d} gacha yopildi: harakatlar={close.moves_archived}, "
+          f"tranzaksiyalar={close.txs_archived}, yetkazishlar={close.deliveries_archived} arxivga ko'chdi")
+    return 0
+
+
+def cmd_migrate(args) -> int:
+    done = migrations.applied_versions(engine)
+    for m in migrations.MIGRATIONS:
+        print(f"{m.version} {'+' if m.version in done else '-'} {m.description}")
+    return 0
+
+
+# Katta (o'sib boruvchi) jadvallar: ularda filtrli so'rov indekssiz SCAN qilmasligi kerak
+PLAN_WATCHED = ("shops", "deliveries", "shop_transactions", "stock_moves", "delivery_daily_rollup", "stock_checkpoints")
+_FULL_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+
+def _hot_queries(db):
+    """Issiq so'rovlar: (nom, crud chaqiruvi). Filtrsiz 'hammasi' variantlari ataylab kiritilmagan."""
+    end = datetime.now()
+    start = end - timedelta(days=7)
+    cursor = encode_cursor(start, 1)
+    return [
+        ("deliveries_list_with_details", lambda: crud.deliveries_list_with_details(db)),
+        ("deliveries_list_with_details(oraliq)", lambda: crud.deliveries_list_with_details(db, start, end)),
+        ("deliveries_list_with_details(tuman)", lambda: crud.deliveries_list_with_details(db, start, end, district_id=1)),
+        ("deliveries_list_with_details(do'kon)", lambda: crud.deliveries_list_with_details(db, start, end, shop_id=1)),
+        ("deliveries_agg_by_shop(tuman)", lambda: crud.deliveries_agg_by_shop(db, start, end, district_id=1)),
+        ("deliveries_agg_paykind(do'kon)", lambda: crud.deliveries_agg_paykind(db, start, end, shop_id=1)),
+        ("deliveries_agg_by_product_in_shop", lambda: crud.deliveries_agg_by_product_in_shop(db, start, end, shop_id=1)),
+        ("deliveries_page(kursor)", lambda: crud.deliveries_page(db, start, end, after=cursor)),
+        ("deliveries_page(do'kon, kursor)", lambda: crud.deliveries_page(db, start, end, shop_id=1, after=cursor)),
+        ("deliveries_page(tuman, prev)", lambda: crud.deliveries_page(db, start, end, district_id=1, before=cursor)),
+        ("shops_page(kursor)", lambda: crud.shops_page(db, after=cursor)),
+        ("shops_page(tuman, kursor)", lambda: crud.shops_page(db, district_id=1, after=cursor)),
+        ("list_shop_txs", lambda: crud.list_shop_txs(db, 1)),
+        ("shop_txs_page(kursor)", lambda: crud.shop_txs_page(db, 1, after=cursor)),
+        ("list_balances(tuman)", lambda: crud.list_balances(db, district_id=1)),
+        ("stock_balances_for", lambda: crud.stock_balances_for(db, [1, 2])),
+        ("stock_balances_as_of", lambda: crud.stock_balances_as_of(db, start, [1, 2])),
+    ]
+
+
+def cmd_check_plans(args) -> int:
+    """
+    Har issiq so'rovning haqiqiy SQL'ini (crud funksiyasini chaqirib ushlab olinadi)
+    EXPLAIN QUERY PLAN bilan tekshiradi. Kuzatilayotgan jadvalda to'liq SCAN bo'lsa — xato.
+    """
+    bad = 0
+    with SessionLocal() as db:
+        conn = db.connection()
+        for name, call in _hot_queries(db):
+            captured = []
+
+            def _capture(c, cursor, statement, parameters, context, executemany):
+                if statement.lstrip().upper().startswith("SELECT"):
+                    captured.append((statement, parameters))
+
+            event.listen(engine, "before_cursor_execute", _capture)
+            try:
+                call()
+            finally:
+                event.remove(engine, "before_cursor_execute", _capture)
+
+            for statement, parameters in captured:
+                plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+                scans = [
+                    m.group(1) for row in plan
+                    if (m := _FULL_SCAN.match(row[-1])) and m.group(1) in PLAN_WATCHED
+                ]
+                status = "SCAN " + ", ".join(scans) if scans else "ok"
+                print(f"{name}: {status}")
+                if args.verbose or scans:
+                    for row in plan:
+                        print(f"    {row[-1]}")
+                bad += bool(scans)
+    if bad:
+        print(f"{bad} ta so'rov indekssiz to'liq skan qilmoqda")
+        return 1
+    return 0
+
+
+def cmd_bot_webhook(args) -> int:
+    import asyncio
+    from aiogram import Bot
+    from .settings import settings
+
+    if not settings.BOT_TOKEN:
+        print("BOT_TOKEN berilmagan")
+        return 1
+    if not settings.BOT_WEBHOOK_SECRET and not args.delete:
+        print("BOT_WEBHOOK_SECRET berilmagan")
+        return 1
+    url = settings.WEB_BASE.rstrip("/") + settings.BOT_WEBHOOK_PATH
+
+    async def run():
+        bot = Bot(settings.BOT_TOKEN)
+        try:
+            if args.delete:
+                await bot.delete_webhook()
+                print("webhook o'chirildi")
+            else:
+                await bot.set_webhook(url, secret_token=settings.BOT_WEBHOOK_SECRET,
+                                      max_connections=settings.BOT_CONCURRENCY)
+                print(f"webhook: {url}")
+        finally:
+            await bot.session.close()
+
+    asyncio.run(run())
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.manage")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("stock-rebuild", help="stock_balances'ni stock_moves'dan qayta hisoblash").set_defaults(fn=cmd_stock_rebuild)
+    sub.add_parser("stock-verify", help="stock_balances'ni stock_moves bilan solishtirish").set_defaults(fn=cmd_stock_verify)
+    sub.add_parser("stock-checkpoint", help="joriy qoldiqlardan checkpoint yozish").set_defaults(fn=cmd_stock_checkpoint)
+    sub.add_parser("rollup-rebuild", help="kunlik yetkazish rollup'ini backfill qilish").set_defaults(fn=cmd_rollup_rebuild)
+    sub.add_parser("balances-rebuild", help="shops.balance'ni ledger'dan qayta hisoblash").set_defaults(fn=cmd_balances_rebuild)
+    sub.add_parser("balances-verify", help="shops.balance'ni ledger bilan solishtirish").set_defaults(fn=cmd_balances_verify)
+    p = sub.add_parser("period-close", help="davrni yopish: eski ledger qatorlarini arxivga ko'chirish")
+    p.add_argument("--upto", required=True, help="YYYY-MM-DD — shu kun boshidan oldingi qatorlar")
+    p.set_defaults(fn=cmd_period_close)
+    sub.add_parser("migrate", help="sxema migratsiyalari holati").set_defaults(fn=cmd_migrate)
+    p = sub.add_parser("check-plans", help="issiq so'rovlarni EXPLAIN QUERY PLAN bilan tekshirish")
+    p.add_argument("-v", "--verbose", action="store_true", help="har so'rov rejasini chiqarish")
+    p.set_defaults(fn=cmd_check_plans)
+    p = sub.add_parser("bot-webhook", help="Telegram webhook'ini o'rnatish (yoki --delete)")
+    p.add_argument("--delete", action="store_true")
+    p.set_defaults(fn=cmd_bot_webhook)
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    for version in migrations.migrate(engine):
+        print(f"migratsiya qo'llandi: {version}")
+    return args.fn(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
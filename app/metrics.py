@@ -0,0 +1,207 @@
+# app/metrics.py
+"""
+So'rov va SQL o'lchovlari, Prometheus matn formatida (/metrics).
+
+- MetricsMiddleware: har route (shablon yo'li, masalan /admin/shops/{shop_id}/tx) uchun kechikish
+  gistogrammasi, so'rovlar soni (status bo'yicha), SQL so'rovlar soni va DB vaqti.
+- install(engine): SQLAlchemy cursor hodisalari joriy so'rov hisobiga yoziladi (ContextVar —
+  threadpool'dagi sync route va async sessiyalar uchun ham ishlaydi).
+- N+1: bitta so'rov ichida bir xil SQL METRICS_N_PLUS_ONE martadan ko'p — hisoblagich + log.
+- DEBUG=True bo'lsa javobga Server-Timing va X-DB-Queries sarlavhalari qo'shiladi.
+
+Ko'rsatkichlar jarayon ichida: bir nechta uvicorn worker bo'lsa har biri o'zinikini beradi.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+from sqlalchemy import event
+from .settings import settings
+
+log = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class RequestStats:
+    __slots__ = ("label", "queries", "db_time", "statements")
+
+    def __init__(self, label: str = ""):
+        self.label = label          # "GET /admin/monitor?days=90" — slowlog uchun
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements: Counter[str] = Counter()
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, v: float) -> None:
+        for i, b in enumerate(self.buckets):
+            if v <= b:
+                self.counts[i] += 1
+                break
+        self.sum += v
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency: dict[tuple, Histogram] = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.queries: dict[tuple, Histogram] = defaultdict(lambda: Histogram(QUERY_BUCKETS))
+        self.db_seconds: dict[tuple, float] = defaultdict(float)
+        self.requests: Counter[tuple] = Counter()
+        self.n_plus_one: Counter[tuple] = Counter()
+        self.started = time.time()
+
+    def record(self, method: str, route: str, status: int, elapsed: float, stats: RequestStats) -> None:
+        key = (method, route)
+        with self._lock:
+            self.latency[key].observe(elapsed)
+            self.queries[key].observe(stats.queries)
+            self.db_seconds[key] += stats.db_time
+            self.requests[(method, route, str(status))] += 1
+            repeated = [sql for sql, n in stats.statements.items() if n >= settings.METRICS_N_PLUS_ONE]
+            if repeated:
+                self.n_plus_one[key] += 1
+        for sql in repeated:
+            log.warning("N+1 %s %s: %d marta — %s", method, route, stats.statements[sql], " ".join(sql.split())[:200])
+
+    def render(self) -> str:
+        out: list[str] = []
+
+        def head(name, kind, help_):
+            out.append(f"# HELP {name} {help_}")
+            out.append(f"# TYPE {name} {kind}")
+
+        def histogram(name, data):
+            for (method, route), h in sorted(data.items()):
+                labels = f'method="{method}",route="{_esc(route)}"'
+                acc = 0
+                for b, c in zip(h.buckets, h.counts):
+                    acc += c
+                    out.append(f'{name}_bucket{{{labels},le="{b:g}"}} {acc}')
+                out.append(f'{name}_bucket{{{labels},le="+Inf"}} {h.count}')
+                out.append(f"{name}_sum{{{labels}}} {h.sum:.6f}")
+                out.append(f"{name}_count{{{labels}}} {h.count}")
+
+        with self._lock:
+            head("sklad_http_requests_total", "counter", "So'rovlar soni")
+            for (method, route, status), n in sorted(self.requests.items()):
+                out.append(f'sklad_http_requests_total{{method="{method}",route="{_esc(route)}",status="{status}"}} {n}')
+            head("sklad_http_request_duration_seconds", "histogram", "So'rov kechikishi")
+            histogram("sklad_http_request_duration_seconds", self.latency)
+            head("sklad_db_queries_per_request", "histogram", "Bitta so'rovdagi SQL so'rovlar soni")
+            histogram("sklad_db_queries_per_request", self.queries)
+            head("sklad_db_seconds_total", "counter", "So'rovlar ichida SQL'ga ketgan vaqt")
+            for (method, route), v in sorted(self.db_seconds.items()):
+                out.append(f'sklad_db_seconds_total{{method="{method}",route="{_esc(route)}"}} {v:.6f}')
+            head("sklad_n_plus_one_total", "counter", "Bir xil SQL takrorlangan (N+1) so'rovlar")
+            for (method, route), n in sorted(self.n_plus_one.items()):
+                out.append(f'sklad_n_plus_one_total{{method="{method}",route="{_esc(route)}"}} {n}')
+            head("sklad_process_start_time_seconds", "gauge", "Jarayon boshlangan vaqt")
+            out.append(f"sklad_process_start_time_seconds {self.started:.0f}")
+        return "\n".join(out) + "\n"
+
+
+def _esc(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"')
+
+
+registry = Registry()
+
+
+# ——— SQLAlchemy hodisalari
+
+def _before(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("metrics_t0", []).append(time.perf_counter())
+
+
+def _after(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    stack = conn.info.get("metrics_t0")
+    if stack:
+        stats.db_time += time.perf_counter() - stack.pop()
+    stats.queries += 1
+    stats.statements[statement] += 1
+
+
+def _error(ctx):
+    # xatoda after_cursor_execute chaqirilmaydi — boshlanish vaqtini olib tashlaymiz
+    stack = ctx.connection.info.get("metrics_t0") if ctx.connection is not None else None
+    if stack:
+        stack.pop()
+
+
+def install(engine) -> None:
+    """Sync engine yoki AsyncEngine.sync_engine."""
+    event.listen(engine, "before_cursor_execute", _before)
+    event.listen(engine, "after_cursor_execute", _after)
+    event.listen(engine, "handle_error", _error)
+
+
+def current() -> RequestStats | None:
+    return _current.get()
+
+
+@contextmanager
+def collect(label: str = "") -> Iterator[RequestStats]:
+    """HTTP so'rovdan tashqarida (skript, benchmark) SQL so'rovlarini sanash."""
+    stats = RequestStats(label)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+# ——— ASGI middleware
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        query = scope.get("query_string", b"").decode("latin-1")
+        stats = RequestStats(f"{scope['method']} {scope['path']}" + (f"?{query}" if query else ""))
+        token = _current.set(stats)
+        t0 = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.DEBUG:
+                    elapsed = (time.perf_counter() - t0) * 1000
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing",
+                         f"app;dur={elapsed:.1f}, db;dur={stats.db_time * 1000:.1f}".encode()),
+                        (b"x-db-queries", str(stats.queries).encode()),
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "<other>"   # noma'lum URL'lar label'ni portlatmasin
+            registry.record(scope["method"], path, status, time.perf_counter() - t0, stats)
@@ -0,0 +1,152 @@
+# app/migrations.py
+"""
+Sxema migratsiyalari: mavjud sklad.db'ni joyida yangilash.
+
+create_all faqat yo'q jadvallarni yaratadi — mavjud jadvalga ustun yoki indeks qo'shmaydi.
+Har migratsiya bir marta ishlaydi va schema_migrations jadvalida qayd etiladi.
+Migratsiyalar idempotent yoziladi (IF NOT EXISTS / ustun borligini tekshirish), chunki yangi
+bazada create_all ularning natijasini allaqachon yaratgan bo'ladi.
+
+Yangi migratsiya: funksiya yozib MIGRATIONS oxiriga qo'shing. Versiyani o'zgartirmang.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: str
+    description: str
+    apply: Callable[[Connection], None]
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl_type: str) -> None:
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column not in existing:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+
+def _create_index(conn: Connection, name: str, table: str, *columns: str) -> None:
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"))
+
+
+def m0001_delivery_doc_id(conn: Connection) -> None:
+    # savat hujjatlari (DeliveryDoc) qo'shilgandan oldingi bazalar uchun
+    _add_column(conn, "deliveries", "doc_id", "INTEGER REFERENCES delivery_docs(id)")
+    _create_index(conn, "ix_deliveries_doc_id", "deliveries", "doc_id")
+
+
+def m0002_report_indexes(conn: Connection) -> None:
+    # crud.deliveries_list_with_details: created_at oralig'i (+ do'kon/tuman), created_at DESC
+    _create_index(conn, "ix_deliveries_created_at", "deliveries", "created_at")
+    _create_index(conn, "ix_deliveries_shop_created", "deliveries", "shop_id", "created_at")
+    _create_index(conn, "ix_deliveries_district_created", "deliveries", "district_id", "created_at")
+    _create_index(conn, "ix_deliveries_product_created", "deliveries", "product_id", "created_at")
+    # crud.list_shop_txs: shop_id = ? ORDER BY created_at DESC
+    _create_index(conn, "ix_shop_transactions_shop_created", "shop_transactions", "shop_id", "created_at")
+
+
+def m0003_shops_keyset_indexes(conn: Connection) -> None:
+    # crud.shops_page: (created_at, id) < kursor, tuman filtri bilan/siz
+    _create_index(conn, "ix_shops_created_at", "shops", "created_at")
+    _create_index(conn, "ix_shops_district_created", "shops", "district_id", "created_at")
+
+
+def m0004_stock_moves_created_at(conn: Connection) -> None:
+    # app.export.stock_moves_stmt: created_at oralig'i
+    _create_index(conn, "ix_stock_moves_created_at", "stock_moves", "created_at")
+
+
+def m0005_shop_running_balance(conn: Connection) -> None:
+    # shops.balance / last_tx_at: add_shop_tx yangilab boradi; mavjud ledger'dan backfill
+    _add_column(conn, "shops", "balance", "FLOAT NOT NULL DEFAULT 0")
+    _add_column(conn, "shops", "last_tx_at", "DATETIME")
+    _create_index(conn, "ix_shops_district_name", "shops", "district_id", "name")
+    conn.execute(text(
+        "UPDATE shops SET"
+        " balance = COALESCE((SELECT SUM(CASE WHEN kind = 'payment' THEN amount ELSE -amount END)"
+        "                     FROM shop_transactions WHERE shop_id = shops.id), 0),"
+        " last_tx_at = (SELECT MAX(created_at) FROM shop_transactions WHERE shop_id = shops.id)"
+    ))
+
+
+def _rebuild_sqlite_autoincrement(conn: Connection, table_name: str) -> None:
+    """
+    SQLite'da AUTOINCREMENT faqat CREATE TABLE'da beriladi — jadval modeldagi ta'rif bilan
+    qayta yaratiladi va qatorlar ko'chiriladi. Bu jadvallarga FK bilan bog'langan jadval yo'q.
+    """
+    from .database import Base
+    sql = conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :n"), {"n": table_name}
+    ).scalar()
+    if sql is None or "AUTOINCREMENT" in sql.upper():
+        return
+    old = f"{table_name}__old"
+    conn.execute(text(f"ALTER TABLE {table_name} RENAME TO {old}"))
+    for (index_name,) in conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :t AND sql IS NOT NULL"
+    ), {"t": old}).all():
+        conn.execute(text(f"DROP INDEX {index_name}"))
+    table = Base.metadata.tables[table_name]
+    table.create(conn)
+    cols = ", ".join(c.name for c in table.columns)
+    conn.execute(text(f"INSERT INTO {table_name} ({cols}) SELECT {cols} FROM {old}"))
+    conn.execute(text(f"DROP TABLE {old}"))
+
+
+def m0006_ledger_autoincrement(conn: Connection) -> None:
+    # davr yopish qatorlarni arxivga ko'chiradi: bo'shagan id'lar qayta berilmasligi kerak
+    if conn.dialect.name != "sqlite":
+        return
+    for name in ("stock_moves", "shop_transactions", "deliveries"):
+        _rebuild_sqlite_autoincrement(conn, name)
+
+
+MIGRATIONS: list[Migration] = [
+    Migration("0001", "deliveries.doc_id ustuni", m0001_delivery_doc_id),
+    Migration("0002", "hisobot so'rovlari uchun kompozit indekslar", m0002_report_indexes),
+    Migration("0003", "do'konlar ro'yxati uchun keyset indekslar", m0003_shops_keyset_indexes),
+    Migration("0004", "ombor harakatlari eksporti uchun indeks", m0004_stock_moves_created_at),
+    Migration("0005", "do'kon balansi ustunlari (running balance)", m0005_shop_running_balance),
+    Migration("0006", "ledger jadvallarida AUTOINCREMENT (davr yopish uchun)", m0006_ledger_autoincrement),
+]
+
+
+def _ensure_table(conn: Connection) -> None:
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version VARCHAR(32) PRIMARY KEY,"
+        " description VARCHAR(255),"
+        " applied_at TIMESTAMP NOT NULL)"
+    ))
+
+
+def applied_versions(bind: Engine) -> set[str]:
+    with bind.begin() as conn:
+        _ensure_table(conn)
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def pending(bind: Engine) -> list[Migration]:
+    done = applied_versions(bind)
+    return [m for m in MIGRATIONS if m.version not in done]
+
+
+def migrate(bind: Engine) -> list[str]:
+    """
+    Qo'llanmagan migratsiyalarni tartib bilan ishga tushiradi. Har biri o'z tranzaksiyasida:
+    xato bo'lsa o'sha migratsiya qayd etilmaydi va keyingi ishga tushishda qayta uriniladi.
+    """
+    applied = []
+    for m in pending(bind):
+        with bind.begin() as conn:
+            m.apply(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": m.version, "d": m.description, "t": datetime.now()},
+            )
+        applied.append(m.version)
+    return applied
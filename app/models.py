@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, func, Enum as SAEnum
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Date, DateTime, Index, Table, func, Enum as SAEnum
 from sqlalchemy.orm import relationship
 from .database import Base
 import enum
@@ -35,8 +35,19 @@ class Shop(Base):
     name = Column(String(120), nullable=False, index=True)
     district_id = Column(Integer, ForeignKey("districts.id", ondelete="CASCADE"), nullable=False, index=True)
     created_at = Column(DateTime, server_default=func.now())
+    # joriy balans (to'lov +, qarz -) va oxirgi tranzaksiya vaqti — crud.add_shop_tx yangilaydi,
+    # crud.rebuild_shop_balances ledger'dan qayta hisoblaydi
+    balance = Column(Float, nullable=False, default=0.0, server_default="0")
+    last_tx_at = Column(DateTime, nullable=True)
     district = relationship("District", back_populates="shops")
 
+    # /admin/shops keyset sahifalash: (created_at, id) DESC, tuman filtri bilan/siz
+    __table_args__ = (
+        Index("ix_shops_created_at", "created_at"),
+        Index("ix_shops_district_created", "district_id", "created_at"),
+        Index("ix_shops_district_name", "district_id", "name"),  # /admin/balances tuman filtri
+    )
+
 class Product(Base):
     __tablename__ = "products"
     id = Column(Integer, primary_key=True, index=True)
@@ -49,6 +60,21 @@ class Product(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, server_default=func.now())
 
+class DeliveryDoc(Base):
+    """
+    Savat hujjati: bitta tashrifda bir do'konga yetkazilgan mahsulotlar.
+    Qatorlari — oddiy Delivery yozuvlari (doc_id bilan).
+    """
+    __tablename__ = "delivery_docs"
+    id = Column(Integer, primary_key=True, index=True)
+    district_id = Column(Integer, ForeignKey("districts.id"), nullable=False)
+    shop_id = Column(Integer, ForeignKey("shops.id"), nullable=False)
+    pay_kind = Column(String(50), nullable=False, default="naqd")
+    total = Column(Float, nullable=False, default=0.0)
+    created_at = Column(DateTime, server_default=func.now())
+
+    lines = relationship("Delivery", back_populates="doc")
+
 class Delivery(Base):
     __tablename__ = "deliveries"
     id = Column(Integer, primary_key=True, index=True)
@@ -59,8 +85,45 @@ class Delivery(Base):
     unit_price = Column(Float, nullable=False)  # so'm/kg
     total = Column(Float, nullable=False)
     pay_kind = Column(String(50), nullable=False, default="naqd")
+    doc_id = Column(Integer, ForeignKey("delivery_docs.id"), nullable=True, index=True)  # savat orqali bo'lsa
     created_at = Column(DateTime, server_default=func.now())
 
+    doc = relationship("DeliveryDoc", back_populates="lines")
+    product = relationship("Product")
+
+    # created_at INSERT ... RETURNING bilan darhol olinadi (rollup kuni uchun qo'shimcha SELECT kerak emas)
+    __mapper_args__ = {"eager_defaults": True}
+    # monitoring ro'yxati: sana oralig'i + tuman/do'kon filtri, created_at bo'yicha saralash
+    __table_args__ = (
+        Index("ix_deliveries_created_at", "created_at"),
+        Index("ix_deliveries_shop_created", "shop_id", "created_at"),
+        Index("ix_deliveries_district_created", "district_id", "created_at"),
+        Index("ix_deliveries_product_created", "product_id", "created_at"),
+        # davr yopilganda id'lar qayta ishlatilmasin (arxivdagi id bilan to'qnashmasin)
+        {"sqlite_autoincrement": True},
+    )
+
+
+class DeliveryDailyRollup(Base):
+    """
+    Yetkazishlarning kunlik yig'indisi: (kun, tuman, do'kon, mahsulot, to'lov turi) kesimida.
+    create_delivery / create_delivery_doc bilan bir tranzaksiyada yangilanadi; monitoring shu jadvaldan o'qiydi.
+    """
+    __tablename__ = "delivery_daily_rollup"
+    day = Column(Date, primary_key=True)
+    district_id = Column(Integer, primary_key=True)
+    shop_id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, primary_key=True)
+    pay_kind = Column(String(50), primary_key=True)
+    cnt = Column(Integer, nullable=False, default=0)
+    qty_kg = Column(Float, nullable=False, default=0.0)
+    total = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        Index("ix_delivery_rollup_district_day", "district_id", "day"),
+        Index("ix_delivery_rollup_shop_day", "shop_id", "day"),
+    )
+
 
 class StockMove(Base):
     """
@@ -80,6 +143,39 @@ class StockMove(Base):
     product = relationship("Product")
     shop = relationship("Shop")
 
+    # /admin/export/stock-moves.csv: sana oralig'i bo'yicha
+    __table_args__ = (
+        Index("ix_stock_moves_created_at", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
+
+
+class StockBalance(Base):
+    """
+    Mahsulot bo'yicha joriy qoldiq — StockMove ledger'ining materiallashtirilgan yig'indisi.
+    add_kirim / add_chiqim bilan bir tranzaksiyada yangilanadi.
+    """
+    __tablename__ = "stock_balances"
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    qty_kg = Column(Float, nullable=False, default=0.0)
+
+
+class StockCheckpoint(Base):
+    """
+    Davriy qoldiq snapshot'i: upto_move_id gacha (shu jumladan) bo'lgan harakatlar bo'yicha qoldiq.
+    taken_at = upto_move_id harakatining vaqti. "D sanadagi qoldiq" = eng yaqin checkpoint + undan keyingi harakatlar.
+    """
+    __tablename__ = "stock_checkpoints"
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    upto_move_id = Column(Integer, nullable=False)
+    qty_kg = Column(Float, nullable=False)
+    taken_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_stock_checkpoints_product_taken", "product_id", "taken_at"),
+    )
+
 # === Balans tranzaksiyalari (do'kon uchun) ===
 class TxKind(str, enum.Enum):
     sale = "sale"       # qarzga berilgan tovar summasi (bizga qarzi OShadi)
@@ -95,3 +191,97 @@ class ShopTransaction(Base):
     created_at = Column(DateTime, server_default=func.now())
 
     shop = relationship("Shop")
+
+    # created_at flush'da olinadi — shops.last_tx_at uchun
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        Index("ix_shop_transactions_shop_created", "shop_id", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
+
+
+# === Davr yopish (arxiv) ===
+class PeriodClose(Base):
+    """
+    Yopilgan davr: boundary'dan oldingi stock_moves / shop_transactions / deliveries
+    *_archive jadvallariga ko'chirilgan. Ochilish qoldiqlari:
+      - ombor — StockCheckpoint (upto_move_id = stock_upto_move_id, taken_at = boundary);
+      - do'kon — boundary vaqtli ShopTransaction ("Davr ochilishi").
+    """
+    __tablename__ = "period_closes"
+    id = Column(Integer, primary_key=True)
+    boundary = Column(DateTime, nullable=False, unique=True)
+    stock_upto_move_id = Column(Integer, nullable=True)
+    moves_archived = Column(Integer, nullable=False, default=0)
+    txs_archived = Column(Integer, nullable=False, default=0)
+    deliveries_archived = Column(Integer, nullable=False, default=0)
+    closed_at = Column(DateTime, server_default=func.now())
+
+
+def _archive_of(table: Table, *indexes: tuple[str, ...]) -> Table:
+    """Jadvalning arxiv nusxasi: ustunlar o'sha (FK'siz), indekslar — hisobot filtrlari uchun."""
+    name = f"{table.name}_archive"
+    return Table(
+        name, Base.metadata,
+        *[Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable) for c in table.columns],
+        *[Index(f"ix_{name}_{'_'.join(cols)}", *cols) for cols in indexes],
+    )
+
+
+stock_moves_archive = _archive_of(StockMove.__table__, ("product_id",), ("created_at",))
+shop_transactions_archive = _archive_of(ShopTransaction.__table__, ("shop_id", "created_at"))
+deliveries_archive = _archive_of(
+    Delivery.__table__, ("created_at",), ("shop_id", "created_at"), ("district_id", "created_at"),
+)
+ARCHIVES = {t.name[: -len("_archive")]: t for t in (stock_moves_archive, shop_transactions_archive, deliveries_archive)}
+
+
+class OutboxMessage(Base):
+    """
+    Telegram bildirishnomalari navbati (transactional outbox): hodisa bilan BIR tranzaksiyada
+    yoziladi, bot.notifier worker'i alohida yuboradi. Har qabul qiluvchi chat — alohida qator.
+    claimed_until — worker "ijarasi": jarayon yiqilsa muddat o'tgach qator qayta olinadi.
+    """
+    __tablename__ = "outbox"
+    id = Column(Integer, primary_key=True)
+    chat_id = Column(String(64), nullable=False)
+    kind = Column(String(32), nullable=False)          # delivery | debt_limit | low_stock
+    text = Column(String, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False)   # UTC (outbox.utcnow)
+    claimed_until = Column(DateTime, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+
+    __table_args__ = (
+        # faqat kutilayotgan qatorlar indeksda — yuborilganlar ko'paysa ham so'rov tez
+        Index("ix_outbox_pending", "next_attempt_at",
+              sqlite_where=sent_at.is_(None), postgresql_where=sent_at.is_(None)),
+    )
+
+
+class ReportJob(Base):
+    """
+    Og'ir hisobot navbati (app.jobs / app.worker). params va result — JSON matn.
+    key — tur + parametrlar + ma'lumot versiyasi xeshi: bir xil so'rov qayta navbatga tushmaydi.
+    """
+    __tablename__ = "report_jobs"
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(32), nullable=False)
+    params = Column(String, nullable=False)
+    key = Column(String(64), nullable=False, index=True)
+    status = Column(String(16), nullable=False, default="queued")   # queued | running | done | failed
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, server_default=func.now())
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    lease_until = Column(DateTime, nullable=True)                    # UTC (jobs.utcnow)
+    result = Column(String, nullable=True)
+    error = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_report_jobs_active", "status", "id",
+              sqlite_where=status.in_(("queued", "running")),
+              postgresql_where=status.in_(("queued", "running"))),
+    )
@@ -0,0 +1,176 @@
+# app/outbox.py
+"""
+Bildirishnomalar uchun transactional outbox.
+
+Yozish tomoni (services / crud): hodisa matni `outbox` jadvaliga o'sha tranzaksiyada qo'shiladi —
+commit bo'lmasa xabar ham yo'q, commit bo'lsa jarayon qayta ishga tushsa ham yo'qolmaydi.
+Tarmoq yo'q: har qabul qiluvchi uchun bitta INSERT qatori (executemany). Bot o'chiq bo'lsa
+(BOT_TOKEN/BOT_FAKE yo'q) navbatni bo'shatadigan ham yo'q — hech narsa yozilmaydi.
+
+O'qish tomoni (bot.notifier): claim() — qatorlarni ijaraga oladi, yuborgach mark_sent(),
+xatoda mark_failed() (eksponensial kutish), chat band bo'lsa defer().
+Vaqtlar — naive UTC (SQLite CURRENT_TIMESTAMP bilan bir xil).
+"""
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from . import models
+from .settings import settings
+
+MAX_TEXT = 4000  # Telegram chegarasi 4096
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def enabled() -> bool:
+    """Xabarlarni yuboradigan bot.notifier faqat bot yoqilganda ishlaydi (app.main) — aks holda navbat o'smasin."""
+    return bool(settings.BOT_TOKEN or settings.BOT_FAKE)
+
+
+def recipients() -> list[str]:
+    raw = settings.NOTIFY_CHAT_IDS or settings.ADMIN_TG_IDS
+    return [x.strip() for x in raw.split(",") if x.strip()]
+
+
+def enqueue(db: Session, kind: str, text: str) -> None:
+    """Commit qilmaydi — chaqiruvchi tranzaksiyasi bilan birga yoziladi. Notifier o'chiq bo'lsa — hech narsa."""
+    chats = recipients() if enabled() else []
+    if not chats:
+        return
+    now = utcnow()
+    db.execute(
+        insert(models.OutboxMessage),
+        [{"chat_id": c, "kind": kind, "text": text, "attempts": 0, "next_attempt_at": now} for c in chats],
+    )
+
+
+# ——— Hodisalar
+
+def _money(x: float) -> str:
+    return f"{x:,.0f}".replace(",", " ")
+
+
+def delivery_recorded(db: Session, delivery: models.Delivery, shop_name: str, product_name: str) -> None:
+    if settings.NOTIFY_DELIVERIES:
+        enqueue(db, "delivery",
+                f"🚚 #{delivery.id} {shop_name}: {product_name} {delivery.qty_kg:g} kg — "
+                f"{_money(delivery.total)} so'm ({delivery.pay_kind})")
+
+
+def doc_recorded(db: Session, doc: models.DeliveryDoc, shop_name: str, lines: int) -> None:
+    if settings.NOTIFY_DELIVERIES:
+        enqueue(db, "delivery",
+                f"🚚 Hujjat #{doc.id} {shop_name}: {lines} ta mahsulot — "
+                f"{_money(doc.total)} so'm ({doc.pay_kind})")
+
+
+def check_debt(db: Session, shop_name: str, old_balance: float, new_balance: float) -> None:
+    """Balans -SHOP_DEBT_LIMIT chegarasidan pastga o'tgan paytda (har tranzaksiyada emas)."""
+    limit = settings.SHOP_DEBT_LIMIT
+    if limit > 0 and old_balance >= -limit > new_balance:
+        enqueue(db, "debt_limit",
+                f"⚠️ {shop_name}: qarz limitdan oshdi — balans {_money(new_balance)} so'm "
+                f"(limit {_money(limit)})")
+
+
+def check_stock(db: Session, product_name: str, before: float, after: float) -> None:
+    """Qoldiq LOW_STOCK_KG chegarasidan pastga o'tgan paytda."""
+    threshold = settings.LOW_STOCK_KG
+    if threshold > 0 and before >= threshold > after:
+        enqueue(db, "low_stock", f"📉 {product_name}: omborda {after:.1f} kg qoldi (chegara {threshold:g} kg)")
+
+
+# ——— Worker tomoni
+
+def claim(db: Session, limit: int, lease_sec: float, skip_chats: list[str] = ()) -> list:
+    """
+    Yuborilmagan, vaqti kelgan va ijarasi yo'q qatorlarni ijaraga oladi (bitta UPDATE ... RETURNING).
+    skip_chats — hozir rate-limit'dagi chatlar: ularning qatorlari yig'ilib, keyin bitta xabar bo'ladi.
+    """
+    o = models.OutboxMessage
+    now = utcnow()
+    pending = (
+        select(o.id)
+        .where(
+            o.sent_at.is_(None),
+            o.attempts < settings.NOTIFY_MAX_ATTEMPTS,
+            o.next_attempt_at <= now,
+            (o.claimed_until.is_(None)) | (o.claimed_until < now),
+        )
+        .order_by(o.id)
+        .limit(limit)
+    )
+    if skip_chats:
+        pending = pending.where(o.chat_id.not_in(list(skip_chats)))
+    rows = db.execute(
+        update(o)
+        .where(o.id.in_(pending))
+        .values(claimed_until=now + timedelta(seconds=lease_sec))
+        .returning(o.id, o.chat_id, o.kind, o.text, o.attempts)
+    ).all()
+    db.commit()
+    return sorted(rows, key=lambda r: r.id)
+
+
+def mark_sent(db: Session, ids: list[int]) -> None:
+    o = models.OutboxMessage
+    db.execute(update(o).where(o.id.in_(ids)).values(sent_at=utcnow(), claimed_until=None, last_error=None))
+    db.commit()
+
+
+def mark_failed(db: Session, ids: list[int], error: str, permanent: bool = False) -> None:
+    """attempts+1, keyingi urinish 2^attempts sekunddan keyin (ko'pi 1 soat). permanent — boshqa urinilmaydi."""
+    o = models.OutboxMessage
+    now = utcnow()
+    for row in db.execute(select(o.id, o.attempts).where(o.id.in_(ids))).all():
+        attempts = settings.NOTIFY_MAX_ATTEMPTS if permanent else row.attempts + 1
+        db.execute(
+            update(o).where(o.id == row.id).values(
+                attempts=attempts, claimed_until=None, last_error=error[:500],
+                next_attempt_at=now + timedelta(seconds=min(2 ** attempts, 3600)),
+            )
+        )
+    db.commit()
+
+
+def defer(db: Session, ids: list[int], seconds: float) -> None:
+    """Urinish hisoblanmaydi (Telegram "retry after"): faqat keyinga suriladi."""
+    o = models.OutboxMessage
+    db.execute(
+        update(o).where(o.id.in_(ids))
+        .values(claimed_until=None, next_attempt_at=utcnow() + timedelta(seconds=seconds))
+    )
+    db.commit()
+
+
+def purge(db: Session, keep_days: int) -> int:
+    o = models.OutboxMessage
+    n = db.execute(delete(o).where(o.sent_at < utcnow() - timedelta(days=keep_days))).rowcount
+    db.commit()
+    return n
+
+
+def digest(texts: list[str]) -> str:
+    """Bir chatga yig'ilgan hodisalar — bitta xabar (Telegram uzunlik chegarasida)."""
+    if len(texts) == 1:
+        return texts[0][:MAX_TEXT]
+    out = f"🔔 {len(texts)} ta yangi hodisa:"
+    for i, t in enumerate(texts):
+        if len(out) + len(t) + 1 > MAX_TEXT - 40:
+            return out + f"\n… yana {len(texts) - i} ta"
+        out += "\n" + t
+    return out
+
+
+def stats(db: Session) -> dict:
+    o = models.OutboxMessage
+    row = db.execute(
+        select(
+            func.count().filter(o.sent_at.is_(None), o.attempts < settings.NOTIFY_MAX_ATTEMPTS),
+            func.count().filter(o.sent_at.is_(None), o.attempts >= settings.NOTIFY_MAX_ATTEMPTS),
+            func.count().filter(o.sent_at.is_not(None)),
+        )
+    ).one()
+    return {"pending": row[0], "dead": row[1], "sent": row[2]}
@@ -0,0 +1,87 @@
+# app/pagination.py
+"""
+Keyset (cursor) sahifalash: (created_at, id) bo'yicha, eng yangisi birinchi.
+
+OFFSET o'rniga oxirgi ko'rilgan kalitdan davom etamiz — indeks bo'yicha qidiruv,
+shuning uchun 1000-sahifa ham 1-sahifa kabi arzon.
+
+Kursor — bazada saqlangan created_at matni + id. created_at xom matn sifatida olinadi va
+solishtiriladi: SQLite'da func.now() "YYYY-MM-DD HH:MM:SS" yozadi, Python datetime esa
+mikrosekund bilan bog'lanadi — datetime orqali solishtirsak bir soniyadagi yozuvlar takrorlanadi.
+"""
+from dataclasses import dataclass, field
+from sqlalchemy import String, literal, tuple_, type_coerce
+from sqlalchemy.orm import Session
+
+_SEP = "~"
+
+
+@dataclass
+class Page:
+    items: list = field(default_factory=list)
+    next: str | None = None   # eskiroq yozuvlar (keyingi sahifa)
+    prev: str | None = None   # yangiroq yozuvlar (oldingi sahifa)
+
+
+def encode_cursor(ts, id_: int) -> str:
+    return f"{ts}{_SEP}{id_}"
+
+
+def decode_cursor(cursor: str | None) -> tuple[str, int] | None:
+    """Buzilgan kursor — None (birinchi sahifa ko'rsatiladi)."""
+    if not cursor or _SEP not in cursor:
+        return None
+    ts, _, id_ = cursor.rpartition(_SEP)
+    try:
+        return ts, int(id_)
+    except ValueError:
+        return None
+
+
+def keyset_page(
+    db: Session,
+    stmt,
+    created_col,
+    id_col,
+    *,
+    size: int,
+    after: str | None = None,
+    before: str | None = None,
+    entity: bool = False,
+) -> Page:
+    """
+    stmt — filtrlangan, lekin saralanmagan/limitlanmagan select.
+    after  — shu kursordan eskiroq yozuvlar (next havolasi);
+    before — shu kursordan yangiroq yozuvlar (prev havolasi).
+    entity=True bo'lsa select(Model) — items'da model obyektlari qaytadi.
+    """
+    ts = type_coerce(created_col, String)
+    key = tuple_(ts, id_col)
+    stmt = stmt.add_columns(ts.label("cursor_ts"), id_col.label("cursor_id"))
+
+    back = decode_cursor(before)
+    fwd = None if back else decode_cursor(after)
+    if back:
+        stmt = stmt.where(key > tuple_(literal(back[0], String), literal(back[1])))
+        stmt = stmt.order_by(ts.asc(), id_col.asc())
+    else:
+        if fwd:
+            stmt = stmt.where(key < tuple_(literal(fwd[0], String), literal(fwd[1])))
+        stmt = stmt.order_by(ts.desc(), id_col.desc())
+
+    rows = db.execute(stmt.limit(size + 1)).all()
+    more = len(rows) > size
+    rows = rows[:size]
+    if back:
+        rows.reverse()
+
+    page = Page(items=[r[0] if entity else r for r in rows])
+    if rows:
+        first, last = rows[0], rows[-1]
+        if back:
+            page.next = encode_cursor(last.cursor_ts, last.cursor_id)
+            page.prev = encode_cursor(first.cursor_ts, first.cursor_id) if more else None
+        else:
+            page.next = encode_cursor(last.cursor_ts, last.cursor_id) if more else None
+            page.prev = encode_cursor(first.cursor_ts, first.cursor_id) if fwd else None
+    return page
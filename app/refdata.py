@@ -0,0 +1,167 @@
+# app/refdata.py
+"""
+Ma'lumotnomalar keshi: tumanlar, do'konlar, mahsulotlar — jarayon ichida, versiya bilan.
+
+Bu jadvallar kuniga bir necha marta o'zgaradi, dealer sahifalari esa har qadamda o'qiydi.
+Butun to'plam bitta "snapshot" sifatida yuklanadi (3 ta so'rov) va versiya o'zgarmaguncha
+bazaga borilmaydi. crud'dagi yozuvchi funksiyalar touch(db) chaqiradi — commit bo'lgach versiya oshadi.
+
+Snapshot'dagi obyektlar — muzlatilgan dataclass'lar (ORM emas): sessiyaga bog'lanmagan,
+shablonda lazy load bo'lmaydi, so'rovlar orasida bemalol bo'lishiladi.
+
+Boshqa jarayon (bir nechta worker, manage) o'zgarishlarini ko'rmaydi — ular REFDATA_TTL ichida yetib keladi.
+
+Snapshot.digest — mazmun xeshi: versiya jarayon ichida hisoblagich, digest esa ma'lumot o'zgarmasa
+qayta yuklashdan keyin ham (boshqa jarayonda ham) bir xil. ETag'lar shunga tayanadi.
+"""
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, field
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from . import models
+from .settings import settings
+
+_INFO_KEY = "refdata_dirty"
+
+
+@dataclass(frozen=True)
+class DistrictRef:
+    id: int
+    name: str
+
+
+@dataclass(frozen=True)
+class ShopRef:
+    id: int
+    name: str
+    district_id: int
+
+
+@dataclass(frozen=True)
+class ProductRef:
+    id: int
+    name: str
+    kind: str | None
+    brand: str | None
+    price_per_kg: float | None
+    in_price_per_pack: float | None
+    out_price_per_pack: float | None
+    is_active: bool
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    version: int
+    digest: str
+    districts: tuple[DistrictRef, ...]
+    shops_by_district: dict[int, tuple[ShopRef, ...]] = field(repr=False)
+    all_products: tuple[ProductRef, ...] = field(repr=False)
+    products_by_id: dict[int, ProductRef] = field(repr=False)
+
+    def shops_in(self, district_id: int) -> tuple[ShopRef, ...]:
+        return self.shops_by_district.get(district_id, ())
+
+    def products(self, only_active: bool = True) -> tuple[ProductRef, ...]:
+        if not only_active:
+            return self.all_products
+        return tuple(p for p in self.all_products if p.is_active)
+
+    def product(self, product_id: int) -> ProductRef | None:
+        return self.products_by_id.get(product_id)
+
+
+def _load(db: Session, version: int) -> Snapshot:
+    districts = tuple(
+        DistrictRef(id=d.id, name=d.name)
+        for d in db.execute(select(models.District.id, models.District.name).order_by(models.District.name))
+    )
+    s = models.Shop
+    shops: dict[int, list[ShopRef]] = {}
+    for row in db.execute(select(s.id, s.name, s.district_id).order_by(s.name)):
+        shops.setdefault(row.district_id, []).append(ShopRef(id=row.id, name=row.name, district_id=row.district_id))
+    p = models.Product
+    products = tuple(
+        ProductRef(
+            id=row.id, name=row.name, kind=row.kind, brand=row.brand, price_per_kg=row.price_per_kg,
+            in_price_per_pack=row.in_price_per_pack, out_price_per_pack=row.out_price_per_pack,
+            is_active=bool(row.is_active),
+        )
+        for row in db.execute(
+            select(p.id, p.name, p.kind, p.brand, p.price_per_kg, p.in_price_per_pack,
+                   p.out_price_per_pack, p.is_active).order_by(p.name)
+        )
+    )
+    digest = hashlib.blake2b(repr((districts, shops, products)).encode(), digest_size=8).hexdigest()
+    return Snapshot(
+        version=version,
+        digest=digest,
+        districts=districts,
+        shops_by_district={k: tuple(v) for k, v in shops.items()},
+        all_products=products,
+        products_by_id={x.id: x for x in products},
+    )
+
+
+class RefData:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.version = 0
+        self._snap: Snapshot | None = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def _current(self) -> Snapshot | None:
+        snap = self._snap
+        if snap is not None and snap.version == self.version and time.monotonic() - self._loaded_at < self.ttl:
+            self.hits += 1
+            return snap
+        return None
+
+    def _store(self, snap: Snapshot) -> Snapshot:
+        # yuklash paytida versiya oshgan bo'lsa — snapshot saqlanadi, lekin keyingi get qayta yuklaydi
+        with self._lock:
+            self._snap = snap
+            self._loaded_at = time.monotonic()
+            self.loads += 1
+        return snap
+
+    def get(self, db: Session) -> Snapshot:
+        return self._current() or self._store(_load(db, self.version))
+
+    async def aget(self, db: AsyncSession) -> Snapshot:
+        snap = self._current()
+        if snap is not None:
+            return snap
+        version = self.version
+        return self._store(await db.run_sync(_load, version))
+
+    def bump(self) -> None:
+        with self._lock:
+            self.version += 1
+
+    def stats(self) -> dict:
+        return {"version": self.version, "hits": self.hits, "loads": self.loads}
+
+
+refdata = RefData(ttl=settings.REFDATA_TTL)
+
+
+def touch(db: Session) -> None:
+    """Shu sessiyada ma'lumotnoma o'zgardi — commit bo'lgach versiya oshadi."""
+    db.info[_INFO_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    if session.info.pop(_INFO_KEY, False):
+        refdata.bump()
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_INFO_KEY, None)
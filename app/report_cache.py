@@ -0,0 +1,132 @@
+# app/report_cache.py
+"""
+Monitoring / balans natijalari keshi.
+
+Kalit = (funksiya, normallashtirilgan filtrlar, avlodlar). Har yozuv bitta "doira"ga tegishli:
+do'kon filtri bo'lsa ("shop", id), faqat tuman bo'lsa ("district", id), aks holda ("all",).
+Do'konga yozish (yetkazish, tranzaksiya) commit bo'lgach o'sha do'kon, uning tumani va "all"
+avlodini oshiradi — eski kalitlar endi topilmaydi va LRU/TTL bilan chiqib ketadi.
+("*",) avlodi har kalitda bor: do'kon/tumanga bog'lanmagan yozuv hammasini eskirtiradi.
+
+Avlodlar so'rovdan OLDIN o'qiladi: so'rov paytida commit bo'lgan yozuv natijani eski
+avlod bilan saqlatadi, ya'ni eskirgan natija hech qachon yangi kalit ostiga tushmaydi.
+
+Bir jarayon ichida ishlaydi. Boshqa jarayon (manage buyruqlari, bir nechta uvicorn worker)
+yozuvlarini ko'rmaydi — ular uchun REPORT_CACHE_TTL chegarasi.
+"""
+import asyncio
+import threading
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from . import models
+from .cache import TTLCache
+from .settings import settings
+
+_MISSING = object()
+_INFO_KEY = "report_cache_scopes"
+GLOBAL = ("all",)
+EVERYTHING = ("*",)
+
+
+def scope_of(params: dict) -> tuple:
+    if params.get("shop_id"):
+        return ("shop", params["shop_id"])
+    if params.get("district_id"):
+        return ("district", params["district_id"])
+    return GLOBAL
+
+
+class ReportCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.store = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._gens: dict[tuple, int] = {}
+        self._lock = threading.Lock()
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self.coalesced = 0
+        self.invalidations = 0
+
+    def generations(self, params: dict) -> tuple[int, int]:
+        """Shu filtrlarga tegishli avlodlar: (EVERYTHING, doira)."""
+        scope = scope_of(params)
+        with self._lock:
+            return (self._gens.get(EVERYTHING, 0), self._gens.get(scope, 0))
+
+    def key(self, name: str, params: dict) -> tuple:
+        return (name, tuple(sorted(params.items())), self.generations(params))
+
+    def bump(self, scopes) -> None:
+        with self._lock:
+            for scope in scopes:
+                self._gens[scope] = self._gens.get(scope, 0) + 1
+            self.invalidations += 1
+
+    async def get_or_load(self, name: str, params: dict, load):
+        """
+        Keshdan yoki load() orqali. Bir xil kalit bo'yicha parallel miss'lar bitta so'rovga
+        birlashtiriladi: birinchisi yuklaydi, qolganlari uning natijasini kutadi.
+        """
+        key = self.key(name, params)
+        value = self.store.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.coalesced += 1
+            return await asyncio.shield(fut)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            value = await load()
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()  # kutuvchi bo'lmasa "never retrieved" ogohlantirishi chiqmasin
+            raise
+        except BaseException:
+            fut.cancel()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        self.store.set(key, value)
+        fut.set_result(value)
+        return value
+
+    def clear(self) -> None:
+        self.bump([EVERYTHING])
+        self.store.clear()
+
+    def stats(self) -> dict:
+        return {**self.store.stats(), "coalesced": self.coalesced, "invalidations": self.invalidations}
+
+
+report_cache = ReportCache(maxsize=settings.REPORT_CACHE_SIZE, ttl=settings.REPORT_CACHE_TTL)
+
+
+def touch(db: Session, shop_id: int | None = None, district_id: int | None = None) -> None:
+    """
+    Shu sessiyadagi yozuv hisobotlarga ta'sir qiladi: commit bo'lgach tegishli doiralar
+    invalidatsiya qilinadi (rollback bo'lsa — hech narsa). Argumentsiz — hammasi.
+    """
+    scopes = db.info.setdefault(_INFO_KEY, set())
+    scopes.add(GLOBAL)
+    if shop_id and not district_id:
+        shop = db.get(models.Shop, shop_id)
+        district_id = shop.district_id if shop else None
+    if shop_id:
+        scopes.add(("shop", shop_id))
+    if district_id:
+        scopes.add(("district", district_id))
+    if not shop_id and not district_id:
+        scopes.add(EVERYTHING)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    scopes = session.info.pop(_INFO_KEY, None)
+    if scopes:
+        report_cache.bump(scopes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_INFO_KEY, None)
@@ -1,15 +1,19 @@
 # app/routers/admin.py
-from fastapi import APIRouter, Depends, Request, Form, Path, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Form, Path, Query
 from fastapi.responses import RedirectResponse
 from sqlalchemy.orm import Session
-from ..database import get_db
-from .. import crud
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import engine, get_db, get_async_db
+from .. import crud, acrud, export, conditional, jobs, slowlog
 from .. import models
-from fastapi.templating import Jinja2Templates
-from ..security import admin_required  # ⬅️ Guard
-from datetime import datetime, timedelta
+from ..templating import templates
+from ..security import admin_required, user_cache  # ⬅️ Guard
+from ..report_cache import report_cache
+from ..refdata import refdata
+from ..settings import settings
+from datetime import date, datetime
+from sqlalchemy import func, select
 
-templates = Jinja2Templates(directory="templates")
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 # ——— Dashboard
@@ -36,30 +40,37 @@ def districts_post(
         crud.create_district(db, name)
     return RedirectResponse(url="/admin/districts", status_code=303)
 
-# ——— Shops (list + filter + pagination)
-@router.get("/shops")
+# ——— Shops (list + filter + keyset pagination)
+def _shops_fresh(request: Request, db: Session = Depends(get_db), user=Depends(admin_required)):
+    # do'konlar faqat crud orqali yoziladi — refdata digest ularni qamraydi
+    conditional.check(request, refdata.get(db).digest, user=user)
+
+
+@router.get("/shops", dependencies=[Depends(_shops_fresh)])
 def shops_get(
     request: Request,
     db: Session = Depends(get_db),
     user=Depends(admin_required),
-    page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
     district_id: int | None = Query(None),
+    after: str | None = Query(None, alias="next"),
+    before: str | None = Query(None, alias="prev"),
 ):
-    districts = crud.list_districts(db)
+    ref = refdata.get(db)
+    districts = ref.districts
     total = crud.count_shops(db, district_id=district_id)
-    shops = crud.list_shops_paginated(db, page=page, size=size, district_id=district_id)
-    total_pages = (total + size - 1) // size if total else 1
+    page = crud.shops_page(db, district_id=district_id, size=size, after=after, before=before)
     return templates.TemplateResponse(
         "admin/shops.html",
         {
             "request": request,
             "districts": districts,
-            "shops": shops,
+            "ref_digest": ref.digest,
+            "district_names": {d.id: d.name for d in districts},
+            "shops": page.items,
             "page": page,
             "size": size,
             "total": total,
-            "total_pages": total_pages,
             "district_id": district_id,
             "user": user,
         },
@@ -137,13 +148,26 @@ def products_update_active(
 
 
 @router.get("/stock")
-def stock_get(request: Request, db: Session = Depends(get_db), user=Depends(admin_required)):
-    products = crud.list_products(db, only_active=True)
-    balances = {p.id: crud.stock_balance_for_product(db, p.id) for p in products}
+async def stock_get(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(admin_required),
+    as_of: str | None = Query(None),   # "YYYY-MM-DD" — shu kun oxiridagi qoldiq
+):
+    as_of_dt = None
+    if as_of:
+        try:
+            as_of_dt = datetime.combine(datetime.fromisoformat(as_of).date(), datetime.max.time())
+        except ValueError:
+            as_of_dt = None
+    rows = await acrud.stock_balances_all(db, as_of=as_of_dt)
+    products = [p for p, _ in rows]
+    balances = {p.id: qty for p, qty in rows}
     return templates.TemplateResponse("admin/stock.html", {
         "request": request,
         "products": products,
         "balances": balances,
+        "as_of": as_of if as_of_dt else None,
         "user": user,
     })
 
@@ -164,31 +188,76 @@ def stock_kirim(
     crud.add_kirim(db, product_id=product_id, qty_kg=qty, note=note.strip() or None)
     return RedirectResponse(url="/admin/stock", status_code=303)
 
-@router.get("/monitor")
-def admin_monitor(
+def _monitor_as_job(days: int, custom: bool, district_id: int | None, shop_id: int | None) -> bool:
+    """Uzun filtrsiz yoki ixtiyoriy oraliq — yig'indilar so'rov ichida emas, app.worker'da."""
+    if not settings.JOBS_ENABLED:
+        return False
+    return custom or (days > settings.REPORT_INLINE_DAYS and not district_id and not shop_id)
+
+
+async def _monitor_fresh(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(admin_required),
     district_id: int | None = Query(None),
     shop_id: int | None = Query(None),
-    days: int = Query(7, ge=1, le=90),
+    days: int = Query(7, ge=1, le=366),
+    date_from: date | None = Query(None, alias="from"),
+    date_to: date | None = Query(None, alias="to"),
 ):
-    # vaqt oraliği: oxirgi N kun (UTC naive)
-    end = datetime.now().replace(microsecond=0)
-    start = end - timedelta(days=days)
+    ref = await refdata.aget(db)
+    last_id = await db.scalar(select(func.max(models.Delivery.id)))
+    window, _ = export.monitor_window(days, date_from, date_to)
+    conditional.check(
+        request,
+        ref.digest,
+        window,
+        report_cache.generations({"district_id": district_id, "shop_id": shop_id}),
+        last_id,
+        conditional.ttl_bucket(),
+        user=user,
+    )
 
-    districts = crud.list_districts(db)
-    shops = []
-    if district_id:
-        shops = crud.list_shops_by_district(db, district_id)
 
-    by_shop = crud.deliveries_agg_by_shop(db, start, end, district_id, shop_id)
-    by_pay = crud.deliveries_agg_paykind(db, start, end, district_id, shop_id)
-    last_rows = crud.deliveries_list_with_details(db, start, end, district_id, shop_id, limit=200)
+@router.get("/monitor", dependencies=[Depends(_monitor_fresh)])
+async def admin_monitor(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(admin_required),
+    district_id: int | None = Query(None),
+    shop_id: int | None = Query(None),
+    days: int = Query(7, ge=1, le=366),
+    date_from: date | None = Query(None, alias="from"),
+    date_to: date | None = Query(None, alias="to"),
+    after: str | None = Query(None, alias="next"),
+    before: str | None = Query(None, alias="prev"),
+):
+    # vaqt oraliği: oxirgi N kalendar kun, bugun bilan (rollup kun aniqligida) yoki from/to
+    (start, end), custom = export.monitor_window(days, date_from, date_to)
+
+    ref = await refdata.aget(db)
+    districts = ref.districts
+    shops = ref.shops_in(district_id) if district_id else ()
 
-    by_product_in_shop = []
-    if shop_id:
-        by_product_in_shop = crud.deliveries_agg_by_product_in_shop(db, start, end, shop_id)
+    job = None
+    if _monitor_as_job(days, custom, district_id, shop_id):
+        # yig'indilar — fon ishida; oxirgi Delivery.id o'zgarsa yangi ish, aks holda tayyor natija
+        last_id = await db.scalar(select(func.max(models.Delivery.id)))
+        params = {"start": start, "end": end, "district_id": district_id, "shop_id": shop_id}
+        job = await db.run_sync(jobs.submit, "monitor", params, last_id)
+        data = jobs.result(job)
+        if job.status != "done":
+            conditional.skip(request)   # tayyor bo'lgach shu URL to'liq javob beradi
+        by_shop, by_pay, by_product_in_shop = (
+            jobs.rows(data, "by_shop"), jobs.rows(data, "by_pay"), jobs.rows(data, "by_product_in_shop"))
+    else:
+        by_shop = await acrud.deliveries_agg_by_shop(db, start, end, district_id, shop_id)
+        by_pay = await acrud.deliveries_agg_paykind(db, start, end, district_id, shop_id)
+        by_product_in_shop = []
+        if shop_id:
+            by_product_in_shop = await acrud.deliveries_agg_by_product_in_shop(db, start, end, shop_id)
+    rows_page = await acrud.deliveries_page(db, start, end, district_id, shop_id,
+                                            size=50, after=after, before=before)
 
     # umumiy kartalar uchun yig'indilar
     total_cnt = sum(r.cnt for r in by_shop)
@@ -200,13 +269,17 @@ def admin_monitor(
         "user": user,
         "districts": districts,
         "shops": shops,
+        "ref_digest": ref.digest,
         "district_id": district_id,
         "shop_id": shop_id,
         "days": days,
+        "date_from": date_from, "date_to": date_to,
         "start": start, "end": end,
+        "job": job,
         "by_shop": by_shop,
         "by_pay": by_pay,
-        "last_rows": last_rows,
+        "last_rows": rows_page.items,
+        "rows_page": rows_page,
         "by_product_in_shop": by_product_in_shop,
         "total_cnt": total_cnt,
         "total_qty": total_qty,
@@ -231,20 +304,59 @@ def products_delete(
 
 
 # ——— Balanslar ro'yxati
-@router.get("/balances")
-def balances_get(
+async def _balances_fresh(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(admin_required),
     district_id: int | None = Query(None),
 ):
-    items = crud.list_balances(db, district_id=district_id)
-    districts = crud.list_districts(db)
+    ref = await refdata.aget(db)
+    gens = report_cache.generations({"district_id": district_id})
+    conditional.check(request, ref.digest, gens, conditional.ttl_bucket(), user=user)
+
+
+@router.get("/balances", dependencies=[Depends(_balances_fresh)])
+async def balances_get(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(admin_required),
+    district_id: int | None = Query(None),
+):
+    items = await acrud.list_balances(db, district_id=district_id)
+    ref = await refdata.aget(db)
     return templates.TemplateResponse(
         "admin/balances.html",
-        {"request": request, "items": items, "districts": districts, "district_id": district_id}
+        {"request": request, "items": items, "districts": ref.districts, "ref_digest": ref.digest,
+         "district_id": district_id}
     )
 
+# ——— Fon hisobotlari holati (monitor sahifasi shu yerdan so'raydi)
+@router.get("/jobs/{job_id}")
+def job_status(job_id: int = Path(...), db: Session = Depends(get_db), user=Depends(admin_required)):
+    row = db.get(models.ReportJob, job_id)
+    if row is None:
+        raise HTTPException(status_code=404)
+    return jobs.as_dict(row)
+
+# ——— Sekin SQL so'rovlar (rejalar sahifa ochilganda, har shakl uchun bir marta olinadi)
+@router.get("/slow-queries")
+def slow_queries_get(request: Request, user=Depends(admin_required)):
+    shapes, recent = slowlog.snapshot(engine)
+    return templates.TemplateResponse("admin/slow_queries.html", {
+        "request": request, "user": user, "shapes": shapes, "recent": recent,
+        "threshold": settings.SLOW_QUERY_MS,
+    })
+
+@router.post("/slow-queries/reset")
+def slow_queries_reset(user=Depends(admin_required)):
+    slowlog.reset()
+    return RedirectResponse(url="/admin/slow-queries", status_code=303)
+
+# ——— Kesh statistikasi (hit-rate, birlashtirilgan miss'lar)
+@router.get("/cache/stats")
+def cache_stats(user=Depends(admin_required)):
+    return {"reports": report_cache.stats(), "users": user_cache.stats(), "refdata": refdata.stats()}
+
 # ——— Shop bo'yicha tranzaksiyalar
 @router.get("/shops/{shop_id}/tx")
 def shop_txs_get(
@@ -252,15 +364,17 @@ def shop_txs_get(
     shop_id: int = Path(...),
     db: Session = Depends(get_db),
     user=Depends(admin_required),
+    after: str | None = Query(None, alias="next"),
+    before: str | None = Query(None, alias="prev"),
 ):
     shop = db.get(models.Shop, shop_id)
     if not shop:
         return RedirectResponse(url="/admin/shops", status_code=303)
-    txs = crud.list_shop_txs(db, shop_id=shop_id, limit=500)
+    page = crud.shop_txs_page(db, shop_id=shop_id, size=50, after=after, before=before)
     balance = crud.shop_balance(db, shop_id=shop_id)
     return templates.TemplateResponse(
         "admin/shop_txs.html",
-        {"request": request, "shop": shop, "txs": txs, "balance": balance}
+        {"request": request, "shop": shop, "txs": page.items, "page": page, "balance": balance}
     )
 
 @router.post("/shops/{shop_id}/tx/sale")
@@ -0,0 +1,91 @@
+# app/routers/api.py
+"""
+Diler oqimi uchun JSON API (Telegram WebApp mijozi). HTML oqim bilan bir xil crud/services qatlami.
+
+Mijoz tuman/do'kon ro'yxatini bir marta oladi (ETag bilan qayta tekshiradi), mahsulotlar
+qoldiq bilan alohida so'raladi, yetkazish — kichik JSON POST. Xato — {"detail": "..."}, butun sahifa emas.
+
+response_model'lar hujjat (OpenAPI) uchun; javoblar pydantic'siz yig'iladi — ma'lumotnoma ro'yxatlari
+snapshot digest'i bo'yicha tayyor JSON bayt sifatida keshlanadi.
+"""
+import json
+from dataclasses import asdict
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..cache import TTLCache
+from ..database import get_async_db
+from .. import acrud, conditional, crud, services
+from ..refdata import refdata
+from ..schemas import DeliveryIn, DeliveryOut, DistrictOut, ProductOut, ShopOut
+from ..security import dealer_required
+from ..settings import settings
+
+router = APIRouter(prefix="/api/v1", tags=["api"], dependencies=[Depends(dealer_required)])
+
+# (digest, nom) -> JSON bayt
+_encoded = TTLCache(maxsize=settings.FRAGMENT_CACHE_SIZE, ttl=settings.REFDATA_TTL)
+
+
+def _json_list(key: tuple, rows) -> Response:
+    body = _encoded.get(key)
+    if body is None:
+        body = json.dumps([asdict(r) for r in rows], ensure_ascii=False, separators=(",", ":")).encode()
+        _encoded.set(key, body)
+    return Response(body, media_type="application/json")
+
+
+@router.get("/districts", response_model=list[DistrictOut])
+async def api_districts(request: Request, db: AsyncSession = Depends(get_async_db)):
+    ref = await refdata.aget(db)
+    conditional.check(request, ref.digest)
+    return _json_list((ref.digest, "districts"), ref.districts)
+
+
+@router.get("/districts/{district_id}/shops", response_model=list[ShopOut])
+async def api_shops(district_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    ref = await refdata.aget(db)
+    conditional.check(request, ref.digest)
+    return _json_list((ref.digest, "shops", district_id), ref.shops_in(district_id))
+
+
+# qoldiq har yetkazishda o'zgaradi — ETag yo'q
+@router.get("/products", response_model=list[ProductOut])
+async def api_products(db: AsyncSession = Depends(get_async_db)):
+    products = (await refdata.aget(db)).products(only_active=True)
+    stock = await acrud.stock_balances_for(db, [p.id for p in products])
+    return JSONResponse([
+        {"id": p.id, "name": p.name, "price_per_kg": p.price_per_kg, "stock_kg": stock[p.id]}
+        for p in products
+    ])
+
+
+def _deliver(db: Session, **kw) -> tuple:
+    """Yetkazish va yangi qoldiq — bitta run_sync (alohida navbat kutilmasin)."""
+    delivery = services.deliver(db, **kw)
+    return delivery, crud.stock_balance_for_product(db, delivery.product_id)
+
+
+@router.post("/deliveries", response_model=DeliveryOut, status_code=201)
+async def api_deliver(body: DeliveryIn, db: AsyncSession = Depends(get_async_db)):
+    # mahsulot, do'kon va narx — services.deliver ichida, yozish tranzaksiyasida tekshiriladi
+    try:
+        delivery, stock = await db.run_sync(
+            _deliver,
+            district_id=body.district_id,
+            shop_id=body.shop_id,
+            product_id=body.product_id,
+            qty_kg=body.qty_kg,
+            pay_kind=body.pay_kind,
+        )
+    except services.NotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except services.DeliveryError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return JSONResponse({
+        "id": delivery.id, "shop_id": delivery.shop_id, "product_id": delivery.product_id,
+        "qty_kg": delivery.qty_kg, "unit_price": delivery.unit_price, "total": delivery.total,
+        "pay_kind": delivery.pay_kind, "created_at": delivery.created_at.isoformat(), "stock_kg": stock,
+    }, status_code=201)
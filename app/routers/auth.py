@@ -1,45 +1,41 @@
 # app/routers/auth.py
 from fastapi import APIRouter, Depends, Request, Response, Query
 from fastapi.responses import RedirectResponse, PlainTextResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from os import getenv
-import hmac, hashlib
-from ..database import get_db
+import hmac
+from ..database import get_async_db
 from ..models import User, Role
-from ..security import set_session_cookie, clear_session_cookie
+from ..security import set_session_cookie, clear_session_cookie, tg_signature, magic_link
 from ..settings import settings
 
-APP_SECRET = settings.APP_SECRET.encode()
 ADMIN_TG_IDS = set([x.strip() for x in settings.ADMIN_TG_IDS.split(",") if x.strip()])
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
-def _sig_for_tg(tg_id: str) -> str:
-    return hmac.new(APP_SECRET, tg_id.encode(), hashlib.sha256).hexdigest()
-
-
 @router.get("/magic")
-def magic_login(
+async def magic_login(
         tg_id: str = Query(...),
         sig: str = Query(...),
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
 ):
     # 1) imzoni tekshirish
-    good = _sig_for_tg(tg_id)
+    good = tg_signature(tg_id)
     if not hmac.compare_digest(good, sig):
         return PlainTextResponse("Noto'g'ri imzo", status_code=401)
 
     # 2) mavjud user bormi?
-    user = db.query(User).filter(User.tg_id == tg_id).first()
+    user = (await db.execute(select(User).where(User.tg_id == tg_id))).scalars().first()
 
     # 3) Agar yo'q bo'lsa, yangi yaratamiz: admin bo'lsa ro'yxatdan
     if not user:
         role = Role.admin if tg_id in ADMIN_TG_IDS else Role.dealer
         user = User(tg_id=tg_id, role=role)
-        db.add(user);
-        db.commit();
-        db.refresh(user)
+        db.add(user)
+        await db.commit()
+        await db.refresh(user)
 
     # 4) Rolga qarab to'g'ri sahifaga yo'naltiramiz
     if user.role == Role.admin:
@@ -62,5 +58,4 @@ def logout():
 # (ixtiyoriy) Admin uchun link generator – ko'rsatish uchun
 @router.get("/make-link")
 def make_link(tg_id: str):
-    sig = _sig_for_tg(tg_id)
-    return {"tg_id": tg_id, "link": f"/auth/magic?tg_id={tg_id}&sig={sig}"}
\ No newline at end of file
+    return {"tg_id": tg_id, "link": magic_link(tg_id)}
@@ -1,66 +1,73 @@
 # app/routers/dealer.py
 from fastapi import APIRouter, Depends, Request, Form, Query
-from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
-from ..database import get_db
-from .. import crud, models
-from fastapi.templating import Jinja2Templates
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_async_db
+from .. import acrud, conditional, services
+from ..refdata import refdata
+from ..templating import templates
 from ..security import dealer_required
 
-templates = Jinja2Templates(directory="templates")
 router = APIRouter(prefix="/dealer", tags=["dealer"])
 
 
-@router.get("/start")
-def dealer_start(
+async def _ref_fresh(request: Request, db: AsyncSession = Depends(get_async_db), user=Depends(dealer_required)):
+    # tanlash sahifalari faqat ma'lumotnomaga (tuman/do'kon/mahsulot) tayanadi
+    ref = await refdata.aget(db)
+    conditional.check(request, ref.digest, user=user)
+
+
+@router.get("/start", dependencies=[Depends(_ref_fresh)])
+async def dealer_start(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(dealer_required),
 ):
-    districts = crud.list_districts(db)
+    ref = await refdata.aget(db)
     return templates.TemplateResponse(
         "dealer/select_district.html",
-        {"request": request, "districts": districts, "user": user},
+        {"request": request, "districts": ref.districts, "ref_digest": ref.digest, "user": user},
     )
 
 
-@router.get("/shops")
-def dealer_shops(
+@router.get("/shops", dependencies=[Depends(_ref_fresh)])
+async def dealer_shops(
     request: Request,
     district_id: int = Query(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(dealer_required),
 ):
-    shops = crud.list_shops_by_district(db, district_id)
+    ref = await refdata.aget(db)
     return templates.TemplateResponse(
         "dealer/select_shop.html",
-        {"request": request, "shops": shops, "district_id": district_id, "user": user},
+        {"request": request, "shops": ref.shops_in(district_id), "ref_digest": ref.digest,
+         "district_id": district_id, "user": user},
     )
 
 
-@router.get("/deliver")
-def deliver_get(
+@router.get("/deliver", dependencies=[Depends(_ref_fresh)])
+async def deliver_get(
     request: Request,
     district_id: int,
     shop_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(dealer_required),
 ):
-    products = crud.list_products(db, only_active=True)
+    ref = await refdata.aget(db)
     return templates.TemplateResponse(
         "dealer/deliver.html",
         {
             "request": request,
             "district_id": district_id,
             "shop_id": shop_id,
-            "products": products,
+            "products": ref.products(only_active=True),
+            "ref_digest": ref.digest,
             "user": user,
         },
     )
 
 
 @router.post("/deliver")
-def deliver_post(
+async def deliver_post(
     request: Request,
     district_id: int = Form(...),
     shop_id: int = Form(...),
@@ -68,30 +75,25 @@ def deliver_post(
     qty_kg: str = Form(...),
     unit_price_override: str = Form(""),   # hozir ishlatmaymiz, lekin parametr qoldirdik
     pay_kind: str = Form("naqd"),         # "naqd" | "terminal" | "qarz"
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(dealer_required),
 ):
-    # ——— Miqdorni floatga o'tkazish
+    qty = services.parse_qty(qty_kg)
+
+    # ——— Delivery + ombor chiqimi + do'kon balansi — bitta tranzaksiyada; narx bazadan, snapshot'dan emas
     try:
-        qty = float((qty_kg or "0").replace(",", ".").strip())
-    except ValueError:
-        qty = 0.0
-
-    product = db.get(models.Product, product_id)
-    if product is None:
-        return RedirectResponse(url="/dealer/start", status_code=303)
-
-    # ——— Ombor qoldig'ini tekshirish
-    balance = crud.stock_balance_for_product(db, product_id)
-    if qty <= 0:
-        error = "Miqdor > 0 bo'lishi kerak."
-    elif qty > balance + 1e-9:
-        error = f"Omborda yetarli qoldiq yo'q. Qoldiq: {balance:.3f} kg"
-    else:
-        error = None
-
-    if error:
-        products = crud.list_products(db, only_active=True)
+        delivery = await acrud.deliver(
+            db,
+            district_id=district_id,
+            shop_id=shop_id,
+            product_id=product_id,
+            qty_kg=qty,
+            pay_kind=pay_kind,
+            unit_price_override=unit_price_override,
+        )
+    except services.DeliveryError as e:
+        ref = await refdata.aget(db)
+        products = ref.products(only_active=True)
         return templates.TemplateResponse(
             "dealer/deliver.html",
             {
@@ -99,84 +101,80 @@ def deliver_post(
                 "district_id": district_id,
                 "shop_id": shop_id,
                 "products": products,
-                "error": error,
+                "ref_digest": ref.digest,
+                "error": str(e),
                 "user": user,
             },
         )
 
-    # ——— Narxni aniqlash
-    # Dealer narxga aralashmasin: asosan product.price_per_kg ishlatamiz
-    unit_price = product.price_per_kg
-    if unit_price is None:
-        txt = (unit_price_override or "").replace(",", ".").strip()
-        unit_price = float(txt) if txt else 0.0
+    return templates.TemplateResponse(
+        "dealer/success.html",
+        {
+            "request": request,
+            "delivery": delivery,
+            "product": delivery.product,
+            "user": user,
+            "total_sum": delivery.total,
+            "pay_kind": pay_kind,
+        },
+    )
+
+
+# ——— Savat: bitta do'konga bir nechta mahsulot, bitta so'rovda
+@router.get("/cart")
+async def cart_get(
+    request: Request,
+    district_id: int,
+    shop_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(dealer_required),
+):
+    return templates.TemplateResponse(
+        "dealer/cart.html",
+        {
+            "request": request,
+            "district_id": district_id,
+            "shop_id": shop_id,
+            "rows": await acrud.stock_balances_all(db),
+            "user": user,
+        },
+    )
 
-    if unit_price <= 0:
-        products = crud.list_products(db, only_active=True)
+
+@router.post("/cart")
+async def cart_post(
+    request: Request,
+    district_id: int = Form(...),
+    shop_id: int = Form(...),
+    pay_kind: str = Form("naqd"),
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(dealer_required),
+):
+    # miqdor maydonlari qty_<product_id>: disabled (narxsiz) maydon yuborilmaydi — juftlik siljimasin
+    form = await request.form()
+    entered = {int(k[4:]): str(v) for k, v in form.items() if k.startswith("qty_") and k[4:].isdigit()}
+    # bo'sh qoldirilgan qatorlar — o'tkazib yuboriladi
+    items = [(pid, services.parse_qty(q)) for pid, q in entered.items() if q.strip()]
+    try:
+        doc = await acrud.deliver_cart(
+            db, district_id=district_id, shop_id=shop_id, items=items, pay_kind=pay_kind,
+        )
+    except services.DeliveryError as e:
         return templates.TemplateResponse(
-            "dealer/deliver.html",
+            "dealer/cart.html",
             {
                 "request": request,
                 "district_id": district_id,
                 "shop_id": shop_id,
-                "products": products,
-                "error": "Narx > 0 bo'lishi kerak.",
+                "rows": await acrud.stock_balances_all(db),
+                "entered": entered,
+                "pay_kind": pay_kind,
+                "error": str(e),
                 "user": user,
             },
         )
 
-    # ——— Delivery yozuvi
-    delivery = crud.create_delivery(
-        db,
-        district_id=district_id,
-        shop_id=shop_id,
-        product_id=product_id,
-        qty_kg=qty,
-        unit_price=unit_price,
-        pay_kind=pay_kind,
-    )
-
-    # ——— Ombordan chiqimni qayd etamiz (ledger)
-    crud.add_chiqim(
-        db,
-        product_id=product_id,
-        qty_kg=qty,
-        shop_id=shop_id,
-        note=f"Delivery #{delivery.id}",
-    )
-
-    # --- YANGI QISM: do'kon balansi uchun tranzaksiya yozish ---
-    total_sum = qty * unit_price
-
-    # Siz aytgandek:
-    #  - Naqd / Terminal => balansga + (payment)
-    #  - Qarz           => balansdan - (sale)
-    if pay_kind in ("naqd", "terminal"):
-        crud.add_shop_tx(
-            db,
-            shop_id=shop_id,
-            kind=models.TxKind.payment,
-            amount=total_sum,
-            note=f"Delivery #{delivery.id} ({pay_kind})",
-        )
-    elif pay_kind == "qarz":
-        crud.add_shop_tx(
-            db,
-            shop_id=shop_id,
-            kind=models.TxKind.sale,
-            amount=total_sum,
-            note=f"Delivery #{delivery.id} (qarz)",
-        )
-    # --- YANGI QISM TUGADI ---
-
     return templates.TemplateResponse(
-        "dealer/success.html",
-        {
-            "request": request,
-            "delivery": delivery,
-            "product": product,
-            "user": user,
-            "total_sum": total_sum,
-            "pay_kind": pay_kind,
-        },
+        "dealer/cart_success.html",
+        {"request": request, "doc": doc, "user": user},
     )
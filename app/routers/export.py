@@ -0,0 +1,71 @@
+# app/routers/export.py
+from datetime import date
+from fastapi import APIRouter, Depends, Path, Query
+from fastapi.responses import StreamingResponse
+from ..database import SessionLocal
+from ..security import admin_required
+from .. import export
+
+router = APIRouter(prefix="/admin/export", tags=["export"])
+
+MONTH = r"^\d{4}-(0[1-9]|1[0-2])$"   # YYYY-MM, oy 01..12 (aks holda strptime 500 beradi)
+
+
+def _csv_response(stmt, header, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        export.stream_csv(SessionLocal, stmt, header),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def _period(start, end) -> str:
+    return f"{start:%Y-%m-%d}_{end:%Y-%m-%d}"
+
+
+# ——— Yetkazishlar (/admin/monitor filtrlari bilan, from/to ham; month=YYYY-MM — butun oy)
+@router.get("/deliveries.csv")
+def export_deliveries(
+    user=Depends(admin_required),
+    district_id: int | None = Query(None),
+    shop_id: int | None = Query(None),
+    days: int = Query(7, ge=1, le=366),
+    date_from: date | None = Query(None, alias="from"),
+    date_to: date | None = Query(None, alias="to"),
+    month: str | None = Query(None, pattern=MONTH),
+):
+    if month:
+        start, end = export.report_window(days, month)
+    else:
+        (start, end), _ = export.monitor_window(days, date_from, date_to)
+    stmt = export.deliveries_stmt(start, end, district_id, shop_id)
+    return _csv_response(stmt, export.DELIVERY_HEADER, f"deliveries_{_period(start, end)}.csv")
+
+
+# ——— Ombor harakatlari
+@router.get("/stock-moves.csv")
+def export_stock_moves(
+    user=Depends(admin_required),
+    product_id: int | None = Query(None),
+    shop_id: int | None = Query(None),
+    days: int = Query(7, ge=1, le=366),
+    month: str | None = Query(None, pattern=MONTH),
+):
+    start, end = export.report_window(days, month)
+    stmt = export.stock_moves_stmt(start, end, product_id, shop_id)
+    return _csv_response(stmt, export.STOCK_MOVE_HEADER, f"stock_moves_{_period(start, end)}.csv")
+
+
+# ——— Do'kon tranzaksiyalari (butun tarix yoki month=YYYY-MM)
+@router.get("/shops/{shop_id}/tx.csv")
+def export_shop_txs(
+    shop_id: int = Path(...),
+    user=Depends(admin_required),
+    month: str | None = Query(None, pattern=MONTH),
+):
+    start = end = None
+    name = f"shop_{shop_id}_tx.csv"
+    if month:
+        start, end = export.report_window(0, month)
+        name = f"shop_{shop_id}_tx_{month}.csv"
+    return _csv_response(export.shop_txs_stmt(shop_id, start, end), export.SHOP_TX_HEADER, name)
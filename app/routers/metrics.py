@@ -0,0 +1,17 @@
+# app/routers/metrics.py
+"""Prometheus scrape nuqtasi. METRICS_TOKEN berilsa — Bearer token bilan."""
+import hmac
+from fastapi import APIRouter, HTTPException, Request, Response
+from .. import metrics
+from ..settings import settings
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics_get(request: Request):
+    if settings.METRICS_TOKEN:
+        got = request.headers.get("authorization", "")
+        if not hmac.compare_digest(got, f"Bearer {settings.METRICS_TOKEN}"):
+            raise HTTPException(status_code=401)
+    return Response(metrics.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,10 +1,9 @@
 # app/routers/panel.py
 from fastapi import APIRouter, Depends, Request
-from fastapi.templating import Jinja2Templates
+from ..templating import templates
 from ..security import current_user_required
 from ..models import Role
 
-templates = Jinja2Templates(directory="templates")
 router = APIRouter(prefix="/panel", tags=["panel"])
 
 @router.get("/")
@@ -0,0 +1,26 @@
+# app/routers/telegram.py
+"""
+Telegram webhook. Update faqat navbatga qo'yiladi — ishlash bot.runtime worker'larida
+(app.state.bot). Bot yoqilmagan bo'lsa (BOT_TOKEN/BOT_FAKE yo'q) — 404.
+BOT_WEBHOOK_SECRET majburiy: bo'sh bo'lsa bot ishga tushmaydi, webhook esa har doim 403 qaytaradi
+(aks holda istalgan kishi admin nomidan soxta /start yuborib magic link olishi mumkin).
+"""
+import hmac
+from fastapi import APIRouter, HTTPException, Request, Response
+from ..settings import settings
+
+router = APIRouter(tags=["telegram"])
+
+
+@router.post(settings.BOT_WEBHOOK_PATH, include_in_schema=False)
+async def telegram_webhook(request: Request):
+    runtime = getattr(request.app.state, "bot", None)
+    if runtime is None:
+        raise HTTPException(status_code=404)
+    got = request.headers.get("x-telegram-bot-api-secret-token", "")
+    if not settings.BOT_WEBHOOK_SECRET or not hmac.compare_digest(got, settings.BOT_WEBHOOK_SECRET):
+        raise HTTPException(status_code=403)
+    if not runtime.feed(await request.json()):
+        # navbat to'la — Telegram keyinroq qayta yuboradi
+        return Response(status_code=503)
+    return Response(status_code=200)
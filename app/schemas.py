@@ -0,0 +1,45 @@
+# app/schemas.py
+"""JSON API (/api/v1) so'rov va javob modellari (javob modellari — OpenAPI hujjati uchun)."""
+from datetime import datetime
+from typing import Literal
+from pydantic import BaseModel, Field
+
+PayKind = Literal["naqd", "terminal", "qarz", "boshqa"]
+
+
+class DistrictOut(BaseModel):
+    id: int
+    name: str
+
+
+class ShopOut(BaseModel):
+    id: int
+    name: str
+    district_id: int
+
+
+class ProductOut(BaseModel):
+    id: int
+    name: str
+    price_per_kg: float | None
+    stock_kg: float
+
+
+class DeliveryIn(BaseModel):
+    district_id: int
+    shop_id: int
+    product_id: int
+    qty_kg: float = Field(gt=0)
+    pay_kind: PayKind = "naqd"
+
+
+class DeliveryOut(BaseModel):
+    id: int
+    shop_id: int
+    product_id: int
+    qty_kg: float
+    unit_price: float
+    total: float
+    pay_kind: str
+    created_at: datetime
+    stock_kg: float  # yetkazishdan keyingi ombor qoldig'i — mijoz ro'yxatni qayta so'ramasin
@@ -1,8 +1,12 @@
 # app/security.py
 import base64, json, hmac, hashlib, time
+from dataclasses import dataclass
 from fastapi import Depends, HTTPException, Request
-from sqlalchemy.orm import Session
-from .database import get_db
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+from .cache import TTLCache
+from .database import get_async_db
 from .models import User, Role
 from os import getenv
 from .settings import settings
@@ -40,6 +44,13 @@ def verify_token(token: str) -> dict:
     except Exception:
         raise HTTPException(status_code=401, detail="Sessiya noto‘g‘ri yoki eskirgan")
 
+def tg_signature(tg_id: str) -> str:
+    """/auth/magic havolasi imzosi (bot va /auth/make-link shu yerdan oladi)."""
+    return hmac.new(APP_SECRET, str(tg_id).encode(), hashlib.sha256).hexdigest()
+
+def magic_link(tg_id: str, base: str = "") -> str:
+    return f"{base}/auth/magic?tg_id={tg_id}&sig={tg_signature(tg_id)}"
+
 def set_session_cookie(response, user: User):
     token = sign_token({"user_id": user.id, "role": user.role.value})
     # prod’da secure=True (HTTPS)
@@ -48,21 +59,90 @@ def set_session_cookie(response, user: User):
 def clear_session_cookie(response):
     response.delete_cookie("session", path="/")
 
-def current_user_optional(request: Request, db: Session = Depends(get_db)) -> User | None:
+@dataclass(frozen=True)
+class SessionUser:
+    """Sessiyadagi foydalanuvchi: routerlar va shablonlar uchun yetarli maydonlar (ORM obyekti emas)."""
+    id: int
+    role: Role
+    full_name: str | None = None
+
+
+# user_id -> SessionUser. Har sahifada users jadvaliga borilmasin.
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+
+# tg_id -> SessionUser | None (bot: har update'da users jadvaliga borilmasin; "yo'q" ham keshlanadi)
+tg_user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+_MISSING = object()
+
+
+def invalidate_user(user_id: int, tg_id: str | None = None) -> None:
+    user_cache.pop(user_id)
+    if tg_id is not None:
+        tg_user_cache.pop(str(tg_id))
+
+
+_INFO_KEY = "changed_users"
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    # flush paytida faqat yig'amiz: keshdan commit'dan keyin chiqariladi (rollback'da — hech narsa)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_INFO_KEY, set()).add((target.id, target.tg_id))
+    else:
+        invalidate_user(target.id, target.tg_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    # ORM orqali user qo'shilsa, rol/ism o'zgarsa yoki o'chirilsa — keshdan chiqaramiz
+    for user_id, tg_id in session.info.pop(_INFO_KEY, ()):
+        invalidate_user(user_id, tg_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_INFO_KEY, None)
+
+
+async def user_by_tg_id(db: AsyncSession, tg_id: str) -> SessionUser | None:
+    tg_id = str(tg_id)
+    cached = tg_user_cache.get(tg_id, _MISSING)
+    if cached is not _MISSING:
+        return cached
+    user = (await db.execute(select(User).where(User.tg_id == tg_id))).scalar_one_or_none()
+    cached = SessionUser(id=user.id, role=user.role, full_name=user.full_name) if user else None
+    tg_user_cache.set(tg_id, cached)
+    return cached
+
+
+async def current_user_optional(request: Request, db: AsyncSession = Depends(get_async_db)) -> SessionUser | None:
     token = request.cookies.get("session")
     if not token:
         return None
     data = verify_token(token)
-    user = db.get(User, data["user_id"])
-    return user
+    user_id = data["user_id"]
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+    user = await db.get(User, user_id)
+    if user is None:
+        return None
+    cached = SessionUser(id=user.id, role=user.role, full_name=user.full_name)
+    user_cache.set(user_id, cached)
+    return cached
 
-def current_user_required(user: User | None = Depends(current_user_optional)) -> User:
+def current_user_required(user: SessionUser | None = Depends(current_user_optional)) -> SessionUser:
     if not user:
         raise HTTPException(status_code=401, detail="Login talab qilinadi")
     return user
 
 def role_required(role: Role):
-    def dep(user: User = Depends(current_user_required)):
+    def dep(user: SessionUser = Depends(current_user_required)):
         if user.role != role:
             raise HTTPException(status_code=403, detail="Ruxsat yo‘q")
         return user
@@ -0,0 +1,282 @@
+# app/services.py
+"""
+Bir nechta ledger'ga tegadigan yozish operatsiyalari — bitta tranzaksiya, bitta commit.
+"""
+from datetime import datetime
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from . import crud, models, outbox
+from .report_cache import touch as touch_reports
+
+
+class DeliveryError(Exception):
+    """Yetkazishni saqlab bo'lmaydi (miqdor, qoldiq yoki narx xato). Matn foydalanuvchiga ko'rsatiladi."""
+
+
+class NotFoundError(DeliveryError):
+    """Mahsulot yoki do'kon bazada yo'q (mahsulot — faol emas, do'kon — boshqa tumanda)."""
+
+
+def parse_qty(txt: str | None) -> float:
+    try:
+        return float((txt or "0").replace(",", ".").strip())
+    except ValueError:
+        return 0.0
+
+
+def resolve_unit_price(product: models.Product, unit_price_override: str | None) -> float:
+    # Dealer narxga aralashmasin: asosan product.price_per_kg ishlatamiz
+    if product.price_per_kg is not None:
+        return product.price_per_kg
+    txt = (unit_price_override or "").replace(",", ".").strip()
+    try:
+        return float(txt) if txt else 0.0
+    except ValueError:
+        return 0.0
+
+
+def shop_tx_kind(pay_kind: str) -> models.TxKind | None:
+    """
+    Naqd / Terminal => balansga + (payment)
+    Qarz           => balansdan - (sale)
+    Boshqa         => balans tranzaksiyasi yozilmaydi
+    """
+    if pay_kind in ("naqd", "terminal"):
+        return models.TxKind.payment
+    if pay_kind == "qarz":
+        return models.TxKind.sale
+    return None
+
+
+def _shop(db: Session, district_id: int, shop_id: int) -> models.Shop:
+    """Do'kon shu tumanda bormi — yozish tranzaksiyasida bazadan (refdata snapshot'i eskirgan bo'lishi mumkin)."""
+    shop = db.get(models.Shop, shop_id, populate_existing=True)
+    if shop is None or shop.district_id != district_id:
+        raise NotFoundError("Do'kon topilmadi.")
+    return shop
+
+
+def deliver(
+    db: Session,
+    *,
+    district_id: int,
+    shop_id: int,
+    product_id: int,
+    qty_kg: float,
+    pay_kind: str,
+    unit_price_override: str | None = None,
+) -> models.Delivery:
+    """
+    Delivery + StockMove (chiqim) + ShopTransaction — bitta commit.
+    Mahsulot narxi va faolligi shu tranzaksiyada bazadan o'qiladi (refdata snapshot'i — faqat ko'rsatish uchun).
+    Xato bo'lsa DeliveryError, bazaga hech narsa yozilmaydi.
+    """
+    if qty_kg <= 0:
+        raise DeliveryError("Miqdor > 0 bo'lishi kerak.")
+    product = db.get(models.Product, product_id, populate_existing=True)
+    if product is None or not product.is_active:
+        raise NotFoundError("Mahsulot topilmadi.")
+    shop = _shop(db, district_id, shop_id)
+    unit_price = resolve_unit_price(product, unit_price_override)
+    balance = crud.stock_balance_for_product(db, product.id)
+    if qty_kg > balance + 1e-9:
+        raise DeliveryError(f"Omborda yetarli qoldiq yo'q. Qoldiq: {balance:.3f} kg")
+    if unit_price <= 0:
+        raise DeliveryError("Narx > 0 bo'lishi kerak.")
+
+    try:
+        delivery = crud.create_delivery(
+            db,
+            district_id=district_id,
+            shop_id=shop_id,
+            product_id=product.id,
+            qty_kg=qty_kg,
+            unit_price=unit_price,
+            pay_kind=pay_kind,
+            commit=False,
+        )
+        crud.add_chiqim(
+            db, product_id=product.id, qty_kg=qty_kg, shop_id=shop_id,
+            note=f"Delivery #{delivery.id}", commit=False,
+        )
+        # Yozish qulfi endi bizda — parallel yetkazish qoldiqni manfiyga tushirmaganini tekshiramiz
+        after = crud.stock_balance_for_product(db, product.id)
+        if after < -1e-9:
+            raise DeliveryError(f"Omborda yetarli qoldiq yo'q. Qoldiq: {balance:.3f} kg")
+
+        kind = shop_tx_kind(pay_kind)
+        if kind is not None:
+            note = f"Delivery #{delivery.id} ({pay_kind})"
+            crud.add_shop_tx(db, shop_id=shop_id, kind=kind, amount=delivery.total, note=note, commit=False)
+
+        # bildirishnomalar — shu tranzaksiyada outbox'ga (yuborish bot.notifier'da)
+        outbox.delivery_recorded(db, delivery, shop.name, product.name)
+        outbox.check_stock(db, product.name, after + qty_kg, after)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    db.refresh(delivery)
+    delivery.product   # shablon uchun (async sessiyada lazy load bo'lmasin)
+    return delivery
+
+
+def deliver_cart(
+    db: Session,
+    *,
+    district_id: int,
+    shop_id: int,
+    items: list[tuple[int, float]],
+    pay_kind: str,
+) -> models.DeliveryDoc:
+    """
+    Savat: bir do'konga N ta mahsulot. items: [(product_id, qty_kg), ...]
+    Qoldiqlar bitta guruhli so'rov bilan tekshiriladi; hujjat, qatorlar, chiqimlar va
+    bitta ShopTransaction — bitta commit.
+    """
+    qty_by_product: dict[int, float] = {}
+    for product_id, qty in items:
+        if qty <= 0:
+            raise DeliveryError("Miqdor > 0 bo'lishi kerak.")
+        qty_by_product[product_id] = qty_by_product.get(product_id, 0.0) + qty
+    if not qty_by_product:
+        raise DeliveryError("Kamida bitta mahsulot miqdorini kiriting.")
+    shop = _shop(db, district_id, shop_id)
+
+    ids = list(qty_by_product)
+    products = {
+        p.id: p for p in db.execute(select(models.Product).where(models.Product.id.in_(ids))).scalars()
+    }
+    balances = crud.stock_balances_for(db, ids)
+    errors = []
+    for pid, qty in qty_by_product.items():
+        p = products.get(pid)
+        if p is None or not p.is_active:
+            errors.append(f"Mahsulot #{pid} topilmadi.")
+        elif not p.price_per_kg or p.price_per_kg <= 0:
+            errors.append(f"{p.name}: narx belgilanmagan.")
+        elif qty > balances[pid] + 1e-9:
+            errors.append(f"{p.name}: omborda yetarli qoldiq yo'q. Qoldiq: {balances[pid]:.3f} kg")
+    if errors:
+        raise DeliveryError(" ".join(errors))
+
+    try:
+        doc = crud.create_delivery_doc(
+            db, district_id=district_id, shop_id=shop_id, pay_kind=pay_kind,
+            lines=[(pid, qty, products[pid].price_per_kg) for pid, qty in qty_by_product.items()],
+            commit=False,
+        )
+        crud.add_chiqim_many(db, shop_id=shop_id, items=list(qty_by_product.items()),
+                             note=f"Hujjat #{doc.id}", commit=False)
+        after = crud.stock_balances_for(db, ids)
+        short = [products[pid].name for pid in ids if after[pid] < -1e-9]
+        if short:
+            raise DeliveryError("Omborda yetarli qoldiq yo'q: " + ", ".join(short))
+
+        kind = shop_tx_kind(pay_kind)
+        if kind is not None:
+            crud.add_shop_tx(db, shop_id=shop_id, kind=kind, amount=doc.total,
+                             note=f"Hujjat #{doc.id} ({pay_kind})", commit=False)
+
+        outbox.doc_recorded(db, doc, shop.name, len(qty_by_product))
+        for pid in ids:
+            outbox.check_stock(db, products[pid].name, after[pid] + qty_by_product[pid], after[pid])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    db.refresh(doc)
+    # shablon uchun qatorlar va mahsulotlar shu yerda yuklanadi (async sessiyada lazy load bo'lmasin)
+    for line in doc.lines:
+        line.product
+    return doc
+
+
+class PeriodCloseError(Exception):
+    """Davrni yopib bo'lmaydi (chegara noto'g'ri)."""
+
+
+OPENING_NOTE = crud.OPENING_NOTE
+
+
+def close_period(db: Session, boundary: datetime) -> models.PeriodClose:
+    """
+    boundary'dan oldingi ledger qatorlarini arxivga ko'chiradi — bitta tranzaksiya:
+      - ombor: har mahsulot ochilish qoldig'i StockCheckpoint sifatida (taken_at = boundary),
+        stock_moves (id <= oxirgi davr harakati) -> stock_moves_archive;
+      - do'konlar: har do'kon uchun boundary vaqtli ochilish ShopTransaction'i,
+        shop_transactions (created_at < boundary) -> shop_transactions_archive;
+      - deliveries (created_at < boundary) -> deliveries_archive (rollup tegilmaydi).
+    stock_balances va shops.balance o'zgarmaydi: arxivga ketgan qatorlar ochilish qatori bilan almashadi.
+    """
+    from sqlalchemy import case
+    prev = crud.last_close(db)
+    if boundary > datetime.now():
+        raise PeriodCloseError("Kelajakdagi sanani yopib bo'lmaydi.")
+    if prev is not None and boundary <= prev.boundary:
+        raise PeriodCloseError(f"Davr allaqachon {prev.boundary:%Y-%m-%d} gacha yopilgan.")
+
+    sm = models.StockMove
+    st = models.ShopTransaction
+    d = models.Delivery
+    try:
+        # — ombor
+        upto = db.execute(select(func.max(sm.id)).where(sm.created_at < boundary)).scalar_one()
+        if upto is None and prev is not None:
+            upto = prev.stock_upto_move_id  # davrda harakat yo'q — oldingi ochilish ko'chiriladi
+        moves = 0
+        if upto is not None:
+            opening = crud.stock_openings(db)
+            for pid, delta in db.execute(
+                select(sm.product_id, func.sum(case((sm.kind == models.MoveKind.kirim, sm.qty_kg), else_=-sm.qty_kg)))
+                .where(sm.id <= upto)
+                .group_by(sm.product_id)
+            ).all():
+                opening[pid] = opening.get(pid, 0.0) + float(delta or 0.0)
+            db.add_all([
+                models.StockCheckpoint(product_id=pid, upto_move_id=upto, qty_kg=qty, taken_at=boundary)
+                for pid, qty in opening.items()
+            ])
+            moves = _archive_rows(db, sm, sm.id <= upto)
+
+        # — do'konlar
+        sums = db.execute(
+            select(st.shop_id, func.sum(case((st.kind == models.TxKind.payment, st.amount), else_=-st.amount)))
+            .where(st.created_at < boundary)
+            .group_by(st.shop_id)
+        ).all()
+        txs = _archive_rows(db, st, st.created_at < boundary)
+        db.add_all([
+            models.ShopTransaction(
+                shop_id=shop_id,
+                kind=models.TxKind.payment if total >= 0 else models.TxKind.sale,
+                amount=abs(total), note=f"{OPENING_NOTE} ({boundary:%Y-%m-%d})", created_at=boundary,
+            )
+            for shop_id, total in sums if abs(total or 0.0) > 1e-9
+        ])
+
+        # — yetkazishlar
+        deliveries = _archive_rows(db, d, d.created_at < boundary)
+
+        close = models.PeriodClose(
+            boundary=boundary, stock_upto_move_id=upto,
+            moves_archived=moves, txs_archived=txs, deliveries_archived=deliveries,
+        )
+        db.add(close)
+        touch_reports(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    db.refresh(close)
+    return close
+
+
+def _archive_rows(db: Session, model, where) -> int:
+    """model jadvalidan where'ga mos qatorlarni *_archive'ga ko'chiradi (INSERT ... SELECT + DELETE)."""
+    from sqlalchemy import delete, insert
+    table = model.__table__
+    archive = models.ARCHIVES[table.name]
+    cols = [c.name for c in table.columns]
+    db.execute(insert(archive).from_select(cols, select(*[table.c[c] for c in cols]).where(where)))
+    return db.execute(delete(table).where(where)).rowcount or 0
@@ -0,0 +1,127 @@
+# app/slowlog.py
+"""
+Sekin SQL so'rovlar jurnali (/admin/slow-queries).
+
+SLOW_QUERY_MS dan uzoq bajarilgan har so'rov cheklangan halqa buferga (SLOW_QUERY_LOG_SIZE)
+yoziladi: vaqt, davomiylik, parametrlar, qaysi HTTP so'rovdan (metrics.current().label).
+Bir xil SQL matni — bitta "shakl": shakllar bo'yicha soni / jami / eng uzun vaqt yig'iladi.
+
+So'rov rejasi (EXPLAIN QUERY PLAN) yozish paytida emas, sahifa ochilganda — har shakl uchun
+birinchi marta, o'sha parametrlar bilan — olinadi va keshlanadi: issiq yo'lga qo'shimcha so'rov yo'q.
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from sqlalchemy import event
+from . import metrics
+from .settings import settings
+
+MAX_PARAMS = 300
+
+
+@dataclass
+class SlowQuery:
+    at: datetime
+    ms: float
+    statement: str
+    params: str
+    source: str
+
+
+@dataclass
+class Shape:
+    statement: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    params: object = None          # birinchi uchragan parametrlar (EXPLAIN uchun)
+    executemany: bool = False
+    plan: list[str] | None = field(default=None)
+
+
+_lock = threading.Lock()
+entries: deque[SlowQuery] = deque(maxlen=settings.SLOW_QUERY_LOG_SIZE)
+shapes: dict[str, Shape] = {}
+
+
+def _before(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("slowlog_t0", []).append(time.perf_counter())
+
+
+def _after(conn, cursor, statement, parameters, context, executemany):
+    stack = conn.info.get("slowlog_t0")
+    if not stack:
+        return
+    ms = (time.perf_counter() - stack.pop()) * 1000
+    if ms < settings.SLOW_QUERY_MS:
+        return
+    stats = metrics.current()
+    source = stats.label if stats is not None else "fon"
+    with _lock:
+        shape = shapes.get(statement)
+        if shape is None:
+            if len(shapes) >= settings.SLOW_QUERY_LOG_SIZE:
+                victim = min(shapes.values(), key=lambda s: s.total_ms)
+                del shapes[victim.statement]
+            shape = shapes[statement] = Shape(statement, params=parameters, executemany=executemany)
+        shape.count += 1
+        shape.total_ms += ms
+        shape.max_ms = max(shape.max_ms, ms)
+        entries.append(SlowQuery(datetime.now(), ms, statement, repr(parameters)[:MAX_PARAMS], source))
+
+
+def _error(ctx):
+    # xatoda after_cursor_execute chaqirilmaydi — boshlanish vaqtini olib tashlaymiz
+    stack = ctx.connection.info.get("slowlog_t0") if ctx.connection is not None else None
+    if stack:
+        stack.pop()
+
+
+def install(engine) -> None:
+    """Sync engine yoki AsyncEngine.sync_engine. SLOW_QUERY_MS < 0 — o'chiq."""
+    if settings.SLOW_QUERY_MS < 0:
+        return
+    event.listen(engine, "before_cursor_execute", _before)
+    event.listen(engine, "after_cursor_execute", _after)
+    event.listen(engine, "handle_error", _error)
+
+
+def plan(engine, shape: Shape) -> list[str]:
+    """Shakl rejasi — bir marta olinadi (o'sha parametrlar bilan), keyin keshdan."""
+    if shape.plan is not None:
+        return shape.plan
+    if shape.executemany or not shape.statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        shape.plan = []
+        return shape.plan
+    explain = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.execute(explain + shape.statement, shape.params or ())
+        rows = cur.fetchall()
+        cur.close()
+        # SQLite: (id, parent, notused, detail); PostgreSQL: (QUERY PLAN,)
+        shape.plan = [str(r[-1]) for r in rows]
+    except Exception as e:
+        shape.plan = [f"reja olinmadi: {e!r}"]
+    finally:
+        raw.close()
+    return shape.plan
+
+
+def snapshot(engine) -> tuple[list[Shape], list[SlowQuery]]:
+    """Sahifa uchun: shakllar (jami vaqt bo'yicha) rejalari bilan va oxirgi yozuvlar (yangisi birinchi)."""
+    with _lock:
+        top = sorted(shapes.values(), key=lambda s: s.total_ms, reverse=True)
+        recent = list(reversed(entries))
+    for s in top:
+        plan(engine, s)
+    return top, recent
+
+
+def reset() -> None:
+    with _lock:
+        entries.clear()
+        shapes.clear()
@@ -0,0 +1,94 @@
+# app/templating.py
+"""
+Umumiy Jinja muhiti: barcha routerlar shu `templates` obyektidan foydalanadi.
+
+- precompile() — barcha shablonlarni ishga tushishda kompilyatsiya qiladi (birinchi so'rov kutmasin);
+  kompilyatsiya natijasi JINJA_BYTECODE_DIR'da saqlanadi — keyingi ishga tushish tezroq.
+- JINJA_AUTO_RELOAD=False — har renderda shablon fayllari stat() qilinmaydi
+  (ishlab chiqishda .env'da True qiling).
+- {% cache "nom", kalit... %} ... {% endcache %} — fragment keshi. Kalitga blok bog'liq bo'lgan
+  HAMMA qiymat kirishi kerak. Ma'lumotnoma ro'yxatlari uchun route snapshot mazmun xeshini
+  (ref_digest = ref.digest) uzatadi — versiya emas: versiya faqat shu jarayondagi commit'larda oshadi,
+  TTL qayta yuklash boshqa jarayon yozuvlarini olib kelsa ham o'zgarmaydi va eski fragment qolib ketadi.
+
+      {% cache "district-select", ref_digest, district_id %} ... {% endcache %}
+"""
+import os
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Undefined, nodes
+from jinja2.ext import Extension
+from .cache import TTLCache
+from .settings import settings
+
+TEMPLATE_DIR = "templates"
+
+
+class FragmentCacheExtension(Extension):
+    """
+    {% cache "nom", a, b %}...{% endcache %} — blok natijasi ("nom", a, b) kaliti bilan
+    environment.fragment_cache'da saqlanadi. fragment_cache None bo'lsa yoki kalitda
+    aniqlanmagan o'zgaruvchi bo'lsa (route uzatmagan) — blok har safar render qilinadi.
+    """
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method("_cache_support", [nodes.Tuple(args, "load")]), [], [], body
+        ).set_lineno(lineno)
+
+    def _cache_support(self, key, caller):
+        cache = self.environment.fragment_cache
+        if cache is None or any(isinstance(k, Undefined) for k in key):
+            return caller()
+        rv = cache.get(key)
+        if rv is None:
+            rv = caller()
+            cache.set(key, rv)
+        return rv
+
+
+def make_environment(
+    directory: str = TEMPLATE_DIR,
+    bytecode_dir: str | None = None,
+    auto_reload: bool = True,
+    fragment_cache: TTLCache | None = None,
+) -> Environment:
+    bcc = None
+    if bytecode_dir:
+        os.makedirs(bytecode_dir, exist_ok=True)
+        bcc = FileSystemBytecodeCache(bytecode_dir)
+    env = Environment(
+        loader=FileSystemLoader(directory),
+        autoescape=True,
+        auto_reload=auto_reload,
+        bytecode_cache=bcc,
+        cache_size=-1,  # kompilyatsiya qilingan shablonlar chiqarib tashlanmaydi
+        extensions=[FragmentCacheExtension],
+    )
+    env.fragment_cache = fragment_cache
+    return env
+
+
+def precompile(env: Environment) -> int:
+    """Barcha .html shablonlarni yuklab (kompilyatsiya qilib) qo'yadi. Soni qaytariladi."""
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+env = make_environment(
+    bytecode_dir=settings.JINJA_BYTECODE_DIR or None,
+    auto_reload=settings.JINJA_AUTO_RELOAD,
+    fragment_cache=TTLCache(maxsize=settings.FRAGMENT_CACHE_SIZE, ttl=settings.REFDATA_TTL),
+)
+templates = Jinja2Templates(env=env)
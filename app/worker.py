@@ -0,0 +1,100 @@
+# app/worker.py
+"""
+Hisobot worker'lari (app.jobs navbati). Web jarayonidan alohida ishga tushiriladi:
+
+    python -m app.worker [-p 2]      # JOBS_WORKERS ta jarayon, SIGTERM/Ctrl+C — joriy ish tugagach chiqadi
+    python -m app.worker --once      # navbatni bo'shatib chiqish (cron / tekshiruv uchun)
+
+Web jarayoni navbatga faqat JOBS_ENABLED=1 bo'lsa yozadi — worker bilan birga yoqiladi.
+
+Har jarayon o'z engine'i bilan ishlaydi va past ustuvorlikda (JOBS_NICE) — og'ir yig'indilar
+web va diler so'rovlari bilan CPU talashmaydi; WAL rejimida o'quvchi yozuvchini bloklamaydi.
+"""
+import argparse
+import logging
+import multiprocessing as mp
+import os
+import signal
+import sys
+import time
+
+log = logging.getLogger("app.worker")
+
+PURGE_EVERY_SEC = 3600
+
+
+def work(stop, once: bool = False) -> int:
+    """Bitta worker tsikli. Bajarilgan ishlar soni."""
+    from . import jobs
+    from .database import SessionLocal
+    from .settings import settings
+
+    done = 0
+    purged_at = 0.0
+    while not stop.is_set():
+        with SessionLocal() as db:
+            if time.monotonic() - purged_at > PURGE_EVERY_SEC:
+                purged_at = time.monotonic()
+                jobs.purge(db)
+            claimed = jobs.claim(db)
+            if claimed is not None:
+                jobs.run(db, claimed)
+                done += 1
+                continue
+        if once:
+            break
+        stop.wait(settings.JOBS_POLL_INTERVAL)
+    return done
+
+
+def _child(stop) -> None:
+    from .settings import settings
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)   # to'xtatishni ota jarayon boshqaradi
+    try:
+        os.nice(settings.JOBS_NICE)
+    except OSError:
+        pass
+    work(stop)
+
+
+def main(argv: list[str] | None = None) -> int:
+    from .database import Base, engine
+    from .settings import settings
+    from . import migrations
+
+    ap = argparse.ArgumentParser(prog="python -m app.worker")
+    ap.add_argument("-p", "--processes", type=int, default=settings.JOBS_WORKERS)
+    ap.add_argument("--once", action="store_true")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(message)s")
+
+    Base.metadata.create_all(bind=engine)
+    migrations.migrate(engine)
+    engine.dispose()
+
+    ctx = mp.get_context("spawn")   # engine/ulanishlar fork orqali meros qolmasin
+    stop = ctx.Event()
+    if args.once:
+        n = work(stop, once=True)
+        print(f"{n} ta ish bajarildi")
+        return 0
+
+    procs = [ctx.Process(target=_child, args=(stop,), name=f"worker-{i}") for i in range(args.processes)]
+    for p in procs:
+        p.start()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    log.info("%d ta worker ishga tushdi", len(procs))
+    try:
+        while any(p.is_alive() for p in procs) and not stop.is_set():
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    stop.set()
+    for p in procs:
+        p.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
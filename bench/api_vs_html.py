@@ -0,0 +1,103 @@
+# bench/api_vs_html.py
+"""
+Diler oqimi: HTML (/dealer/start -> shops -> deliver -> POST) va JSON API (/api/v1) solishtiruvi.
+Har qadam N marta ketma-ket: p50 kechikish va javob hajmi; oxirida bitta yetkazish uchun jami.
+"API (takroriy)" — mijoz ma'lumotnomani keshlab qo'ygan: faqat /products + POST.
+
+    python -m bench.api_vs_html [--products 100] [--shops 200] [--n 200]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import aiohttp
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models
+from app.database import Base, make_engine
+from app.security import sign_token
+from .common import percentiles, seed_basic, uvicorn_server
+
+
+def prepare(url: str, products: int, shops: int):
+    engine = make_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine, autoflush=False)() as db:
+        district_id, shop_ids, product_ids = seed_basic(db, products=products, shops=shops)
+        dealer = crud.ensure_user(db, "bench-dealer", role=models.Role.dealer)
+        cookie = sign_token({"user_id": dealer.id, "role": "dealer"})
+    engine.dispose()
+    return district_id, shop_ids[0], product_ids[0], cookie
+
+
+async def step(http, method: str, url: str, n: int, **kw) -> tuple[float, int]:
+    samples, size = [], 0
+    for _ in range(n):
+        t0 = time.perf_counter()
+        async with http.request(method, url, allow_redirects=False, **kw) as r:
+            body = await r.read()
+            if r.status >= 400:
+                raise RuntimeError(f"{method} {url}: {r.status} {body[:200]!r}")
+        samples.append(time.perf_counter() - t0)
+        size += len(body)
+    return percentiles(samples)[50], size // n
+
+
+async def drive(base, district_id, shop_id, product_id, cookie, n):
+    delivery = {"district_id": district_id, "shop_id": shop_id, "product_id": product_id, "qty_kg": 1}
+    flows = {
+        "HTML": [
+            ("GET", "/dealer/start", {}),
+            ("GET", f"/dealer/shops?district_id={district_id}", {}),
+            ("GET", f"/dealer/deliver?district_id={district_id}&shop_id={shop_id}", {}),
+            ("POST", "/dealer/deliver", {"data": {**delivery, "qty_kg": "1", "pay_kind": "naqd"}}),
+        ],
+        "API": [
+            ("GET", "/api/v1/districts", {}),
+            ("GET", f"/api/v1/districts/{district_id}/shops", {}),
+            ("GET", "/api/v1/products", {}),
+            ("POST", "/api/v1/deliveries", {"json": delivery}),
+        ],
+        "API (takroriy)": [
+            ("GET", "/api/v1/products", {}),
+            ("POST", "/api/v1/deliveries", {"json": delivery}),
+        ],
+    }
+    too_much = {**delivery, "qty_kg": 1e12}
+    async with aiohttp.ClientSession(cookies={"session": cookie}) as http:
+        for name, steps in flows.items():
+            total_ms = total_b = 0.0
+            print(f"— {name}")
+            for method, path, kw in steps:
+                p50, size = await step(http, method, base + path, n, **kw)
+                total_ms += p50 * 1000
+                total_b += size
+                print(f"  {method:4s} {path:58s} p50={p50 * 1000:6.2f}ms {size:7d} B")
+            print(f"  jami bitta yetkazish: {total_ms:6.2f}ms, {total_b / 1024:7.1f} KiB")
+
+        # qoldiq yetmasa: HTML butun formani (mahsulot ro'yxati bilan) qayta render qiladi, API — bitta qator
+        async with http.post(base + "/dealer/deliver", data={**too_much, "pay_kind": "naqd"}) as r:
+            html_error = len(await r.read())
+        async with http.post(base + "/api/v1/deliveries", json=too_much) as r:
+            api_error = len(await r.read())
+        print(f"xato javobi: HTML {html_error} B, API {api_error} B")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--products", type=int, default=100)
+    ap.add_argument("--shops", type=int, default=200)
+    ap.add_argument("--n", type=int, default=200)
+    args = ap.parse_args(argv)
+
+    tmpdir = tempfile.mkdtemp(prefix="sklad-bench-")
+    url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    district_id, shop_id, product_id, cookie = prepare(url, args.products, args.shops)
+    with uvicorn_server(url) as base:
+        asyncio.run(drive(base, district_id, shop_id, product_id, cookie, args.n))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# bench/bot_throughput.py
+"""
+Bot runtime o'tkazuvchanligi: N ta sintetik /start update'i dispatcher'dan o'tkaziladi
+(soxta Telegram sessiyasi, vaqtinchalik baza). Har concurrency qiymati uchun update/s chiqariladi.
+--latency — Telegram javobini kutish (sekund): real hayotda vaqt shu yerda ketadi, parallellik
+aynan shuni yopadi. --webhook — update'lar FastAPI route orqali (ASGI, tarmoqsiz) yuboriladi.
+
+    python -m bench.bot_throughput [--updates 5000] [--concurrency 1,4,16,64] [--latency 0.02] [--webhook]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import crud, models
+from app.database import Base, make_async_engine, make_engine
+from bot.fake import FakeTelegramSession
+from bot.runtime import BotRuntime, make_dispatcher
+from aiogram import Bot
+from sqlalchemy.orm import sessionmaker
+
+
+def prepare(url: str, users: int) -> None:
+    engine = make_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine, autoflush=False)() as db:
+        crud.ensure_user(db, "1", role=models.Role.admin)
+        for i in range(2, users):
+            crud.ensure_user(db, str(i), role=models.Role.dealer)
+    engine.dispose()
+
+
+def update(i: int, users: int) -> dict:
+    uid = 1 + i % (2 * users)   # yarmi ro'yxatda yo'q
+    return {
+        "update_id": i,
+        "message": {
+            "message_id": i, "date": int(time.time()), "text": "/start",
+            "chat": {"id": uid, "type": "private"},
+            "from": {"id": uid, "is_bot": False, "first_name": f"U{uid}"},
+        },
+    }
+
+
+async def run(url: str, n: int, users: int, concurrency: int, latency: float, webhook: bool) -> float:
+    engine = make_async_engine(url)
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    bot = Bot("42:fake", session=FakeTelegramSession(latency=latency))
+    runtime = BotRuntime(bot, make_dispatcher(factory), concurrency=concurrency, queue_size=n)
+    await runtime.start()
+    updates = [update(i, users) for i in range(n)]
+    t0 = time.perf_counter()
+    if webhook:
+        import httpx
+        from fastapi import FastAPI
+        from app.routers import telegram
+
+        app = FastAPI()
+        app.include_router(telegram.router)
+        app.state.bot = runtime
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as http:
+            for u in updates:
+                r = await http.post(telegram.settings.BOT_WEBHOOK_PATH, json=u)
+                assert r.status_code == 200, r.status_code
+    else:
+        for u in updates:
+            runtime.feed(u)
+    await runtime.drain()
+    elapsed = time.perf_counter() - t0
+    stats = runtime.stats()
+    sent = len(bot.session.calls)
+    await runtime.stop()
+    await engine.dispose()
+    assert stats["processed"] == n and stats["failed"] == 0 and sent == n, (stats, sent)
+    return n / elapsed
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--updates", type=int, default=5000)
+    ap.add_argument("--users", type=int, default=500)
+    ap.add_argument("--concurrency", default="1,4,16,64")
+    ap.add_argument("--latency", type=float, default=0.02)
+    ap.add_argument("--webhook", action="store_true")
+    args = ap.parse_args(argv)
+
+    tmpdir = tempfile.mkdtemp(prefix="sklad-bench-")
+    url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    prepare(url, args.users)
+    via = "webhook" if args.webhook else "dispatcher"
+    for c in (int(x) for x in args.concurrency.split(",")):
+        rate = asyncio.run(run(url, args.updates, args.users, c, args.latency, args.webhook))
+        print(f"{via}: concurrency={c:3d}  {args.updates} update, {rate:8,.0f} update/s "
+              f"(Telegram kechikishi {args.latency * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# bench/common.py
+"""Benchmark skriptlari uchun umumiy yordamchilar: vaqtinchalik fayl-SQLite baza va boshlang'ich ma'lumot."""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, make_engine
+from app import crud
+
+
+@contextmanager
+def temp_sessionmaker(tuned: bool = True):
+    """Vaqtinchalik fayldagi SQLite baza (fsync xarajati real bo'lishi uchun :memory: emas)."""
+    tmpdir = tempfile.mkdtemp(prefix="sklad-bench-")
+    path = os.path.join(tmpdir, "bench.db")
+    engine = make_engine(f"sqlite:///{path}", tuned=tuned)
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    finally:
+        engine.dispose()
+        for f in os.listdir(tmpdir):
+            os.remove(os.path.join(tmpdir, f))
+        os.rmdir(tmpdir)
+
+
+def seed_basic(db, products: int = 10, shops: int = 20, stock_kg: float = 1e9):
+    """Bitta tuman, bir nechta do'kon va katta qoldiqli mahsulotlar."""
+    d = crud.create_district(db, "Bench")
+    shop_ids = [crud.create_shop(db, f"Shop {i}", d.id).id for i in range(shops)]
+    product_ids = []
+    for i in range(products):
+        p = crud.create_product(db, f"Product {i}", None, None, 1000.0 + i, None, None)
+        crud.add_kirim(db, p.id, stock_kg)
+        product_ids.append(p.id)
+    return d.id, shop_ids, product_ids
+
+
+def rate(n: int, fn) -> float:
+    """fn() ni n marta chaqirib, sekundiga operatsiyalar sonini qaytaradi."""
+    t0 = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return n / (time.perf_counter() - t0)
+
+
+def seed_deliveries(db, district_id: int, shop_ids: list[int], product_ids: list[int], n: int,
+                    days: int = 90, batch: int = 5000):
+    """n ta Delivery yozuvi (oxirgi `days` kun bo'ylab) — bitta executemany bilan, ledger'larsiz."""
+    import random
+    from datetime import datetime, timedelta
+    from sqlalchemy import insert
+    from app import models
+
+    rnd = random.Random(42)
+    now = datetime.now()
+    rows = []
+    for i in range(n):
+        qty = round(rnd.uniform(1, 50), 1)
+        price = 1000.0 + rnd.randrange(5000)
+        rows.append({
+            "district_id": district_id,
+            "shop_id": rnd.choice(shop_ids),
+            "product_id": rnd.choice(product_ids),
+            "qty_kg": qty, "unit_price": price, "total": qty * price,
+            "pay_kind": rnd.choice(("naqd", "qarz", "terminal")),
+            "created_at": now - timedelta(seconds=rnd.randrange(days * 86400)),
+        })
+        if len(rows) >= batch:
+            db.execute(insert(models.Delivery), rows); rows = []
+    if rows:
+        db.execute(insert(models.Delivery), rows)
+    db.commit()
+
+
+@contextmanager
+def uvicorn_server(database_url: str, port: int = 8765, workers: int = 1, stderr=None):
+    """app.main:app'ni alohida jarayonda (berilgan baza bilan) ishga tushiradi, tayyor bo'lguncha kutadi.
+    stderr — uvicorn log'i (traceback'lar) uchun fayl; berilmasa konsolga."""
+    import socket
+    import subprocess
+    import sys
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, DATABASE_URL=database_url)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=root, env=env, stderr=stderr,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                break
+            except OSError:
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn ishga tushmadi")
+                time.sleep(0.1)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def percentiles(samples: list[float], ps=(50, 95, 99)) -> dict[int, float]:
+    if not samples:
+        return {p: 0.0 for p in ps}
+    xs = sorted(samples)
+    return {p: xs[min(len(xs) - 1, int(len(xs) * p / 100))] for p in ps}
@@ -0,0 +1,72 @@
+# bench/concurrent_writers.py
+"""
+Parallel dilerlar (yozuvchilar) + monitoring o'quvchisi: standart SQLite ulanishi va
+app.database profili (WAL, busy_timeout, synchronous=NORMAL, ...) solishtiriladi.
+
+    python -m bench.concurrent_writers [--writers 8] [--seconds 5]
+"""
+import argparse
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+
+from app import crud, services
+from .common import temp_sessionmaker, seed_basic
+
+
+def run(tuned: bool, writers: int, seconds: float):
+    with temp_sessionmaker(tuned=tuned) as Session:
+        with Session() as db:
+            district_id, shop_ids, product_ids = seed_basic(db)
+
+        stop = time.monotonic() + seconds
+        ok, locked, reads = [0] * writers, [0] * writers, [0]
+
+        def writer(w):
+            with Session() as db:
+                i = 0
+                while time.monotonic() < stop:
+                    i += 1
+                    try:
+                        services.deliver(db, district_id=district_id, shop_id=shop_ids[(w + i) % len(shop_ids)],
+                                         product_id=product_ids[i % len(product_ids)], qty_kg=1.0, pay_kind="qarz")
+                        ok[w] += 1
+                    except OperationalError as e:
+                        if "locked" not in str(e):
+                            raise
+                        locked[w] += 1
+
+        def reader():
+            # admin hisobotlari: yozuvchilar bilan bir vaqtda uzun o'qish
+            with Session() as db:
+                while time.monotonic() < stop:
+                    crud.deliveries_agg_by_shop(db)
+                    crud.list_balances(db)
+                    db.rollback()
+                    reads[0] += 1
+
+        threads = [threading.Thread(target=writer, args=(w,)) for w in range(writers)]
+        threads.append(threading.Thread(target=reader))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        total_ok, total_locked = sum(ok), sum(locked)
+        label = "tuned" if tuned else "default"
+        print(f"{label:8s} {total_ok / seconds:8.1f} deliveries/s  "
+              f"locked={total_locked} ({100 * total_locked / max(1, total_ok + total_locked):.1f}%)  "
+              f"reports={reads[0]}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--writers", type=int, default=8)
+    ap.add_argument("--seconds", type=float, default=5.0)
+    args = ap.parse_args(argv)
+    for tuned in (False, True):
+        run(tuned, args.writers, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# bench/conditional_get.py
+"""
+Takroriy ko'rishlar: har sahifa ketma-ket N marta oddiy GET va N marta If-None-Match bilan so'raladi.
+Har biri uchun o'rtacha kechikish va javob hajmi chiqariladi (304 — tana bo'sh, render yo'q).
+
+    python -m bench.conditional_get [--deliveries 20000] [--n 300]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import aiohttp
+
+from .common import uvicorn_server, percentiles
+from .mixed_latency import prepare
+
+
+async def measure(http, url: str, n: int, etag: str | None) -> tuple[list[float], int, set[int]]:
+    headers = {"If-None-Match": etag} if etag else {}
+    samples, size, statuses = [], 0, set()
+    for _ in range(n):
+        t0 = time.perf_counter()
+        async with http.get(url, headers=headers, allow_redirects=False) as r:
+            body = await r.read()
+            statuses.add(r.status)
+        samples.append(time.perf_counter() - t0)
+        size += len(body)
+    return samples, size // n, statuses
+
+
+async def drive(base, district_id, shop_ids, cookies, n):
+    pages = [
+        ("dealer", "/dealer/start"),
+        ("dealer", f"/dealer/shops?district_id={district_id}"),
+        ("dealer", f"/dealer/deliver?district_id={district_id}&shop_id={shop_ids[0]}"),
+        ("admin", "/admin/balances"),
+        ("admin", "/admin/monitor?days=30"),
+    ]
+    for role, path in pages:
+        async with aiohttp.ClientSession(cookies={"session": cookies[role]}) as http:
+            async with http.get(base + path) as r:
+                await r.read()
+                etag = r.headers.get("ETag")
+            for label, tag in (("200", None), ("304", etag)):
+                samples, size, statuses = await measure(http, base + path, n, tag)
+                p = percentiles(samples)
+                print(f"{path:40s} {label}: p50={p[50] * 1000:6.2f}ms p95={p[95] * 1000:6.2f}ms "
+                      f"{size:7d} B/javob  status={sorted(statuses)}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--deliveries", type=int, default=20000)
+    ap.add_argument("--n", type=int, default=300)
+    args = ap.parse_args(argv)
+
+    tmpdir = tempfile.mkdtemp(prefix="sklad-bench-")
+    url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    district_id, shop_ids, cookies = prepare(url, args.deliveries)
+    with uvicorn_server(url) as base:
+        asyncio.run(drive(base, district_id, shop_ids, cookies, args.n))
+
+
+if __name__ == "__main__":
+    main()
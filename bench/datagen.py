@@ -0,0 +1,214 @@
+# bench/datagen.py
+"""
+Sintetik ma'lumot generatori: bo'sh bazani real hajmlar bilan to'ldiradi.
+
+- tumanlar, do'konlar (Zipf: bir nechta katta do'kon ko'p buyurtma qiladi), mahsulotlar (Zipf);
+- yetkazishlar vaqt bo'yicha qiyshiq: oxirgi oylarda ko'proq (o'sish), yakshanba kam,
+  kun ichida 7:00–20:00, cho'qqi ~11:00; id tartibi created_at tartibiga mos;
+- har yetkazish uchun — services.deliver'dagidek ombor chiqimi va do'kon tranzaksiyasi
+  (naqd/terminal — payment, qarz — sale, boshqa — yo'q); qoldiq tugasa — kirim partiyasi;
+  qarzdor do'konlar vaqti-vaqti bilan to'lov qiladi;
+- hosila jadvallar: stock_balances, delivery_daily_rollup, shops.balance va
+  STOCK_CHECKPOINT_EVERY qadamli qoldiq checkpoint'lari — crud'dagi bilan bir xil.
+
+Yozish — executemany partiyalari bilan (ORM'siz), shuning uchun millionlab qator daqiqalarda.
+
+    python -m bench.datagen --out /tmp/sklad-large.db [--preset large] [--deliveries 2000000] [--seed 42]
+"""
+import argparse
+import math
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models
+from app.database import Base, make_engine
+from app.settings import settings
+
+PRESETS = {
+    # bench.suite baseline'i shu hajmda
+    "small": {"districts": 8, "shops": 500, "products": 100, "deliveries": 100_000, "days": 365},
+    "medium": {"districts": 12, "shops": 2000, "products": 200, "deliveries": 500_000, "days": 365},
+    "large": {"districts": 14, "shops": 5000, "products": 400, "deliveries": 2_000_000, "days": 730},
+}
+PAY_KINDS = ("naqd", "qarz", "terminal", "boshqa")
+PAY_WEIGHTS = (50, 30, 15, 5)
+BATCH = 20_000
+
+
+def _zipf_cum(n: int, s: float) -> list[float]:
+    return list(accumulate(1.0 / (i + 1) ** s for i in range(n)))
+
+
+def _day_weights(days: int, growth: float = 1.5) -> list[float]:
+    """Eski kunlar kamroq (exp o'sish), yakshanba — 30%."""
+    end = datetime.now().date()
+    out = []
+    for i in range(days):
+        day = end - timedelta(days=days - 1 - i)
+        w = math.exp(growth * i / max(days - 1, 1))
+        out.append(w * (0.3 if day.weekday() == 6 else 1.0))
+    return out
+
+
+class _Writer:
+    """Jadval bo'yicha bufer: BATCH'ga yetganda executemany."""
+
+    def __init__(self, db):
+        self.db = db
+        self.rows: dict = {}
+        self.counts: dict = {}
+
+    def add(self, table, row: dict) -> None:
+        buf = self.rows.setdefault(table, [])
+        buf.append(row)
+        if len(buf) >= BATCH:
+            self.flush(table)
+
+    def flush(self, table=None) -> None:
+        for t in ([table] if table is not None else list(self.rows)):
+            buf = self.rows.get(t)
+            if buf:
+                self.db.execute(insert(t), buf)
+                self.counts[t.name] = self.counts.get(t.name, 0) + len(buf)
+                self.rows[t] = []
+
+
+def generate(url: str, *, districts: int, shops: int, products: int, deliveries: int, days: int,
+             seed: int = 42, log=print) -> dict:
+    """Bo'sh bazani to'ldiradi. Yozilgan qatorlar soni (jadval bo'yicha) qaytadi."""
+    t0 = time.perf_counter()
+    rnd = random.Random(seed)
+    engine = make_engine(url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    w = _Writer(db)
+    start_day = datetime.combine(datetime.now().date() - timedelta(days=days - 1), datetime.min.time())
+    created = start_day - timedelta(days=30)
+
+    # ——— ma'lumotnoma
+    for i in range(districts):
+        w.add(models.District.__table__, {"id": i + 1, "name": f"Tuman {i + 1:02d}", "created_at": created})
+    shop_district = {}
+    for i in range(shops):
+        sid, did = i + 1, rnd.randrange(districts) + 1
+        shop_district[sid] = did
+        w.add(models.Shop.__table__, {
+            "id": sid, "name": f"Do'kon {sid:05d}", "district_id": did, "balance": 0.0,
+            "created_at": created + timedelta(seconds=sid),
+        })
+    prices = {}
+    for i in range(products):
+        pid = i + 1
+        prices[pid] = float(rnd.randrange(5, 60) * 1000)
+        w.add(models.Product.__table__, {
+            "id": pid, "name": f"Mahsulot {pid:03d}", "kind": rnd.choice(("un", "shakar", "yog'", "guruch")),
+            "brand": None, "price_per_kg": prices[pid], "in_price_per_pack": None, "out_price_per_pack": None,
+            "is_active": rnd.random() > 0.05, "created_at": created,
+        })
+    w.flush()
+    crud.ensure_user(db, "bench-admin", role=models.Role.admin)
+    crud.ensure_user(db, "bench-dealer", role=models.Role.dealer)
+
+    # ——— ledger'lar, kun bo'yicha xronologik
+    shop_ids = list(range(1, shops + 1))
+    rnd.shuffle(shop_ids)                       # mashhurlik id'ga bog'liq bo'lmasin
+    product_ids = list(range(1, products + 1))
+    rnd.shuffle(product_ids)
+    shop_cw, product_cw = _zipf_cum(shops, 0.8), _zipf_cum(products, 1.1)
+    pay_cw = list(accumulate(PAY_WEIGHTS))
+    weights = _day_weights(days)
+    total_w = sum(weights)
+    per_day = [int(deliveries * x / total_w) for x in weights]
+    per_day[-1] += deliveries - sum(per_day)
+
+    stock = {pid: 0.0 for pid in prices}
+    balance = {sid: 0.0 for sid in shop_district}
+    delivery_id = move_id = tx_id = 0
+    every = settings.STOCK_CHECKPOINT_EVERY
+    St, Sm, Sd = models.ShopTransaction.__table__, models.StockMove.__table__, models.Delivery.__table__
+    Cp = models.StockCheckpoint.__table__
+
+    def move(pid, kind, qty, at, shop_id=None, note=None):
+        nonlocal move_id
+        move_id += 1
+        stock[pid] += qty if kind == models.MoveKind.kirim else -qty
+        w.add(Sm, {"id": move_id, "product_id": pid, "kind": kind, "qty_kg": qty,
+                   "shop_id": shop_id, "note": note, "created_at": at})
+        if every > 0 and move_id % every == 0:
+            for p, q in stock.items():
+                w.add(Cp, {"product_id": p, "upto_move_id": move_id, "qty_kg": q, "taken_at": at})
+
+    def tx(sid, kind, amount, at, note):
+        nonlocal tx_id
+        tx_id += 1
+        balance[sid] += amount if kind == models.TxKind.payment else -amount
+        w.add(St, {"id": tx_id, "shop_id": sid, "kind": kind, "amount": amount, "note": note, "created_at": at})
+
+    for day_i, n in enumerate(per_day):
+        day = start_day + timedelta(days=day_i)
+        secs = sorted(int(rnd.triangular(7, 20, 11) * 3600) for _ in range(n))
+        shops_today = rnd.choices(shop_ids, cum_weights=shop_cw, k=n)
+        products_today = rnd.choices(product_ids, cum_weights=product_cw, k=n)
+        pays_today = rnd.choices(PAY_KINDS, cum_weights=pay_cw, k=n)
+        for sec, sid, pid, pay in zip(secs, shops_today, products_today, pays_today):
+            at = day + timedelta(seconds=sec, microseconds=rnd.randrange(1_000_000))
+            qty = round(min(max(rnd.lognormvariate(2.3, 0.8), 0.5), 500.0), 1)
+            if stock[pid] < qty:
+                move(pid, models.MoveKind.kirim, float(rnd.randrange(20, 100) * 100), at, note="Partiya")
+            delivery_id += 1
+            price = prices[pid]
+            w.add(Sd, {"id": delivery_id, "district_id": shop_district[sid], "shop_id": sid, "product_id": pid,
+                       "qty_kg": qty, "unit_price": price, "total": qty * price, "pay_kind": pay,
+                       "doc_id": None, "created_at": at})
+            move(pid, models.MoveKind.chiqim, qty, at, shop_id=sid, note=f"Delivery #{delivery_id}")
+            if pay == "qarz":
+                tx(sid, models.TxKind.sale, qty * price, at, f"Delivery #{delivery_id} (qarz)")
+            elif pay in ("naqd", "terminal"):
+                tx(sid, models.TxKind.payment, qty * price, at, f"Delivery #{delivery_id} ({pay})")
+        # qarzdorlar kun oxirida qisman to'laydi
+        evening = day + timedelta(hours=19)
+        for sid in rnd.choices(shop_ids, cum_weights=shop_cw, k=max(1, n // 10)):
+            if balance[sid] < 0:
+                tx(sid, models.TxKind.payment, round(-balance[sid] * rnd.uniform(0.3, 1.0)), evening, "To'lov")
+        if day_i % 30 == 29:
+            w.flush()
+            db.commit()
+            log(f"  {day.date()}: {delivery_id:,} yetkazish")
+    w.flush()
+    db.commit()
+
+    # ——— hosila jadvallar (crud'dagi rebuild'lar bilan bir xil natija)
+    crud.rebuild_stock_balances(db)
+    crud.rebuild_delivery_rollup(db)
+    crud.rebuild_shop_balances(db)
+    db.close()
+    engine.dispose()
+    counts = dict(w.counts)
+    log(f"tayyor: {counts} — {time.perf_counter() - t0:.1f} s")
+    return counts
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out", required=True, help="yangi SQLite fayl yo'li")
+    ap.add_argument("--preset", choices=sorted(PRESETS), default="medium")
+    for k in ("districts", "shops", "products", "deliveries", "days"):
+        ap.add_argument(f"--{k}", type=int)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args(argv)
+
+    if os.path.exists(args.out):
+        ap.error(f"{args.out} allaqachon bor — generator faqat bo'sh bazaga yozadi")
+    params = {k: getattr(args, k) or v for k, v in PRESETS[args.preset].items()}
+    print(f"{args.out}: {params}, seed={args.seed}")
+    generate(f"sqlite:///{args.out}", seed=args.seed, **params)
+
+
+if __name__ == "__main__":
+    main()
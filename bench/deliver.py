@@ -0,0 +1,48 @@
+# bench/deliver.py
+"""
+Yetkazish yozish yo'li: eski (4 ta alohida commit) va services.deliver (bitta commit).
+
+    python -m bench.deliver [-n 500]
+"""
+import argparse
+
+from app import crud, models, services
+from .common import temp_sessionmaker, seed_basic, rate
+
+
+def legacy_deliver(db, district_id, shop_id, product, qty):
+    """dealer.deliver_post'ning avvalgi ketma-ketligi: balans o'qish + 3 ta commit/refresh."""
+    balance = crud.stock_balance_for_product(db, product.id)
+    assert qty <= balance
+    delivery = crud.create_delivery(db, district_id, shop_id, product.id, qty, product.price_per_kg, "qarz")
+    crud.add_chiqim(db, product_id=product.id, qty_kg=qty, shop_id=shop_id, note=f"Delivery #{delivery.id}")
+    crud.add_shop_tx(db, shop_id=shop_id, kind=models.TxKind.sale, amount=delivery.total,
+                     note=f"Delivery #{delivery.id} (qarz)")
+    return delivery
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=500)
+    args = ap.parse_args(argv)
+
+    for name in ("legacy", "service"):
+        with temp_sessionmaker() as Session:
+            with Session() as db:
+                district_id, shop_ids, product_ids = seed_basic(db)
+                products = [db.get(models.Product, pid) for pid in product_ids]
+
+                def one(i):
+                    product = products[i % len(products)]
+                    shop_id = shop_ids[i % len(shop_ids)]
+                    if name == "legacy":
+                        legacy_deliver(db, district_id, shop_id, product, 1.5)
+                    else:
+                        services.deliver(db, district_id=district_id, shop_id=shop_id, product_id=product.id,
+                                         qty_kg=1.5, pay_kind="qarz")
+
+                print(f"{name:8s} {rate(args.n, one):8.1f} deliveries/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# bench/export_memory.py
+"""
+CSV eksport xotirasi qator soniga bog'liq emasligini tekshiradi: kichik va katta bazada
+app.export.stream_csv'ning tracemalloc peak'i solishtiriladi. Peak o'sib ketsa — exit 1.
+
+    python -m bench.export_memory [--small 1000] [--large 500000] [--max-ratio 2.0]
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from app import export
+from .common import temp_sessionmaker, seed_basic, seed_deliveries
+
+
+def measure(n: int) -> tuple[int, int, float]:
+    """n ta yetkazishli bazadan eksport: (peak bayt, chiqqan bayt, sekund)."""
+    with temp_sessionmaker() as Session:
+        with Session() as db:
+            district_id, shop_ids, product_ids = seed_basic(db)
+            seed_deliveries(db, district_id, shop_ids, product_ids, n, days=30)
+        now = datetime.now()
+        stmt = export.deliveries_stmt(now - timedelta(days=31), now + timedelta(days=1))
+
+        size = 0
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        for chunk in export.stream_csv(Session, stmt, export.DELIVERY_HEADER):
+            size += len(chunk)
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return peak, size, elapsed
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--small", type=int, default=1000)
+    ap.add_argument("--large", type=int, default=500_000)
+    ap.add_argument("--max-ratio", type=float, default=2.0)
+    args = ap.parse_args(argv)
+
+    peaks = {}
+    for n in (args.small, args.large):
+        peak, size, elapsed = measure(n)
+        peaks[n] = peak
+        print(f"{n:>9} qator: peak {peak / 1024:8.1f} KiB, CSV {size / 1e6:8.1f} MB, "
+              f"{elapsed:6.2f} s ({n / elapsed:,.0f} qator/s)")
+
+    ratio = peaks[args.large] / peaks[args.small]
+    print(f"peak nisbati: {ratio:.2f} (chegara {args.max_ratio})")
+    return 0 if ratio <= args.max_ratio else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
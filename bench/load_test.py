@@ -0,0 +1,219 @@
+# bench/load_test.py
+"""
+Ertalabki pik: N ta diler bir vaqtda to'liq yo'lni bosib o'tadi
+(/dealer/start → /dealer/shops → /dealer/deliver GET → POST), yonida adminlar /admin/monitor'ni
+yangilab turadi. Ilova alohida uvicorn jarayonida, vaqtinchalik bazada (bench.datagen yoki --db nusxasi);
+har diler/admin — o'z foydalanuvchisi va security.sign_token cookie'si bilan.
+
+Har ssenariy (dilerlar:adminlar) uchun: o'tkazuvchanlik (so'rov/s, yetkazish/s), har qadam
+p50/p95/p99 kechikishi, xatolar va "database is locked" ulushi (uvicorn log'idan sanaladi —
+klient faqat 500 ko'radi).
+
+    python -m bench.load_test [--scenarios 10:1,25:2,50:4] [--seconds 20] [--think 0.5]
+                              [--workers 1] [--db tayyor.db | --preset small] [--days 7]
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import aiohttp
+
+STEPS = ("dealer start", "dealer shops", "dealer deliver GET", "dealer deliver POST", "admin monitor")
+
+
+def prepare(path: str, args):
+    """Baza: datagen yoki nusxa; yuk uchun foydalanuvchilar, cookie'lar va katta qoldiq."""
+    from sqlalchemy import select
+    from sqlalchemy.orm import sessionmaker
+    from app import crud, models
+    from app.database import make_engine
+    from app.security import sign_token
+    from .datagen import PRESETS, generate
+
+    url = f"sqlite:///{path}"
+    if args.db:
+        shutil.copyfile(args.db, path)
+    else:
+        generate(url, seed=args.seed, log=lambda *_: None, **PRESETS[args.preset])
+    dealers = max(int(s.split(":")[0]) for s in args.scenarios.split(","))
+    admins = max(int(s.split(":")[1]) for s in args.scenarios.split(","))
+    engine = make_engine(url)
+    with sessionmaker(bind=engine, autoflush=False)() as db:
+        cookies = {"dealer": [], "admin": []}
+        for role, n in ((models.Role.dealer, dealers), (models.Role.admin, admins)):
+            for i in range(n):
+                u = crud.ensure_user(db, f"load-{role.value}-{i}", role=role)
+                cookies[role.value].append(sign_token({"user_id": u.id, "role": role.value}))
+        products = list(db.scalars(select(models.Product.id).where(models.Product.is_active.is_(True))))
+        for pid in products:
+            crud.add_kirim(db, pid, 1e7)          # POST'lar "qoldiq yetarli emas"ga tushmasin
+        shops: dict[int, list[int]] = {}
+        for sid, did in db.execute(select(models.Shop.id, models.Shop.district_id)):
+            shops.setdefault(did, []).append(sid)
+    engine.dispose()
+    return cookies, shops, products
+
+
+class Stats:
+    def __init__(self):
+        self.samples = {s: [] for s in STEPS}
+        self.errors = {s: 0 for s in STEPS}
+        self.delivered = 0
+        self.log_offset = 0
+
+
+async def _hit(http, stats, step, measured, method, url, **kw) -> bool:
+    t0 = time.perf_counter()
+    try:
+        async with http.request(method, url, allow_redirects=False, **kw) as r:
+            await r.read()
+            ok = r.status == 200
+    except aiohttp.ClientError:
+        ok = False
+    if measured:
+        if ok:
+            stats.samples[step].append(time.perf_counter() - t0)
+        else:
+            stats.errors[step] += 1
+    return ok
+
+
+async def dealer(base, cookie, shops, products, think, warm_until, stop, stats, rnd):
+    districts = list(shops)
+    async with aiohttp.ClientSession(base_url=base, cookies={"session": cookie}) as http:
+        while time.monotonic() < stop:
+            measured = time.monotonic() >= warm_until
+            did = rnd.choice(districts)
+            sid = rnd.choice(shops[did])
+            flow = (
+                ("dealer start", "GET", "/dealer/start", {}),
+                ("dealer shops", "GET", "/dealer/shops", {"params": {"district_id": did}}),
+                ("dealer deliver GET", "GET", "/dealer/deliver", {"params": {"district_id": did, "shop_id": sid}}),
+                ("dealer deliver POST", "POST", "/dealer/deliver", {"data": {
+                    "district_id": did, "shop_id": sid, "product_id": rnd.choice(products),
+                    "qty_kg": f"{rnd.uniform(1, 30):.1f}", "pay_kind": rnd.choice(("naqd", "qarz", "terminal")),
+                }}),
+            )
+            for step, method, url, kw in flow:
+                if not await _hit(http, stats, step, measured, method, url, **kw):
+                    break                           # yo'l uzildi — diler boshidan boshlaydi
+                if step == "dealer deliver POST" and measured:
+                    stats.delivered += 1
+                if think:
+                    await asyncio.sleep(rnd.uniform(0, 2 * think))
+
+
+async def admin(base, cookie, days, interval, warm_until, stop, stats):
+    async with aiohttp.ClientSession(base_url=base, cookies={"session": cookie}) as http:
+        while time.monotonic() < stop:
+            measured = time.monotonic() >= warm_until
+            await _hit(http, stats, "admin monitor", measured, "GET", "/admin/monitor", params={"days": days})
+            await asyncio.sleep(interval)
+
+
+def count_locked(log_path: str, offset: int) -> int:
+    """uvicorn log'idagi (offset'dan keyin) so'rov ichida tushgan "database is locked" xatolari.
+    Fon vazifalari (notifier va h.k.) traceback'lari hisobga olinmaydi."""
+    with open(log_path, errors="replace") as f:
+        f.seek(offset)
+        lines = f.read().splitlines()
+    n, in_request = 0, False
+    for line in lines:
+        if "Exception in ASGI application" in line:
+            in_request = True
+        elif line.startswith(("ERROR:", "WARNING:", "INFO:")):
+            in_request = False
+        elif in_request and line.startswith("sqlalchemy.exc.OperationalError") and "database is locked" in line:
+            n, in_request = n + 1, False
+    return n
+
+
+async def scenario(base, n_dealers, n_admins, cookies, shops, products, args, log_path):
+    warm_until = time.monotonic() + args.warmup
+    stop = warm_until + args.seconds
+    stats = Stats()
+
+    async def mark_log():
+        # qizish paytidagi xatolar klient tomonda ham sanalmaydi
+        await asyncio.sleep(args.warmup)
+        stats.log_offset = os.path.getsize(log_path)
+    tasks = [dealer(base, cookies["dealer"][i], shops, products, args.think, warm_until, stop, stats,
+                    random.Random(i)) for i in range(n_dealers)]
+    tasks += [admin(base, cookies["admin"][i], args.days, args.admin_interval, warm_until, stop, stats)
+              for i in range(n_admins)]
+    await asyncio.gather(mark_log(), *tasks)
+    return stats
+
+
+def report(label, stats, locked, seconds) -> dict:
+    from .common import percentiles
+
+    total = sum(len(s) for s in stats.samples.values()) + sum(stats.errors.values())
+    print(f"\n=== {label}, {seconds:g} s ===")
+    print(f"{'qadam':22s} {'n':>7s} {'req/s':>7s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'xato':>5s}")
+    for step in STEPS:
+        samples, err = stats.samples[step], stats.errors[step]
+        if not samples and not err:
+            continue
+        p = percentiles(samples)
+        print(f"{step:22s} {len(samples):7d} {len(samples) / seconds:7.1f} {p[50] * 1000:6.1f}ms "
+              f"{p[95] * 1000:6.1f}ms {p[99] * 1000:6.1f}ms {err:5d}")
+    row = {"rps": total / seconds, "deliveries": stats.delivered / seconds,
+           "p95_post": percentiles(stats.samples["dealer deliver POST"])[95],
+           "errors": sum(stats.errors.values()), "locked": locked,
+           "locked_pct": 100 * locked / max(1, total)}
+    print(f"jami: {row['rps']:.1f} so'rov/s, {row['deliveries']:.1f} yetkazish/s, xato={row['errors']}, "
+          f"locked={locked} ({row['locked_pct']:.2f}%)")
+    return row
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scenarios", default="10:1,25:2,50:4", help="dilerlar:adminlar, vergul bilan")
+    ap.add_argument("--seconds", type=float, default=20.0)
+    ap.add_argument("--warmup", type=float, default=2.0)
+    ap.add_argument("--think", type=float, default=0.5, help="qadamlar orasidagi o'rtacha pauza, s (0 — to'xtovsiz)")
+    ap.add_argument("--admin-interval", type=float, default=2.0, help="admin monitor'ni yangilash oralig'i, s")
+    ap.add_argument("--days", type=int, default=7)
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--db", help="tayyor baza (bench.datagen); nusxasida ishlanadi")
+    ap.add_argument("--preset", choices=("small", "medium", "large"), default="small")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--keep-log", help="uvicorn log'ini shu faylga saqlash")
+    args = ap.parse_args(argv)
+
+    tmpdir = tempfile.mkdtemp(prefix="sklad-load-")
+    path = os.path.join(tmpdir, "load.db")
+    # app.settings import paytida o'qiladi — baza URL'i app importlaridan oldin
+    os.environ.update(DATABASE_URL=f"sqlite:///{path}", JOBS_ENABLED="0", SLOW_QUERY_MS="-1")
+    from .common import uvicorn_server
+
+    cookies, shops, products = prepare(path, args)
+    log_path = os.path.join(tmpdir, "uvicorn.log")
+    rows = {}
+    try:
+        with open(log_path, "w") as log, \
+                uvicorn_server(f"sqlite:///{path}", args.port, args.workers, stderr=log) as base:
+            for spec in args.scenarios.split(","):
+                n_dealers, n_admins = map(int, spec.split(":"))
+                stats = asyncio.run(scenario(base, n_dealers, n_admins, cookies, shops, products, args, log_path))
+                locked = count_locked(log_path, stats.log_offset)
+                rows[spec] = report(f"{n_dealers} diler + {n_admins} admin", stats, locked, args.seconds)
+    finally:
+        if args.keep_log:
+            shutil.copyfile(log_path, args.keep_log)
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    print(f"\n{'ssenariy':10s} {'req/s':>8s} {'yetk/s':>8s} {'POST p95':>9s} {'xato':>6s} {'locked':>8s}")
+    for spec, r in rows.items():
+        print(f"{spec:10s} {r['rps']:8.1f} {r['deliveries']:8.1f} {r['p95_post'] * 1000:7.1f}ms "
+              f"{r['errors']:6d} {r['locked_pct']:7.2f}%")
+
+
+if __name__ == "__main__":
+    main()
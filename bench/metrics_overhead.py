@@ -0,0 +1,83 @@
+# bench/metrics_overhead.py
+"""
+MetricsMiddleware + SQL hodisalari narxi: bir xil sahifalar o'lchovlar bilan va ularsiz
+(ASGI, tarmoqsiz, jarayon ichida). Har route uchun p50 kechikish va farq.
+
+    python -m bench.metrics_overhead [-n 2000] [--products 200]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='sklad-bench-'), 'bench.db')}")
+
+import httpx
+from sqlalchemy import event
+from starlette.middleware import Middleware
+
+from app import crud, metrics, models
+from app.database import SessionLocal, async_engine, engine
+from app.main import app
+from app.security import sign_token
+from .common import percentiles, seed_basic
+
+
+def set_metrics(on: bool) -> None:
+    for eng in (engine, async_engine.sync_engine):
+        for name, fn in (("before_cursor_execute", metrics._before), ("after_cursor_execute", metrics._after)):
+            if on and not event.contains(eng, name, fn):
+                event.listen(eng, name, fn)
+            elif not on and event.contains(eng, name, fn):
+                event.remove(eng, name, fn)
+    app.user_middleware = [m for m in app.user_middleware if m.cls is not metrics.MetricsMiddleware]
+    if on:
+        app.user_middleware.insert(0, Middleware(metrics.MetricsMiddleware))
+    app.middleware_stack = None   # Starlette keyingi so'rovda qayta quradi
+
+
+async def run(paths: dict[str, tuple[str, str]], n: int) -> dict[str, float]:
+    out = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as http:
+        for name, (path, cookie) in paths.items():
+            samples = []
+            for i in range(n):
+                t0 = time.perf_counter()
+                r = await http.get(path, cookies={"session": cookie})
+                samples.append(time.perf_counter() - t0)
+                assert r.status_code == 200, (path, r.status_code)
+            out[name] = percentiles(samples[n // 10:])[50]
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=2000)
+    ap.add_argument("--products", type=int, default=200)
+    args = ap.parse_args(argv)
+
+    with SessionLocal() as db:
+        district_id, shop_ids, _ = seed_basic(db, products=args.products, shops=50)
+        admin = crud.ensure_user(db, "bench-admin", role=models.Role.admin)
+        dealer = crud.ensure_user(db, "bench-dealer", role=models.Role.dealer)
+        a = sign_token({"user_id": admin.id, "role": "admin"})
+        d = sign_token({"user_id": dealer.id, "role": "dealer"})
+    paths = {
+        "/admin/stock": ("/admin/stock", a),
+        "/admin/monitor": ("/admin/monitor", a),
+        "/dealer/deliver": (f"/dealer/deliver?district_id={district_id}&shop_id={shop_ids[0]}", d),
+    }
+    results = {}
+    for on in (False, True, False, True):   # ikki marta — tartib ta'sirini kamaytirish uchun
+        set_metrics(on)
+        for k, v in asyncio.run(run(paths, args.n)).items():
+            results.setdefault((k, on), []).append(v)
+    for name in paths:
+        off, on = min(results[(name, False)]), min(results[(name, True)])
+        print(f"{name:18s} o'lchovsiz p50={off * 1000:6.2f}ms  o'lchov bilan p50={on * 1000:6.2f}ms  "
+              f"(+{(on - off) * 1e6:5.0f} µs)")
+
+
+if __name__ == "__main__":
+    main()
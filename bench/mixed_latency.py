@@ -0,0 +1,111 @@
+# bench/mixed_latency.py
+"""
+Aralash yuklama: adminlar og'ir /admin/monitor?days=N ni to'xtovsiz yangilaydi, dilerlar esa
+yengil sahifalarni ochadi. Har route uchun p50/p95/p99 kechikish chiqariladi — og'ir hisobotlar
+diler sahifalarini navbatga qo'ymayotganini tekshirish uchun (commitlar orasida solishtiring).
+--jobs — uzun oraliq app.worker jarayonida hisoblanadi (JOBS_ENABLED), aks holda so'rov ichida.
+
+    python -m bench.mixed_latency [--deliveries 50000] [--admins 8] [--dealers 32] [--seconds 10]
+                                  [--days 90] [--jobs]
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+from app import crud, models
+from app.database import make_engine, Base
+from app.security import sign_token
+from sqlalchemy.orm import sessionmaker
+from .common import seed_basic, seed_deliveries, uvicorn_server, percentiles
+
+
+def prepare(url: str, deliveries: int):
+    engine = make_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine, autoflush=False)() as db:
+        district_id, shop_ids, product_ids = seed_basic(db, products=30, shops=200)
+        seed_deliveries(db, district_id, shop_ids, product_ids, deliveries)
+        admin = crud.ensure_user(db, "bench-admin", role=models.Role.admin)
+        dealer = crud.ensure_user(db, "bench-dealer", role=models.Role.dealer)
+        cookies = {
+            "admin": sign_token({"user_id": admin.id, "role": "admin"}),
+            "dealer": sign_token({"user_id": dealer.id, "role": "dealer"}),
+        }
+    engine.dispose()
+    return district_id, shop_ids, cookies
+
+
+async def client(base, path, cookie, warm_until, stop, samples, errors):
+    async with aiohttp.ClientSession(cookies={"session": cookie}) as http:
+        while time.monotonic() < stop:
+            measured = time.monotonic() >= warm_until   # qizish (pool ulanishlari ochilishi) hisobga olinmaydi
+            t0 = time.perf_counter()
+            try:
+                async with http.get(base + path, allow_redirects=False) as r:
+                    await r.read()
+                    if r.status != 200:
+                        errors.append(r.status)
+                        continue
+            except aiohttp.ClientError as e:
+                errors.append(repr(e))
+                continue
+            if measured:
+                samples.append(time.perf_counter() - t0)
+
+
+async def drive(base, district_id, shop_ids, cookies, admins, dealers, seconds, days=90, warmup=2.0):
+    warm_until = time.monotonic() + warmup
+    stop = warm_until + seconds
+    routes = {
+        f"admin /admin/monitor?days={days}": (f"/admin/monitor?days={days}", "admin", admins),
+        "dealer /dealer/start": ("/dealer/start", "dealer", dealers // 2),
+        "dealer /dealer/deliver": (f"/dealer/deliver?district_id={district_id}&shop_id={shop_ids[0]}",
+                                   "dealer", dealers - dealers // 2),
+    }
+    results, tasks = {}, []
+    for name, (path, role, n) in routes.items():
+        samples, errors = [], []
+        results[name] = (samples, errors)
+        tasks += [client(base, path, cookies[role], warm_until, stop, samples, errors) for _ in range(n)]
+    await asyncio.gather(*tasks)
+    for name, (samples, errors) in results.items():
+        p = percentiles(samples)
+        print(f"{name:32s} n={len(samples):6d} err={len(errors):4d}  "
+              f"p50={p[50] * 1000:7.1f}ms p95={p[95] * 1000:7.1f}ms p99={p[99] * 1000:7.1f}ms")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--deliveries", type=int, default=50000)
+    ap.add_argument("--admins", type=int, default=8)
+    ap.add_argument("--dealers", type=int, default=32)
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--days", type=int, default=90)
+    ap.add_argument("--jobs", action="store_true", help="uzun oraliq — app.worker orqali")
+    args = ap.parse_args(argv)
+
+    tmpdir = tempfile.mkdtemp(prefix="sklad-bench-")
+    url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    district_id, shop_ids, cookies = prepare(url, args.deliveries)
+    os.environ["JOBS_ENABLED"] = "1" if args.jobs else "0"
+    worker = None
+    if args.jobs:
+        worker = subprocess.Popen([sys.executable, "-m", "app.worker"], env=dict(os.environ, DATABASE_URL=url))
+    try:
+        with uvicorn_server(url) as base:
+            asyncio.run(drive(base, district_id, shop_ids, cookies, args.admins, args.dealers,
+                              args.seconds, args.days))
+    finally:
+        if worker is not None:
+            worker.terminate()
+            worker.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
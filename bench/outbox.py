@@ -0,0 +1,69 @@
+# bench/outbox.py
+"""
+Outbox bildirishnomalari: (1) yetkazish yozish yo'liga qo'shimcha xarajat — bildirishnomalar o'chiq
+va yoqiq (--chats ta qabul qiluvchi); (2) yig'ilib qolgan hodisalarni bot.notifier bilan yuborish —
+hodisalar soni va Telegram'ga ketgan xabarlar soni (digest), soxta Telegram kechikishi bilan.
+
+    python -m bench.outbox [-n 500] [--chats 2] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import time
+
+from aiogram import Bot
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import outbox, services
+from app.database import make_async_engine
+from app.settings import settings
+from bot.fake import FakeTelegramSession
+from bot.notifier import Notifier
+from .common import temp_sessionmaker, seed_basic, rate
+
+
+async def drain(url: str, latency: float) -> tuple[int, int, float]:
+    engine = make_async_engine(url)
+    factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    bot = Bot("42:fake", session=FakeTelegramSession(latency=latency))
+    notifier = Notifier(bot, factory, chat_interval=0)
+    t0 = time.perf_counter()
+    while await notifier.run_once():
+        pass
+    elapsed = time.perf_counter() - t0
+    await engine.dispose()
+    stats = notifier.stats()
+    return stats["events"], stats["messages"], elapsed
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=500)
+    ap.add_argument("--chats", type=int, default=2)
+    ap.add_argument("--latency", type=float, default=0.05)
+    args = ap.parse_args(argv)
+
+    chats = ",".join(str(1000 + i) for i in range(args.chats))
+    for name, ids in (("off", ""), ("on", chats)):
+        settings.NOTIFY_CHAT_IDS, settings.ADMIN_TG_IDS = ids, ids
+        settings.BOT_FAKE = bool(ids)   # outbox faqat bot yoqilganda yoziladi
+        with temp_sessionmaker() as Session:
+            with Session() as db:
+                district_id, shop_ids, product_ids = seed_basic(db)
+
+                def one(i):
+                    services.deliver(db, district_id=district_id, shop_id=shop_ids[i % len(shop_ids)],
+                                     product_id=product_ids[i % len(product_ids)], qty_kg=1.5, pay_kind="qarz")
+
+                print(f"deliver, bildirishnoma {name:3s} {rate(args.n, one):8.1f} deliveries/s")
+                queued = outbox.stats(db)["pending"]
+            if ids:
+                url = Session.kw["bind"].url.render_as_string(hide_password=False)
+                events, messages, elapsed = asyncio.run(drain(url, args.latency))
+                assert events == queued, (events, queued)
+                print(f"notifier: {events} hodisa -> {messages} xabar, {elapsed:.2f} s "
+                      f"(Telegram kechikishi {args.latency * 1000:.0f} ms; har hodisa alohida bo'lsa "
+                      f"~{events * args.latency / args.chats:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# bench/render.py
+"""
+Shablon renderi mikro-benchmarki (baza kerak emas, ma'lumotnoma sun'iy):
+
+1) barcha shablonlarni kompilyatsiya: bytecode keshisiz va issiq bytecode kesh bilan (yangi jarayon holati);
+2) dealer/deliver.html, dealer/select_shop.html, admin/balances.html renderi: fragment keshisiz va kesh bilan.
+
+    python -m bench.render [--products 300] [--shops 200] [--n 2000]
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+
+from app.cache import TTLCache
+from app.refdata import DistrictRef, ProductRef, ShopRef
+from app.templating import make_environment, precompile
+
+
+def compile_time(bytecode_dir: str | None, rounds: int = 5) -> float:
+    """Yangi Environment bilan barcha shablonlarni yuklash (o'rtacha, ms)."""
+    total = 0.0
+    for _ in range(rounds):
+        env = make_environment(bytecode_dir=bytecode_dir, auto_reload=False)
+        t0 = time.perf_counter()
+        precompile(env)
+        total += time.perf_counter() - t0
+    return total / rounds * 1000
+
+
+def contexts(n_products: int, n_shops: int) -> dict[str, dict]:
+    districts = tuple(DistrictRef(id=i, name=f"Tuman {i}") for i in range(1, 31))
+    shops = tuple(ShopRef(id=i, name=f"Do'kon {i}", district_id=1) for i in range(1, n_shops + 1))
+    products = tuple(
+        ProductRef(id=i, name=f"Mahsulot {i}", kind=None, brand=None, price_per_kg=1000.0 + i,
+                   in_price_per_pack=None, out_price_per_pack=None, is_active=True)
+        for i in range(1, n_products + 1)
+    )
+    items = [
+        {"id": s.id, "name": s.name, "district_id": 1, "balance": 1000.0 * s.id, "last_tx_at": None}
+        for s in shops[:50]
+    ]
+    return {
+        "dealer/deliver.html": {"district_id": 1, "shop_id": 1, "products": products, "ref_version": 1},
+        "dealer/select_shop.html": {"district_id": 1, "shops": shops, "ref_version": 1},
+        "admin/balances.html": {"items": items, "districts": districts, "district_id": 1, "ref_version": 1},
+    }
+
+
+def render_rate(env, name: str, ctx: dict, n: int) -> float:
+    tpl = env.get_template(name)
+    tpl.render(ctx)  # isitish
+    t0 = time.perf_counter()
+    for _ in range(n):
+        tpl.render(ctx)
+    return n / (time.perf_counter() - t0)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--products", type=int, default=300)
+    ap.add_argument("--shops", type=int, default=200)
+    ap.add_argument("--n", type=int, default=2000)
+    args = ap.parse_args(argv)
+
+    bcc_dir = tempfile.mkdtemp(prefix="sklad-jinja-")
+    try:
+        cold = compile_time(None)
+        precompile(make_environment(bytecode_dir=bcc_dir))  # keshni to'ldirish
+        warm = compile_time(bcc_dir)
+    finally:
+        shutil.rmtree(bcc_dir)
+    print(f"kompilyatsiya: bytecode keshsiz {cold:7.1f} ms, kesh bilan {warm:7.1f} ms ({cold / warm:.1f}x)")
+
+    plain = make_environment(auto_reload=False)
+    cached = make_environment(auto_reload=False, fragment_cache=TTLCache(maxsize=64, ttl=3600))
+    for name, ctx in contexts(args.products, args.shops).items():
+        a = render_rate(plain, name, ctx, args.n)
+        b = render_rate(cached, name, ctx, args.n)
+        if plain.get_template(name).render(ctx) != cached.get_template(name).render(ctx):
+            print(f"{name}: fragment kesh bilan HTML farq qiladi!")
+            return 1
+        print(f"{name:<26} keshsiz {a:9,.0f}/s, fragment kesh {b:9,.0f}/s ({b / a:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+# bench/suite.py
+"""
+crud qatlami va issiq route'lar uchun benchmark to'plami — bir xil sintetik yuklamada (bench.datagen).
+
+Har holat avtomatik takrorlanadi (kamida --min-time sekund va 5 marta, ko'pi bilan 200) —
+min / median / o'rtacha ms va bitta chaqiruvdagi SQL so'rovlar soni. O'qish holatlari avval, keyin yozishlar (nusxa bazada), oxirida
+og'ir rebuild'lar. app/crud.py'dagi qamrab olinmagan ochiq funksiyalar alohida ko'rsatiladi.
+Route'lar — TestClient orqali (keshlar ishlagan holatdagi real yo'l).
+
+    python -m bench.suite [--preset small] [--db tayyor.db] [--save bench/baselines/small.json]
+                          [--compare bench/baselines/small.json] [--filter deliveries] [--fail-over 1.5]
+
+Baseline'lar bench/baselines/ ichida; mashina boshqa bo'lsa avval o'zingizda --save qiling.
+Xuddi shu holatlar pytest ostida chegaralar bilan: python -m pytest -m benchmark (tests/test_benchmarks.py) —
+SQL so'rovlar soni baseline'dan oshsa yoki median BENCH_FAIL_OVER (3) martadan sekin bo'lsa — xato.
+"""
+import argparse
+import inspect
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+MAX_RUNS = 200
+
+
+def count_queries(fn) -> int:
+    """Bitta chaqiruvdagi SQL so'rovlar soni: route'lar — X-DB-Queries (DEBUG), crud — metrics.collect()."""
+    from app import metrics
+
+    with metrics.collect() as stats:
+        out = fn()
+    headers = getattr(out, "headers", None)
+    return int(headers["x-db-queries"]) if headers is not None else stats.queries
+
+
+def measure(fn, min_time: float) -> dict:
+    queries = count_queries(fn)   # qizdirish ham (keshlar to'lgan holatda o'lchanadi)
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < MAX_RUNS and (len(samples) < 5 or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return {"min_ms": round(min(samples), 4), "median_ms": round(statistics.median(samples), 4),
+            "mean_ms": round(statistics.fmean(samples), 4), "runs": len(samples), "queries": queries}
+
+
+def crud_cases(db):
+    """(nom, crud funksiyasi, chaqiruv) — o'qishlar, yozishlar, keyin rebuild'lar."""
+    from sqlalchemy import func, select
+    from app import crud, models
+
+    now = datetime.now()
+    d7, d90 = now - timedelta(days=7), now - timedelta(days=90)
+    mid = now - timedelta(days=120)
+    district_id = db.scalar(select(models.Shop.district_id).group_by(models.Shop.district_id)
+                            .order_by(func.count().desc()).limit(1))
+    shop_id = db.scalar(select(models.Delivery.shop_id).group_by(models.Delivery.shop_id)
+                        .order_by(func.count().desc()).limit(1))
+    product_id = db.scalar(select(models.Delivery.product_id).group_by(models.Delivery.product_id)
+                           .order_by(func.count().desc()).limit(1))
+    product_ids = list(db.scalars(select(models.Product.id).limit(20)))
+    page2 = crud.shops_page(db, size=50).next
+    dpage2 = crud.deliveries_page(db, d90, None, size=50).next
+    tpage2 = crud.shop_txs_page(db, shop_id, size=50).next
+    price = db.get(models.Product, product_id).price_per_kg or 1000.0
+    seq = iter(range(10**9))
+
+    def victim_product():
+        return crud.create_product(db, f"bench-del-{next(seq)}", None, None, 1000, None, None).id
+
+    reads = [
+        ("get_user_by_tg_id", lambda: crud.get_user_by_tg_id(db, "bench-dealer")),
+        ("list_districts", lambda: crud.list_districts(db)),
+        ("list_shops_by_district", lambda: crud.list_shops_by_district(db, district_id)),
+        ("list_products", lambda: crud.list_products(db)),
+        ("count_shops", lambda: crud.count_shops(db, district_id)),
+        ("shops_page", lambda: crud.shops_page(db, size=50)),
+        ("shops_page[next]", lambda: crud.shops_page(db, size=50, after=page2)),
+        ("last_close", lambda: crud.last_close(db)),
+        ("ledger_source", lambda: crud.ledger_source(models.Delivery, False)),
+        ("without_openings", lambda: crud.without_openings(models.ShopTransaction.__table__.c,
+                                                           select(models.ShopTransaction.id))),
+        ("stock_openings", lambda: crud.stock_openings(db)),
+        ("stock_balances_for", lambda: crud.stock_balances_for(db, product_ids)),
+        ("stock_balance_for_product", lambda: crud.stock_balance_for_product(db, product_id)),
+        ("stock_balance_for_product[as_of]", lambda: crud.stock_balance_for_product(db, product_id, as_of=mid)),
+        ("stock_balances_all", lambda: crud.stock_balances_all(db)),
+        ("stock_balances_all[as_of]", lambda: crud.stock_balances_all(db, as_of=mid)),
+        ("stock_balances_as_of", lambda: crud.stock_balances_as_of(db, mid, product_ids)),
+        ("ledger_stock_balances", lambda: crud.ledger_stock_balances(db)),
+        ("verify_stock_balances", lambda: crud.verify_stock_balances(db)),
+        ("deliveries_agg_by_shop[7d]", lambda: crud.deliveries_agg_by_shop(db, d7, now)),
+        ("deliveries_agg_by_shop[90d]", lambda: crud.deliveries_agg_by_shop(db, d90, now)),
+        ("deliveries_agg_by_shop[90d,district]", lambda: crud.deliveries_agg_by_shop(db, d90, now, district_id)),
+        ("deliveries_agg_paykind[90d]", lambda: crud.deliveries_agg_paykind(db, d90, now)),
+        ("deliveries_agg_by_product_in_shop[90d]",
+         lambda: crud.deliveries_agg_by_product_in_shop(db, d90, now, shop_id)),
+        ("deliveries_list_with_details[90d]", lambda: crud.deliveries_list_with_details(db, d90, now)),
+        ("deliveries_page[90d]", lambda: crud.deliveries_page(db, d90, now, size=50)),
+        ("deliveries_page[90d,next]", lambda: crud.deliveries_page(db, d90, None, size=50, after=dpage2)),
+        ("list_shop_txs", lambda: crud.list_shop_txs(db, shop_id)),
+        ("shop_txs_page", lambda: crud.shop_txs_page(db, shop_id)),
+        ("shop_txs_page[next]", lambda: crud.shop_txs_page(db, shop_id, after=tpage2)),
+        ("shop_balance", lambda: crud.shop_balance(db, shop_id)),
+        ("list_balances", lambda: crud.list_balances(db)),
+        ("list_balances[district]", lambda: crud.list_balances(db, district_id)),
+        ("ledger_shop_balances", lambda: crud.ledger_shop_balances(db)),
+        ("verify_shop_balances", lambda: crud.verify_shop_balances(db)),
+    ]
+    writes = [
+        ("ensure_user", lambda: crud.ensure_user(db, f"bench-{next(seq)}")),
+        ("create_district", lambda: crud.create_district(db, f"bench-{next(seq)}")),
+        ("create_shop", lambda: crud.create_shop(db, f"bench-{next(seq)}", district_id)),
+        ("create_product", lambda: crud.create_product(db, f"bench-{next(seq)}", None, None, 1000, None, None)),
+        ("update_product_price", lambda: crud.update_product_price(db, product_id, price)),
+        ("set_product_active", lambda: crud.set_product_active(db, product_id, True)),
+        ("delete_product", lambda: crud.delete_product(db, victim_product())),
+        ("add_kirim", lambda: crud.add_kirim(db, product_id, 10.0)),
+        ("add_chiqim", lambda: crud.add_chiqim(db, product_id, 0.1, shop_id)),
+        ("add_chiqim_many", lambda: crud.add_chiqim_many(db, shop_id, [(p, 0.1) for p in product_ids[:5]])),
+        ("create_delivery", lambda: crud.create_delivery(db, district_id, shop_id, product_id, 1.0, price, "naqd")),
+        ("create_delivery_doc", lambda: crud.create_delivery_doc(
+            db, district_id, shop_id, "qarz", [(p, 1.0, price) for p in product_ids[:5]])),
+        ("add_shop_tx", lambda: crud.add_shop_tx(db, shop_id, models.TxKind.payment, 1000.0)),
+        ("write_stock_checkpoint", lambda: (crud.add_kirim(db, product_id, 1.0), crud.write_stock_checkpoint(db))),
+    ]
+    rebuilds = [
+        ("ensure_stock_balances", lambda: crud.ensure_stock_balances(db)),
+        ("ensure_delivery_rollup", lambda: crud.ensure_delivery_rollup(db)),
+        ("rebuild_stock_balances", lambda: crud.rebuild_stock_balances(db)),
+        ("rebuild_delivery_rollup", lambda: crud.rebuild_delivery_rollup(db)),
+        ("rebuild_shop_balances", lambda: crud.rebuild_shop_balances(db)),
+    ]
+    return reads + writes + rebuilds
+
+
+def route_cases(client, db):
+    from sqlalchemy import func, select
+    from app import models
+    from app.security import sign_token
+
+    admin = db.scalar(select(models.User).where(models.User.tg_id == "bench-admin"))
+    dealer = db.scalar(select(models.User).where(models.User.tg_id == "bench-dealer"))
+    a = sign_token({"user_id": admin.id, "role": "admin"})
+    d = sign_token({"user_id": dealer.id, "role": "dealer"})
+    shop = db.scalar(select(models.Shop).order_by(models.Shop.id).limit(1))
+    product_id = db.scalar(select(models.StockBalance.product_id).order_by(models.StockBalance.qty_kg.desc()).limit(1))
+
+    def get(url, session):
+        def call():
+            client.cookies.set("session", session)
+            r = client.get(url)
+            assert r.status_code == 200, (url, r.status_code)
+            return r
+        return call
+
+    def deliver():
+        client.cookies.set("session", d)
+        r = client.post("/dealer/deliver", data={
+            "district_id": shop.district_id, "shop_id": shop.id, "product_id": product_id,
+            "qty_kg": "0.1", "pay_kind": "naqd"})
+        assert r.status_code == 200, r.status_code
+        return r
+
+    q = f"district_id={shop.district_id}&shop_id={shop.id}"
+    return [
+        ("GET /admin/stock", get("/admin/stock", a)),
+        ("GET /admin/monitor?days=7", get("/admin/monitor?days=7", a)),
+        ("GET /admin/monitor?days=90", get("/admin/monitor?days=90", a)),
+        ("GET /admin/balances", get("/admin/balances", a)),
+        ("GET /admin/shops", get("/admin/shops", a)),
+        ("GET /admin/shops/{id}/tx", get(f"/admin/shops/{shop.id}/tx", a)),
+        ("GET /dealer/start", get("/dealer/start", d)),
+        ("GET /dealer/shops", get(f"/dealer/shops?district_id={shop.district_id}", d)),
+        ("GET /dealer/deliver", get(f"/dealer/deliver?{q}", d)),
+        ("GET /api/v1/products", get("/api/v1/products", d)),
+        ("POST /dealer/deliver", deliver),
+    ]
+
+
+def uncovered(names) -> list[str]:
+    from app import crud
+    covered = {n.split("[")[0] for n in names}
+    public = [n for n, f in inspect.getmembers(crud, inspect.isfunction)
+              if not n.startswith("_") and f.__module__ == crud.__name__]
+    return sorted(set(public) - covered)
+
+
+def regressions(name: str, r: dict, b: dict, fail_over: float | None) -> list[str]:
+    """Baseline'ga nisbatan yomonlashuvlar: SQL so'rovlar ko'paygan yoki median fail_over martadan sekin."""
+    out = []
+    if "queries" in b and r["queries"] > b["queries"]:
+        out.append(f"{name}: SQL so'rovlar {b['queries']} -> {r['queries']}")
+    # sub-millisekund holatlarda shovqin katta — 1 ms mutlaq zaxira
+    if fail_over and r["median_ms"] > b["median_ms"] * fail_over + 1.0:
+        out.append(f"{name}: median {b['median_ms']:.3f} -> {r['median_ms']:.3f} ms")
+    return out
+
+
+def compare(results: dict, baseline: dict, fail_over: float | None) -> int:
+    worse = 0
+    print(f"\n{'holat':48s} {'baseline':>10s} {'hozir':>10s} {'nisbat':>7s} {'SQL':>7s}")
+    for name, r in results.items():
+        b = baseline.get("results", {}).get(name)
+        if not b:
+            print(f"{name:48s} {'—':>10s} {r['median_ms']:10.3f}")
+            continue
+        ratio = r["median_ms"] / b["median_ms"] if b["median_ms"] else float("inf")
+        flag = ""
+        if regressions(name, r, b, fail_over):
+            flag, worse = "  ⚠️", worse + 1
+        print(f"{name:48s} {b['median_ms']:10.3f} {r['median_ms']:10.3f} {ratio:6.2f}x "
+              f"{b.get('queries', '?')!s:>3}->{r['queries']:<3d}{flag}")
+    return 1 if worse else 0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--preset", choices=("small", "medium", "large"), default="small")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--db", help="tayyor baza (bench.datagen); nusxasida ishlanadi")
+    ap.add_argument("--min-time", type=float, default=0.3)
+    ap.add_argument("--filter", default="", help="faqat nomida shu matn bor holatlar")
+    ap.add_argument("--save", help="natijani JSON'ga yozish")
+    ap.add_argument("--compare", help="baseline JSON bilan solishtirish")
+    ap.add_argument("--fail-over", type=float, help="median baseline'dan shuncha marta sekin bo'lsa — exit 1")
+    args = ap.parse_args(argv)
+
+    tmpdir = tempfile.mkdtemp(prefix="sklad-suite-")
+    path = os.path.join(tmpdir, "suite.db")
+    # app.settings / app.database import paytida o'qiladi — baza URL'i har qanday app importidan oldin
+    os.environ.update(DATABASE_URL=f"sqlite:///{path}", JOBS_ENABLED="0", SLOW_QUERY_MS="-1", DEBUG="1")
+    os.environ.setdefault("JINJA_BYTECODE_DIR", os.path.join(tmpdir, "jinja"))
+    from .datagen import PRESETS, generate
+
+    if args.db:
+        shutil.copyfile(args.db, path)
+    else:
+        print(f"baza: {args.preset} {PRESETS[args.preset]}")
+        generate(f"sqlite:///{path}", seed=args.seed, log=lambda *_: None, **PRESETS[args.preset])
+
+    from fastapi.testclient import TestClient
+    from app.database import SessionLocal
+    from app.main import app
+
+    results = {}
+    with SessionLocal() as db:
+        cases = [(f"routes: {n}", fn) for n, fn in route_cases(TestClient(app), db)]
+        cases = [(f"crud: {n}", fn) for n, fn in crud_cases(db)] + cases
+        for name, fn in cases:
+            if args.filter and args.filter not in name:
+                continue
+            results[name] = r = measure(fn, args.min_time)
+            print(f"{name:48s} median={r['median_ms']:9.3f}ms  min={r['min_ms']:9.3f}ms  "
+                  f"q={r['queries']:<3d} n={r['runs']}")
+    missing = uncovered(n[len("crud: "):] for n in results if n.startswith("crud: "))
+    if missing and not args.filter:
+        print(f"\nqamrab olinmagan crud funksiyalari: {', '.join(missing)}")
+
+    doc = {
+        "meta": {
+            "preset": None if args.db else args.preset, "seed": args.seed,
+            "data": PRESETS.get(args.preset) if not args.db else os.path.basename(args.db),
+            "python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+            "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPU",
+            "date": datetime.now().strftime("%Y-%m-%d"),
+        },
+        "results": results,
+    }
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(doc, f, indent=1, ensure_ascii=False)
+            f.write("\n")
+        print(f"\nsaqlandi: {args.save}")
+    rc = 0
+    if args.compare:
+        with open(args.compare) as f:
+            rc = compare(results, json.load(f), args.fail_over)
+    shutil.rmtree(tmpdir, ignore_errors=True)
+    return rc
+
+
+if __name__ == "__main__":
+    sys.exit(main())
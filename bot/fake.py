@@ -0,0 +1,43 @@
+# bot/fake.py
+"""
+Soxta Telegram: Bot API'ga so'rov yubormaydi, chaqiruvlarni `calls`ga yozadi va mos javob qaytaradi.
+Lokal ishga tushirish (BOT_FAKE=1) va benchmark/tekshiruvlar uchun.
+
+    bot = Bot("42:fake", session=FakeTelegramSession())
+    ...
+    bot.session.calls  # [(method_nomi, method_obyekti), ...]
+"""
+import asyncio
+import itertools
+from datetime import datetime, timezone
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import SendMessage, TelegramMethod
+from aiogram.types import Chat, Message
+
+
+class FakeTelegramSession(BaseSession):
+    def __init__(self, latency: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency      # Telegram javob vaqtini taqlid qilish (sekund)
+        self.calls: list[tuple[str, TelegramMethod]] = []
+        self._ids = itertools.count(1)
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: int | None = None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.calls.append((method.__api_method__, method))
+        if isinstance(method, SendMessage):
+            return Message(
+                message_id=next(self._ids),
+                date=datetime.now(timezone.utc),
+                chat=Chat(id=method.chat_id, type="private"),
+                text=method.text,
+            )
+        return True
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        yield b""
+
+    async def close(self) -> None:
+        pass
@@ -1,35 +1,39 @@
 # bot/handlers/start.py
-from aiogram import Router, F
+from aiogram import Router
+from aiogram.filters import CommandStart
 from aiogram.types import Message
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from urllib.parse import quote
+from sqlalchemy.ext.asyncio import AsyncSession
 
-router = Router()
+from app.models import Role
+from app.security import magic_link, user_by_tg_id
+from app.settings import settings
 
-WEB_BASE = "https://your-host"        # prod domeningiz (lokalda http://127.0.0.1:8000)
-ADMIN_NEXT = "/admin"
-DEALER_NEXT = "/dealer/start"
 
-@router.message(F.text == "/start")
-async def start(m: Message):
-    user = m.from_user
-    tg_id = user.id
-    full_name = (user.full_name or "").strip()
+async def start(m: Message, db: AsyncSession):
+    # magic link — faqat foydalanuvchining o'z shaxsiy chatiga (guruhga yoki boshqa chatga emas)
+    if m.from_user is None or m.chat.id != m.from_user.id:
+        await m.answer("Panelga kirish havolasini olish uchun botga shaxsiy xabar yozing.")
+        return
+    tg_id = str(m.from_user.id)
+    user = await user_by_tg_id(db, tg_id)
 
-    # admin va dealer tugmalari (misol sifatida)
+    # /auth/magic rolga qarab o'zi yo'naltiradi — bitta tugma yetarli
     kb = InlineKeyboardBuilder()
-    kb.button(
-        text="👨‍💼 Admin panel",
-        url=f"{WEB_BASE}/auth/set?tg_id={tg_id}&full_name={quote(full_name)}&next={quote(ADMIN_NEXT)}"
-    )
-    kb.button(
-        text="🧑‍🔧 Diler panel",
-        url=f"{WEB_BASE}/auth/set?tg_id={tg_id}&full_name={quote(full_name)}&next={quote(DEALER_NEXT)}"
-    )
-    kb.adjust(1, 1)
+    if user is not None and user.role == Role.admin:
+        kb.button(text="👨‍💼 Admin panel", url=magic_link(tg_id, settings.WEB_BASE))
+    else:
+        kb.button(text="🧑‍🔧 Diler panel", url=magic_link(tg_id, settings.WEB_BASE))
 
     await m.answer(
         "Salom! Kerakli panelni tanlang.\n"
         "⚠️ Eslatma: faqat bazada ro‘yxatga olingan ID’lar kira oladi.",
         reply_markup=kb.as_markup()
     )
+
+
+def make_router() -> Router:
+    """Har dispatcher uchun yangi Router (aiogram'da router faqat bitta ota-dispatcher'ga ulanadi)."""
+    router = Router(name="start")
+    router.message.register(start, CommandStart())
+    return router
@@ -0,0 +1,124 @@
+# bot/notifier.py
+"""
+Outbox worker: `outbox` jadvalini NOTIFY_POLL_INTERVAL'da bir partiyalab o'qiydi va admin chatlariga yuboradi.
+
+- Bir chatga yig'ilgan qatorlar — bitta xabar (app.outbox.digest).
+- Chatga xabarlar orasida kamida NOTIFY_CHAT_INTERVAL: bu vaqtda kelgan hodisalar kutib turadi va
+  keyingi xabarga qo'shiladi (portlash — bitta digest).
+- Telegram "retry after" — chat shuncha vaqt to'xtatiladi, urinish hisoblanmaydi; bot bloklangan /
+  chat topilmagan — qayta urinilmaydi; boshqa xatolar — eksponensial kutish, NOTIFY_MAX_ATTEMPTS'gacha.
+- Hammasi bazada: jarayon qayta ishga tushsa yuborilmaganlar (ijarasi o'tgach) qayta olinadi.
+"""
+import asyncio
+import logging
+import time
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+
+from app import outbox
+from app.database import AsyncSessionLocal
+from app.settings import settings
+
+log = logging.getLogger(__name__)
+
+LEASE_SEC = 60
+PURGE_EVERY_SEC = 3600
+
+
+class Notifier:
+    def __init__(
+        self,
+        bot: Bot,
+        session_factory=AsyncSessionLocal,
+        poll_interval: float = settings.NOTIFY_POLL_INTERVAL,
+        chat_interval: float = settings.NOTIFY_CHAT_INTERVAL,
+        batch: int = settings.NOTIFY_BATCH,
+    ):
+        self.bot = bot
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.chat_interval = chat_interval
+        self.batch = batch
+        self._next_ok: dict[str, float] = {}   # chat_id -> monotonic vaqt
+        self._task: asyncio.Task | None = None
+        self._stopping = asyncio.Event()
+        self._purged_at = 0.0
+        self.sent_messages = 0
+        self.sent_events = 0
+        self.failures = 0
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Joriy partiya tugashini kutadi (tranzaksiya o'rtasida bekor qilinsa SQLite qulfi qolib ketadi)."""
+        if self._task is None:
+            return
+        self._stopping.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                n = await self.run_once()
+            except Exception:
+                log.exception("outbox partiyasi yuborilmadi")
+                n = 0
+            # to'la partiya — navbat hali bor, kutmasdan davom etamiz
+            if n < self.batch:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def run_once(self) -> int:
+        """Bitta partiya: ijaraga olish, chatlar bo'yicha digest, natijani yozish. Olingan qatorlar soni."""
+        now = time.monotonic()
+        busy = [chat for chat, t in self._next_ok.items() if t > now]
+        async with self.session_factory() as db:
+            if now - self._purged_at > PURGE_EVERY_SEC:
+                self._purged_at = now
+                await db.run_sync(outbox.purge, settings.NOTIFY_KEEP_DAYS)
+            rows = await db.run_sync(outbox.claim, self.batch, LEASE_SEC, busy)
+            if not rows:
+                return 0
+            by_chat: dict[str, list] = {}
+            for r in rows:
+                by_chat.setdefault(r.chat_id, []).append(r)
+            results = await asyncio.gather(*(self._send(chat, items) for chat, items in by_chat.items()))
+            for action, ids, arg in results:
+                if action == "sent":
+                    await db.run_sync(outbox.mark_sent, ids)
+                elif action == "defer":
+                    await db.run_sync(outbox.defer, ids, arg)
+                else:
+                    await db.run_sync(outbox.mark_failed, ids, arg, action == "dead")
+        return len(rows)
+
+    async def _send(self, chat_id: str, rows: list) -> tuple[str, list[int], object]:
+        ids = [r.id for r in rows]
+        self._next_ok[chat_id] = time.monotonic() + self.chat_interval
+        try:
+            await self.bot.send_message(chat_id, outbox.digest([r.text for r in rows]))
+        except TelegramRetryAfter as e:
+            self._next_ok[chat_id] = time.monotonic() + e.retry_after
+            return "defer", ids, e.retry_after
+        except (TelegramForbiddenError, TelegramBadRequest) as e:
+            # bot bloklangan / chat yo'q — qayta urinish foydasiz
+            self.failures += 1
+            return "dead", ids, str(e)
+        except Exception as e:
+            self.failures += 1
+            log.warning("chat %s ga yuborilmadi: %r", chat_id, e)
+            return "retry", ids, repr(e)
+        self.sent_messages += 1
+        self.sent_events += len(ids)
+        return "sent", ids, None
+
+    def stats(self) -> dict:
+        return {"messages": self.sent_messages, "events": self.sent_events, "failures": self.failures}
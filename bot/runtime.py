@@ -0,0 +1,120 @@
+# bot/runtime.py
+"""
+Bot runtime: webhook'dan kelgan update'lar navbatga tushadi va BOT_CONCURRENCY ta worker
+ularni parallel ishlaydi. Long-polling yo'q — bot FastAPI jarayoni ichida, app bilan bir xil
+engine (AsyncSessionLocal) va keshlardan foydalanadi.
+
+Webhook darhol javob qaytaradi (Telegram 60 s kutmaydi); navbat to'lsa feed() False qaytaradi —
+route 503 beradi, Telegram update'ni keyinroq qayta yuboradi.
+
+    runtime = BotRuntime(make_bot())
+    await runtime.start()
+    runtime.feed(update_json)
+    await runtime.stop()
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.types import TelegramObject, Update
+
+from app.database import AsyncSessionLocal
+from app.settings import settings
+from .handlers import start
+
+log = logging.getLogger(__name__)
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    """Har update uchun bitta AsyncSession — handler'larga `db` argumenti."""
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        async with self.session_factory() as db:
+            data["db"] = db
+            return await handler(event, data)
+
+
+def make_dispatcher(session_factory=AsyncSessionLocal) -> Dispatcher:
+    dp = Dispatcher()
+    dp.update.outer_middleware(DbSessionMiddleware(session_factory))
+    dp.include_router(start.make_router())
+    return dp
+
+
+def make_bot() -> Bot:
+    if settings.BOT_FAKE:
+        from .fake import FakeTelegramSession
+        return Bot(settings.BOT_TOKEN or "42:fake", session=FakeTelegramSession())
+    return Bot(settings.BOT_TOKEN)
+
+
+class BotRuntime:
+    def __init__(
+        self,
+        bot: Bot,
+        dp: Dispatcher | None = None,
+        concurrency: int = settings.BOT_CONCURRENCY,
+        queue_size: int = settings.BOT_QUEUE_SIZE,
+    ):
+        self.bot = bot
+        self.dp = dp or make_dispatcher()
+        self.concurrency = concurrency
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=queue_size)
+        self._workers: list[asyncio.Task] = []
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    async def start(self) -> None:
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    def feed(self, data: dict) -> bool:
+        """Webhook JSON'ini navbatga qo'yadi. Navbat to'la bo'lsa — False."""
+        try:
+            self.queue.put_nowait(data)
+            return True
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+
+    async def _worker(self) -> None:
+        while True:
+            data = await self.queue.get()
+            try:
+                update = Update.model_validate(data, context={"bot": self.bot})
+                await self.dp.feed_update(self.bot, update)
+                self.processed += 1
+            except Exception:
+                self.failed += 1
+                log.exception("update %s ishlanmadi", data.get("update_id"))
+            finally:
+                self.queue.task_done()
+
+    async def drain(self) -> None:
+        """Navbatdagi hamma update ishlanguncha kutadi."""
+        await self.queue.join()
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        try:
+            await asyncio.wait_for(self.drain(), timeout)
+        except asyncio.TimeoutError:
+            log.warning("bot to'xtatilmoqda: %d ta update ishlanmay qoldi", self.queue.qsize())
+        for w in self._workers:
+            w.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await self.bot.session.close()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(), "processed": self.processed,
+            "failed": self.failed, "rejected": self.rejected, "concurrency": self.concurrency,
+        }
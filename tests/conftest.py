@@ -0,0 +1,75 @@
+# tests/conftest.py
+"""
+Testlar vaqtinchalik fayl-SQLite bazada. app.settings / app.database import paytida o'qiladi —
+muhit o'zgaruvchilari har qanday app importidan oldin o'rnatiladi.
+
+    python -m pytest -q                 # oddiy testlar
+    python -m pytest -q -m benchmark    # benchmark chegaralari (tests/test_benchmarks.py)
+"""
+import os
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="sklad-test-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(_tmp, 'test.db')}",
+    JINJA_BYTECODE_DIR=os.path.join(_tmp, "jinja"),
+    JOBS_ENABLED="0",
+    SLOW_QUERY_MS="-1",
+    BOT_TOKEN="",
+    BOT_FAKE="0",
+)
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import crud, models  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.refdata import refdata  # noqa: E402
+from app.report_cache import report_cache  # noqa: E402
+from app.security import sign_token, tg_user_cache, user_cache  # noqa: E402
+from app.templating import templates  # noqa: E402
+
+
+def reset() -> None:
+    """Bo'sh jadvallar va bo'sh jarayon keshlari."""
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    refdata.bump()
+    report_cache.clear()
+    user_cache.clear()
+    tg_user_cache.clear()
+    if templates.env.fragment_cache is not None:
+        templates.env.fragment_cache.clear()
+
+
+@pytest.fixture
+def db():
+    """Har test — toza baza (reset)."""
+    reset()
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def login(db, tg_id: str, role: models.Role) -> TestClient:
+    """Sessiya cookie'si (security.sign_token) bilan TestClient."""
+    user = crud.ensure_user(db, tg_id, role=role)
+    return TestClient(app, cookies={"session": sign_token({"user_id": user.id, "role": role.value})})
+
+
+@pytest.fixture
+def admin(db):
+    return login(db, "1", models.Role.admin)
+
+
+@pytest.fixture
+def dealer(db):
+    return login(db, "2", models.Role.dealer)
+
+
+@pytest.fixture
+def shop(db):
+    district = crud.create_district(db, "Chilonzor")
+    return crud.create_shop(db, "Do'kon 1", district.id)
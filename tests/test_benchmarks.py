@@ -0,0 +1,56 @@
+"""
+bench.suite holatlari pytest ostida (small preset, seed 42) — bench/baselines/small.json bilan:
+SQL so'rovlar soni baseline'dan oshmasligi, median esa BENCH_FAIL_OVER (3) martadan sekin emasligi kerak.
+Oddiy yurishda o'chirilgan (pytest.ini: -m "not benchmark"):
+
+    python -m pytest -q -m benchmark
+    BENCH_FAIL_OVER=5 python -m pytest -q -m benchmark    # sekin mashinada
+
+Boshqa mashinada vaqtlar bo'yicha yiqilsa — avval baseline'ni o'zingizda yangilang:
+    python -m bench.suite --save bench/baselines/small.json
+"""
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.settings import settings
+from bench import suite
+from bench.datagen import PRESETS, generate
+
+from .conftest import reset
+
+pytestmark = pytest.mark.benchmark
+
+FAIL_OVER = float(os.environ.get("BENCH_FAIL_OVER", "3"))
+MIN_TIME = 0.1
+
+with open(os.path.join(os.path.dirname(__file__), "..", "bench", "baselines", "small.json")) as f:
+    _doc = json.load(f)
+BASELINE, SEED = _doc["results"], _doc["meta"]["seed"]
+
+
+@pytest.fixture(scope="module")
+def cases():
+    """Baza bir marta to'ldiriladi; holatlar baseline tartibida (yozuvchi holatlar keyingilariga ta'sir qiladi)."""
+    reset()   # keshlar ham bo'shaydi — generate() o'z engine'i bilan yozadi
+    generate(settings.DATABASE_URL, seed=SEED, log=lambda *_: None, **PRESETS["small"])
+    with pytest.MonkeyPatch.context() as mp, SessionLocal() as db:
+        mp.setattr(settings, "DEBUG", True)   # route'lar uchun X-DB-Queries
+        found = {f"crud: {n}": fn for n, fn in suite.crud_cases(db)}
+        found.update({f"routes: {n}": fn for n, fn in suite.route_cases(TestClient(app), db)})
+        yield found
+    reset()
+
+
+def test_every_crud_function_covered(cases):
+    assert suite.uncovered(n[len("crud: "):] for n in cases if n.startswith("crud: ")) == []
+
+
+@pytest.mark.parametrize("name", list(BASELINE))
+def test_within_baseline(cases, name):
+    r = suite.measure(cases[name], MIN_TIME)
+    assert suite.regressions(name, r, BASELINE[name], FAIL_OVER) == []
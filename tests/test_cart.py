@@ -0,0 +1,36 @@
+# tests/test_cart.py
+from app import crud, models
+
+
+def test_cart_skips_unpriced_product(db, dealer, shop):
+    a = crud.create_product(db, "A", None, None, 1000, None, None)
+    b = crud.create_product(db, "B", None, None, None, None, None)   # narxsiz — maydon disabled
+    c = crud.create_product(db, "C", None, None, 3000, None, None)
+    for p in (a, b, c):
+        crud.add_kirim(db, p.id, 100)
+
+    page = dealer.get(f"/dealer/cart?district_id={shop.district_id}&shop_id={shop.id}")
+    assert f'name="qty_{b.id}"' in page.text
+
+    # brauzer disabled maydonni yubormaydi
+    r = dealer.post("/dealer/cart", data={
+        "district_id": shop.district_id, "shop_id": shop.id, "pay_kind": "naqd",
+        f"qty_{a.id}": "2", f"qty_{c.id}": "7",
+    })
+    assert r.status_code == 200 and "alert-danger" not in r.text
+
+    db.expire_all()
+    lines = {d.product_id: d.qty_kg for d in db.query(models.Delivery)}
+    assert lines == {a.id: 2.0, c.id: 7.0}
+    assert crud.stock_balance_for_product(db, b.id) == 100.0
+    assert crud.stock_balance_for_product(db, c.id) == 93.0
+
+
+def test_cart_rejects_forged_unpriced_quantity(db, dealer, shop):
+    b = crud.create_product(db, "B", None, None, None, None, None)
+    crud.add_kirim(db, b.id, 100)
+    r = dealer.post("/dealer/cart", data={
+        "district_id": shop.district_id, "shop_id": shop.id, f"qty_{b.id}": "5",
+    })
+    assert "narx belgilanmagan" in r.text
+    assert db.query(models.Delivery).count() == 0
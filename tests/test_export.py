@@ -0,0 +1,37 @@
+# tests/test_export.py
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app import crud, models
+
+
+def _csv_ids(r) -> list[int]:
+    lines = r.content.decode("utf-8-sig").splitlines()[1:]
+    return sorted(int(line.split(",")[0]) for line in lines)
+
+
+def test_deliveries_csv_follows_monitor_window(db, admin, shop):
+    p = crud.create_product(db, "Un", None, None, 1000, None, None)
+    old = crud.create_delivery(db, shop.district_id, shop.id, p.id, 1.0, 1000, "naqd")
+    new = crud.create_delivery(db, shop.district_id, shop.id, p.id, 2.0, 1000, "naqd")
+    db.execute(update(models.Delivery).where(models.Delivery.id == old.id)
+               .values(created_at=datetime(2025, 3, 10, 12)))
+    db.commit()
+
+    r = admin.get("/admin/export/deliveries.csv?from=2025-03-01&to=2025-03-31")
+    assert r.status_code == 200 and _csv_ids(r) == [old.id]
+    assert "deliveries_2025-03-01_2025-04-01.csv" in r.headers["content-disposition"]
+
+    # monitor sahifasidagi CSV havolasi xuddi shu so'rov satrini uzatadi
+    page = admin.get("/admin/monitor?from=2025-03-01&to=2025-03-31")
+    assert "/admin/export/deliveries.csv?from=2025-03-01&amp;to=2025-03-31" in page.text
+
+    assert _csv_ids(admin.get("/admin/export/deliveries.csv?days=7")) == [new.id]
+
+
+def test_export_rejects_invalid_month(db, admin, shop):
+    for url in ("/admin/export/deliveries.csv", "/admin/export/stock-moves.csv", f"/admin/export/shops/{shop.id}/tx.csv"):
+        for month in ("2026-13", "2026-00", "2026-1"):
+            assert admin.get(f"{url}?month={month}").status_code == 422
+        assert admin.get(f"{url}?month=2026-12").status_code == 200
@@ -0,0 +1,22 @@
+# tests/test_outbox.py
+from app import crud, models, services
+from app.settings import settings
+
+
+def _deliver(db, shop, product):
+    services.deliver(db, district_id=shop.district_id, shop_id=shop.id, product_id=product.id,
+                     qty_kg=1.0, pay_kind="qarz")
+
+
+def test_outbox_empty_when_bot_disabled(db, shop, monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFY_CHAT_IDS", "100,200")
+    monkeypatch.setattr(settings, "BOT_TOKEN", "")
+    monkeypatch.setattr(settings, "BOT_FAKE", False)
+    p = crud.create_product(db, "Un", None, None, 1000, None, None)
+    crud.add_kirim(db, p.id, 10)
+    _deliver(db, shop, p)
+    assert db.query(models.OutboxMessage).count() == 0
+
+    monkeypatch.setattr(settings, "BOT_FAKE", True)
+    _deliver(db, shop, p)
+    assert sorted(m.chat_id for m in db.query(models.OutboxMessage)) == ["100", "200"]
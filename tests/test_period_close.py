@@ -0,0 +1,48 @@
+# tests/test_period_close.py
+import time
+from datetime import datetime
+
+from app import crud, models, services
+
+
+def _signed(kind, amount) -> float:
+    return amount if kind in (models.TxKind.payment, "payment") else -amount
+
+
+def _close(db):
+    time.sleep(1.1)               # created_at — sekund aniqligida
+    services.close_period(db, datetime.now())
+    time.sleep(1.1)
+
+
+def test_shop_history_sums_to_balance_across_closes(db, admin, shop):
+    for i in range(30):
+        crud.add_shop_tx(db, shop.id, models.TxKind.sale if i % 3 else models.TxKind.payment, 100 + i)
+    _close(db)
+    crud.add_shop_tx(db, shop.id, models.TxKind.payment, 50)
+    _close(db)
+    crud.add_shop_tx(db, shop.id, models.TxKind.sale, 7)
+
+    balance = crud.shop_balance(db, shop.id)
+    rows = crud.list_shop_txs(db, shop.id)
+    assert len(rows) == 32
+    assert not any((r.note or "").startswith(services.OPENING_NOTE) for r in rows)
+    assert abs(sum(_signed(r.kind, r.amount) for r in rows) - balance) < 1e-6
+
+    seen, cursor = [], None
+    while True:
+        page = crud.shop_txs_page(db, shop.id, size=10, after=cursor)
+        seen += page.items
+        if not page.next:
+            break
+        cursor = page.next
+    assert len(seen) == 32 and abs(sum(_signed(r.kind, r.amount) for r in seen) - balance) < 1e-6
+
+    lines = admin.get(f"/admin/export/shops/{shop.id}/tx.csv").content.decode("utf-8-sig").splitlines()[1:]
+    total = sum(_signed(kind, float(amount)) for _, _, kind, amount, _ in (line.split(",") for line in lines))
+    assert len(lines) == 32 and abs(total - balance) < 1e-6
+
+
+def test_shop_history_before_close_unchanged(db, shop):
+    crud.add_shop_tx(db, shop.id, models.TxKind.sale, 10)
+    assert [(r.kind, r.amount) for r in crud.list_shop_txs(db, shop.id)] == [(models.TxKind.sale, 10.0)]
@@ -0,0 +1,70 @@
+# tests/test_telegram.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import Role
+from app.security import SessionUser, tg_user_cache
+from app.settings import settings
+from bot.handlers.start import start
+
+UPDATE = {"update_id": 1, "message": {
+    "message_id": 1, "date": 0, "text": "/start",
+    "from": {"id": 1, "is_bot": False, "first_name": "A"}, "chat": {"id": 999, "type": "private"},
+}}
+
+
+class _Runtime:
+    def __init__(self):
+        self.fed = []
+
+    def feed(self, update) -> bool:
+        self.fed.append(update)
+        return True
+
+
+@pytest.fixture
+def runtime():
+    app.state.bot = rt = _Runtime()
+    yield rt
+    del app.state.bot
+
+
+@pytest.mark.parametrize("secret, header, status", [
+    ("", None, 403),            # sir berilmagan — webhook yopiq
+    ("", "", 403),
+    ("s3cret", None, 403),
+    ("s3cret", "wrong", 403),
+    ("s3cret", "s3cret", 200),
+])
+def test_webhook_requires_secret(runtime, monkeypatch, secret, header, status):
+    monkeypatch.setattr(settings, "BOT_WEBHOOK_SECRET", secret)
+    headers = {} if header is None else {"X-Telegram-Bot-Api-Secret-Token": header}
+    r = TestClient(app).post(settings.BOT_WEBHOOK_PATH, json=UPDATE, headers=headers)
+    assert r.status_code == status
+    assert len(runtime.fed) == (1 if status == 200 else 0)
+
+
+def _message(chat_id: int, from_id: int):
+    answers = []
+
+    async def answer(text, reply_markup=None):
+        answers.append((text, reply_markup))
+
+    m = SimpleNamespace(chat=SimpleNamespace(id=chat_id), from_user=SimpleNamespace(id=from_id), answer=answer)
+    return m, answers
+
+
+def test_start_sends_link_only_in_private_chat(db):
+    m, answers = _message(chat_id=999, from_id=1)      # boshqa chat (guruh yoki soxta chat.id)
+    asyncio.run(start(m, db=None))
+    assert len(answers) == 1 and answers[0][1] is None
+
+    tg_user_cache.set("1", SessionUser(id=1, role=Role.admin))
+    m, answers = _message(chat_id=1, from_id=1)
+    asyncio.run(start(m, db=None))
+    url = answers[0][1].inline_keyboard[0][0].url
+    assert "/auth/magic?tg_id=1&sig=" in url